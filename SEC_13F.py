@@ -3,16 +3,59 @@
 
 # Script to import the holdings information from SEC form 13F-HR
 
-import requests, time, re, pymysql, datetime, yaml, json
-from io import StringIO
-import pandas as pd
-pd.options.display.float_format = "{:,.2f}".format
-import sqlalchemy as sql
-from sqlalchemy import Table, Column
-from sqlalchemy.types import DateTime, Date,Float, Integer, Text, VARCHAR, TypeDecorator
+import time, re, datetime, json, threading, os, hashlib, sqlite3, uuid, math, random
+from collections import deque
+import concurrent.futures
+from concurrent.futures import Future, ThreadPoolExecutor
+import argparse, bisect, contextlib, contextvars, cProfile, csv, email.utils, functools, gzip, importlib, itertools, pickle, queue, tempfile, tracemalloc, zipfile
+from io import StringIO, BytesIO
 import urllib.parse
-from bs4 import BeautifulSoup
-print('Imports Complete')
+
+_import_lock = threading.RLock()
+
+class _LazyModule:
+    """Stand-in for a heavy dependency that imports it on first use.
+    
+    pandas, SQLAlchemy, lxml, requests and yaml take most of a
+    second to import, which every cron job, CLI --help and spawned parse
+    process would otherwise pay before doing any work. Attribute access
+    imports the real module, runs setup on it once, and delegates to it
+    from then on.
+    
+    Args:
+        name (str): Module to import, e.g. 'lxml.etree'.
+        setup (callable): Optional; Called with the module after it is
+            imported. Defaults to None.
+    """
+    def __init__(self, name, setup=None):
+        self._name = name
+        self._setup = setup
+        self._module = None
+
+    def _load(self):
+        with _import_lock:
+            if self._module is None:
+                module = importlib.import_module(self._name)
+                if self._setup is not None:
+                    self._setup(module)
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+def _setup_pandas(module):
+    module.options.display.float_format = "{:,.2f}".format
+
+pd = _LazyModule('pandas', _setup_pandas)
+sql = _LazyModule('sqlalchemy')
+etree = _LazyModule('lxml.etree')
+requests = _LazyModule('requests')
+yaml = _LazyModule('yaml')
 
 def make_url(base_url, comp):
     url = base_url
@@ -20,16 +63,1260 @@ def make_url(base_url, comp):
         url = '{}/{}'.format(url, r)
     return url
 
-def speed_bump(delay=.1):
-    """Time delay requested by the SEC for accessing its website.
+class TokenBucket:
+    """Thread-safe token bucket limiting the request rate to the SEC website.
+    
+    A single bucket is shared by every thread in the process so that
+    concurrent requests together never exceed the fair access limit.
+    
+    https://www.sec.gov/developer (Fair Access)
+    
+    Args:
+        rate (float): Tokens added per second. Defaults to 10.
+        capacity (float): Maximum number of tokens held at once, i.e.
+            the largest burst allowed. Defaults to 1.
+    """
+    def __init__(self, rate=10, capacity=1):
+        if rate <= 0:
+            raise ValueError('rate argument must be greater than zero')
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and consumes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._stamp) * self.rate
+                                  )
+                self._stamp = now
+                # Allows for rounding, which would otherwise cost a second sleep
+                if self._tokens >= 1 - 1e-9:
+                    self._tokens = max(self._tokens - 1, 0.0)
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate):
+        """Changes the rate, keeping the tokens accrued at the old one."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self.rate = float(rate)
+
+class RateController:
+    """AIMD controller of the request rate and concurrency to the SEC website.
+    
+    Requests start at the configured rate with two in flight. Every
+    window of successful (2xx or 304) responses adds one concurrent
+    request, up to max_workers, and a tenth of the configured rate, up
+    to that rate. Connection errors and other error responses leave both
+    unchanged, so a failing server never speeds the process up. A
+    throttling response (429, 503 or the 403 "Request Rate Threshold
+    Exceeded" page) halves both and holds every request until its
+    Retry-After has passed, so the process settles just under the limit
+    the server enforces. Throttles of requests sent before the last
+    decrease are part of the same burst and only count once.
     
     https://www.sec.gov/developer (Fair Access)
     
     Args:
-        delay (float): time delay. Defaults to 1/10th of a second."""
-    time.sleep(delay)
+        rate (float): Ceiling of the requests per second. Defaults to 10.
+        max_workers (int): Ceiling of the requests in flight. Defaults
+            to 8.
+        min_rate (float): Floor of the requests per second. Defaults to
+            0.5.
+    """
+    def __init__(self, rate=10, max_workers=8, min_rate=0.5):
+        self.bucket = TokenBucket(rate=rate)
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.max_workers = max_workers
+        self.limit = min(2, max_workers)
+        self._active = 0
+        self._successes = 0
+        self._hold_until = 0.0
+        self._decreased = 0.0
+        self._start = time.monotonic()
+        self._cond = threading.Condition()
+        self.stats = {'requests': 0, 'bytes': 0, 'throttled': 0, 'retries': 0}
+
+    def acquire(self):
+        """Blocks until a request may be sent; returns the time it was let through."""
+        with self._cond:
+            while True:
+                wait = self._hold_until - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                elif self._active >= self.limit:
+                    self._cond.wait()
+                else:
+                    self._active += 1
+                    break
+        self.bucket.acquire()
+        return time.monotonic()
+
+    def release(self, sent, nbytes=0, throttled=False, retry_after=None, ok=True):
+        """Frees the slot of a request sent at sent and adapts to its response.
+        
+        ok is False for a connection error or an error response that was
+        not a throttle; those free the slot without an AIMD step.
+        """
+        with self._cond:
+            self._active -= 1
+            self.stats['requests'] += 1
+            self.stats['bytes'] += nbytes
+            now = time.monotonic()
+            if throttled:
+                self.stats['throttled'] += 1
+                self._successes = 0
+                if retry_after:
+                    self._hold_until = max(self._hold_until, now + retry_after)
+                if sent >= self._decreased:
+                    self._decreased = now
+                    self.limit = max(1, self.limit // 2)
+                    self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+            elif ok:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self._successes = 0
+                    self.limit = min(self.max_workers, self.limit + 1)
+                    self.bucket.set_rate(min(self.max_rate,
+                                             self.bucket.rate + self.max_rate / 10))
+            self._cond.notify_all()
+
+    def retried(self):
+        """Counts a request that is sent again."""
+        with self._cond:
+            self.stats['retries'] += 1
+
+    def info(self):
+        """Returns the current rate and concurrency along with throughput counters."""
+        with self._cond:
+            elapsed = time.monotonic() - self._start
+            return dict(self.stats, rate=self.bucket.rate, concurrency=self.limit,
+                        elapsed=elapsed,
+                        requests_per_sec=self.stats['requests'] / elapsed if elapsed else 0.0,
+                        bytes_per_sec=self.stats['bytes'] / elapsed if elapsed else 0.0)
+
+class ResponseCache:
+    """Content-addressed on-disk cache of SEC website responses.
+    
+    Response bodies are stored once per SHA-256 digest under cache_dir
+    and a SQLite index maps each url to its digest, ETag and
+    Last-Modified headers along with the time the body was last
+    confirmed current. Filing documents under /Archives/edgar/data/
+    never change once published and are served from the cache without a
+    request; every other url is served while younger than the max_age
+    given to fetch() and otherwise revalidated with a conditional GET.
+    When the stored bodies exceed max_bytes the least recently used
+    entries are evicted.
+    
+    Args:
+        cache_dir (str): Directory holding the index and response bodies.
+        max_bytes (int): Optional; Size limit of the stored bodies.
+            Defaults to 2 GiB.
+    """
+    def __init__(self, cache_dir, max_bytes=2 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'),
+                                   check_same_thread=False,
+                                   isolation_level=None
+                                  )
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                url TEXT PRIMARY KEY,
+                                digest TEXT NOT NULL,
+                                etag TEXT,
+                                last_modified TEXT,
+                                size INTEGER NOT NULL,
+                                accessed REAL NOT NULL,
+                                fetched REAL NOT NULL DEFAULT 0)""")
+        columns = [c[1] for c in self._db.execute('PRAGMA table_info(responses)')]
+        if 'fetched' not in columns:
+            self._db.execute('ALTER TABLE responses ADD COLUMN fetched REAL NOT NULL DEFAULT 0')
+        self._db.execute("""CREATE INDEX IF NOT EXISTS ix_responses_accessed
+                            ON responses (accessed)""")
+        self._db.execute("""CREATE INDEX IF NOT EXISTS ix_responses_digest
+                            ON responses (digest)""")
+        self._size = self._db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'evicted': 0}
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, 'objects', digest[:2], digest)
+
+    def lookup(self, url):
+        """Returns (body, etag, last_modified, fetched) for a cached url or None."""
+        with self._lock:
+            row = self._db.execute('SELECT digest, etag, last_modified, fetched '
+                                   'FROM responses WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._blob_path(row[0]), 'rb') as blob:
+                body = blob.read()
+        except FileNotFoundError:
+            return None
+        return body, row[1], row[2], row[3]
+
+    def count(self, key):
+        """Increments one of the hit/miss counters."""
+        with self._lock:
+            self.stats[key] += 1
+
+    def touch(self, url, revalidated=False):
+        """Marks a cached url as recently used, and current if revalidated."""
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._db.execute('UPDATE responses SET accessed = ?, fetched = ? '
+                                 'WHERE url = ?', (now, now, url))
+            else:
+                self._db.execute('UPDATE responses SET accessed = ? WHERE url = ?',
+                                 (now, url))
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Adds or replaces the cached response for a url."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as blob:
+                blob.write(body)
+            os.replace(tmp_path, path)
+        with self._lock:
+            old = self._db.execute('SELECT size FROM responses WHERE url = ?',
+                                   (url,)).fetchone()
+            now = time.time()
+            self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (url, digest, etag, last_modified, len(body), now, now))
+            self._size += len(body) - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Oldest entries first, a page at a time through ix_responses_accessed
+        while self._size > self.max_bytes:
+            rows = self._db.execute('SELECT url, digest, size FROM responses '
+                                    'ORDER BY accessed LIMIT 64').fetchall()
+            if not rows:
+                break
+            for url, digest, size in rows:
+                if self._size <= self.max_bytes:
+                    break
+                self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self._size -= size
+                self.stats['evicted'] += 1
+                shared = self._db.execute('SELECT 1 FROM responses WHERE digest = ? LIMIT 1',
+                                          (digest,)).fetchone()
+                if shared is None:
+                    try:
+                        os.remove(self._blob_path(digest))
+                    except FileNotFoundError:
+                        pass
+
+    def info(self):
+        """Returns a dict of hit/miss counters and the cache size."""
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        return dict(self.stats, entries=entries, bytes=self._size,
+                    max_bytes=self.max_bytes)
+
+_stage = contextvars.ContextVar('stage', default=None)
+
+class Metrics:
+    """Thread-safe counters and latency histograms of pipeline stages.
+    
+    Every counter and histogram is kept per stage, the innermost
+    instrumented function running in the current context (None outside
+    of one). Stage functions record their duration and rows emitted,
+    fetch() its requests, bytes and cache hits, the parse step of each
+    stage its seconds and bytes parsed, and sql_13f() the rows written.
+    Histograms use fixed cumulative buckets in seconds, as Prometheus
+    does.
+    
+    Args:
+        buckets (tuple): Optional; Upper bounds of the histogram buckets
+            in seconds. Defaults to Metrics.BUCKETS.
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, math.inf)
+    
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets) if buckets else self.BUCKETS
+        if self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, stage=None):
+        """Adds value to a counter of the current stage."""
+        key = (name, stage or _stage.get())
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, stage=None):
+        """Records a duration in a histogram of the current stage."""
+        key = (name, stage or _stage.get())
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {'buckets': [0] * len(self.buckets),
+                                               'sum': 0.0, 'count': 0}
+            hist['buckets'][bisect.bisect_left(self.buckets, seconds)] += 1
+            hist['sum'] += seconds
+            hist['count'] += 1
+
+    @contextlib.contextmanager
+    def timer(self, name, stage=None):
+        """Context manager observing the seconds spent in its block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, stage)
+
+    def stage(self, stage):
+        """Returns the counters and histogram count/sum of one stage as a dict."""
+        with self._lock:
+            result = {name: value for (name, s), value in self.counters.items() if s == stage}
+            for (name, s), hist in self.histograms.items():
+                if s == stage:
+                    result[name + '_count'] = hist['count']
+                    result[name + '_sum'] = hist['sum']
+        return result
+
+    def snapshot(self):
+        """Returns every stage's counters and histogram count/sum as a dict."""
+        with self._lock:
+            stages = {s for _name, s in itertools.chain(self.counters, self.histograms)}
+        return {s: self.stage(s) for s in stages}
+
+    def prometheus(self, prefix='sec13f'):
+        """Returns all metrics in the Prometheus text exposition format."""
+        label = lambda stage, **extra: '{' + ','.join(
+            f'{k}="{v}"' for k, v in dict(stage=stage or '', **extra).items()) + '}'
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items(), key=lambda kv: (kv[0][0], kv[0][1] or ''))
+            histograms = sorted(self.histograms.items(), key=lambda kv: (kv[0][0], kv[0][1] or ''))
+            histograms = [(key, dict(hist, buckets=list(hist['buckets']))) for key, hist in histograms]
+        for name, group in itertools.groupby(counters, key=lambda kv: kv[0][0]):
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            lines += [f'{prefix}_{name}_total{label(stage)} {value}' for (_n, stage), value in group]
+        for name, group in itertools.groupby(histograms, key=lambda kv: kv[0][0]):
+            lines.append(f'# TYPE {prefix}_{name} histogram')
+            for (_n, stage), hist in group:
+                for bound, count in zip(self.buckets, itertools.accumulate(hist['buckets'])):
+                    le = '+Inf' if bound == math.inf else repr(float(bound))
+                    lines.append(f'{prefix}_{name}_bucket{label(stage, le=le)} {count}')
+                lines.append(f'{prefix}_{name}_sum{label(stage)} {hist["sum"]}')
+                lines.append(f'{prefix}_{name}_count{label(stage)} {hist["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Clears every counter and histogram."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+class JsonLinesExporter:
+    """Metrics exporter appending one JSON object per finished stage call.
+    
+    Each line holds the stage name, start time, seconds, rows emitted,
+    the error raised if any, and the change in each of the stage's
+    counters and histogram count/sum during the call.
+    
+    Args:
+        path (str): File the lines are appended to.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, record, metrics):
+        line = json.dumps(record, default=str)
+        with self._lock, open(self.path, 'a') as file:
+            file.write(line + '\n')
+
+class PrometheusExporter:
+    """Metrics exporter rewriting a Prometheus text file after every stage.
+    
+    The file is replaced atomically, so it can be read by the
+    node_exporter textfile collector while a run is in progress.
+    
+    Args:
+        path (str): Location of the .prom file.
+        prefix (str): Optional; Prefix of the metric names. Defaults
+            to 'sec13f'.
+    """
+    def __init__(self, path, prefix='sec13f'):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def __call__(self, record, metrics):
+        text = metrics.prometheus(self.prefix)
+        with self._lock:
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as file:
+                file.write(text)
+            os.replace(tmp_path, self.path)
+
+_metrics = Metrics()
+_exporters = []
+PROFILE_STAGES = set()
+PROFILE_DIR = '.'
+_profiling = threading.Lock()
+
+def configure_metrics(jsonl_path=None, prometheus_path=None, exporters=None,
+                      profile=None, profile_dir=None):
+    """Sets where stage metrics are exported and which stages are profiled.
+    
+    Args:
+        jsonl_path (str): Optional; File a JsonLinesExporter appends a
+            record to after every stage call. Defaults to None.
+        prometheus_path (str): Optional; File a PrometheusExporter
+            rewrites after every stage call. Defaults to None.
+        exporters (list): Optional; Further callables taking
+            (record, metrics) after every stage call. Defaults to None.
+        profile (str or list): Optional; Stage function name(s) run
+            under cProfile and tracemalloc. Each call writes a .prof
+            file and the top allocation sites to profile_dir. Only the
+            calling thread is profiled, so fetch threads and parse
+            processes are not; configure_parse(0) brings parsing into
+            the profile. Defaults to None, profiling nothing.
+        profile_dir (str): Optional; Directory the profiles are written
+            to. Defaults to None, leaving the current value unchanged.
+            
+    Returns:
+        The Metrics collecting the counters.
+    """
+    global PROFILE_STAGES, PROFILE_DIR
+    _exporters.clear()
+    if jsonl_path is not None:
+        _exporters.append(JsonLinesExporter(jsonl_path))
+    if prometheus_path is not None:
+        _exporters.append(PrometheusExporter(prometheus_path))
+    _exporters.extend(exporters or [])
+    if isinstance(profile, str):
+        profile = [profile]
+    PROFILE_STAGES = set(profile or [])
+    if profile_dir is not None:
+        PROFILE_DIR = profile_dir
+    return _metrics
+
+def metrics():
+    """Returns the process-wide Metrics."""
+    return _metrics
+
+def _rows(result):
+    """Returns the number of rows of a stage result, the largest if several."""
+    if isinstance(result, tuple):
+        return max((_rows(r) for r in result), default=0)
+    if isinstance(result, (pd.DataFrame, list)):
+        return len(result)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return 0
+
+@contextlib.contextmanager
+def _profile(stage):
+    """Runs its block under cProfile and tracemalloc if the stage is profiled."""
+    if stage not in PROFILE_STAGES or not _profiling.acquire(blocking=False):
+        yield
+        return
+    stamp = datetime.datetime.now().strftime('%Y%m%dT%H%M%S%f')
+    base = os.path.join(PROFILE_DIR, f'{stage}-{stamp}')
+    profiler = cProfile.Profile()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not tracing:
+            tracemalloc.stop()
+        _profiling.release()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(base + '.prof')
+        with open(base + '.tracemalloc.txt', 'w') as file:
+            file.write(f'current={current} peak={peak} bytes\n')
+            file.writelines(f'{stat}\n' for stat in snapshot.statistics('lineno')[:50])
+        print(f'Profile of {stage} written to {base}.prof')
+
+def _instrumented(func):
+    """Decorator timing a stage function and exporting its metrics.
+    
+    The function's name becomes the current stage while it runs, so the
+    counters recorded below it are attributed to it.
+    """
+    stage = func.__name__
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        before = _metrics.stage(stage)
+        started = datetime.datetime.now()
+        start = time.perf_counter()
+        token = _stage.set(stage)
+        result, error = None, None
+        try:
+            with _profile(stage):
+                result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            _stage.reset(token)
+            elapsed = time.perf_counter() - start
+            rows = _rows(result)
+            _metrics.observe('stage_seconds', elapsed, stage)
+            _metrics.inc('rows', rows, stage)
+            if _exporters:
+                after = _metrics.stage(stage)
+                record = {'stage': stage, 'start': started.isoformat(),
+                          'seconds': elapsed, 'rows': rows,
+                          'error': None if error is None else f'{type(error).__name__}: {error}'}
+                record.update({k: v - before.get(k, 0) for k, v in after.items()
+                               if k not in ('rows', 'stage_seconds_count', 'stage_seconds_sum')})
+                if record.get('sql_rows'):
+                    record['sql_rows_per_sec'] = record['sql_rows'] / elapsed
+                for exporter in _exporters:
+                    exporter(record, _metrics)
+    return wrapper
+
+FETCH_WORKERS = 8
+USER_AGENT = None
+SEC_URL = 'https://www.sec.gov'
+FETCH_RETRIES = 5
+FETCH_TIMEOUT = 60
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+_controller = RateController(rate=10, max_workers=FETCH_WORKERS)
+_cache = None
+_ingest_index = None
+_session = None
+_session_lock = threading.Lock()
+# Parsing in a process pool only pays off with a second core to run on.
+PARSE_WORKERS = os.cpu_count() if (os.cpu_count() or 1) > 1 else 0
+_parse_pool = None
+
+def configure_fetch(rate=None, max_workers=None, user_agent=None, base_url=None,
+                    retries=None):
+    """Sets the process-wide request rate and number of concurrent requests.
+    
+    Both are ceilings for the RateController, which ramps up to them and
+    backs off when the SEC website throttles requests.
+    
+    Args:
+        rate (float): Optional; Requests per second allowed across all
+            threads. The SEC fair access limit is 10. Defaults to None,
+            leaving the current rate unchanged.
+        max_workers (int): Optional; Largest number of requests kept in
+            flight at once. Also sets the size of the connection pool.
+            Defaults to None, leaving the current value unchanged.
+        user_agent (str): Optional; User-Agent header sent with every
+            request. The SEC asks for a company name and contact email.
+            Defaults to None, leaving the current value unchanged.
+        base_url (str): Optional; Scheme and host that EDGAR links are
+            built on, e.g. a local stand-in server for benchmarks.
+            Defaults to None, leaving the current value (SEC_URL)
+            unchanged.
+        retries (int): Optional; Times a throttled or failed request is
+            sent again before its error is raised. Defaults to None,
+            leaving the current value (FETCH_RETRIES) unchanged.
+            
+    Raises:
+        ValueError: max_workers argument must be greater than zero
+        ValueError: retries argument must not be negative
+    """
+    global _controller, FETCH_WORKERS, FETCH_RETRIES, USER_AGENT, SEC_URL, _session
+    if max_workers is not None:
+        if max_workers < 1:
+            raise ValueError('max_workers argument must be greater than zero')
+        FETCH_WORKERS = max_workers
+    if rate is not None or max_workers is not None:
+        _controller = RateController(rate=rate if rate is not None else _controller.max_rate,
+                                     max_workers=FETCH_WORKERS)
+    if retries is not None:
+        if retries < 0:
+            raise ValueError('retries argument must not be negative')
+        FETCH_RETRIES = retries
+    if user_agent is not None:
+        USER_AGENT = user_agent
+    if base_url is not None:
+        SEC_URL = base_url.rstrip('/')
+    with _session_lock:
+        _session = None
+
+def configure_cache(cache_dir=None, max_bytes=2 * 1024**3):
+    """Enables or disables the on-disk response cache used by fetch().
+    
+    Args:
+        cache_dir (str): Optional; Directory for the cache. If None is
+            passed, caching is disabled. Defaults to None.
+        max_bytes (int): Optional; Size limit of the cached response
+            bodies before least recently used entries are evicted.
+            Defaults to 2 GiB.
+            
+    Returns:
+        The ResponseCache in use, or None when caching is disabled.
+    """
+    global _cache
+    _cache = ResponseCache(cache_dir, max_bytes) if cache_dir is not None else None
+    return _cache
+
+def configure_parse(max_workers=None):
+    """Sets the number of processes that parse fetched documents.
+    
+    Documents are parsed in a ProcessPoolExecutor so that parsing large
+    information tables uses every core while requests continue in the
+    fetch threads. On platforms that start processes with spawn, scripts
+    calling the pipeline need an if __name__ == '__main__' guard.
+    
+    Args:
+        max_workers (int): Optional; Number of parse processes. 0 parses
+            in the calling process. Defaults to None, using every core
+            when there is more than one.
+            
+    Raises:
+        ValueError: max_workers argument must not be negative
+    """
+    global PARSE_WORKERS, _parse_pool
+    if max_workers is not None and max_workers < 0:
+        raise ValueError('max_workers argument must not be negative')
+    with _session_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown()
+            _parse_pool = None
+        if max_workers is None:
+            max_workers = os.cpu_count() if (os.cpu_count() or 1) > 1 else 0
+        PARSE_WORKERS = max_workers
+
+def _get_parse_pool():
+    """Returns the shared parse process pool, or None to parse in process."""
+    global _parse_pool
+    with _session_lock:
+        if _parse_pool is None and PARSE_WORKERS > 0:
+            # Looked up here so that multiprocessing is only imported when used
+            _parse_pool = concurrent.futures.ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        return _parse_pool
+
+def fetch_stats():
+    """Returns the request rate, concurrency and throughput of fetch()."""
+    return _controller.info()
+
+def configure_ingest_index(path=None):
+    """Enables or disables the IngestIndex of filings already loaded.
+    
+    Keys are added once the SQL commit they belong to succeeds: main()
+    adds the accession number and file_id of every filing it loads,
+    sql_bulk_13f() those of a data set, and sql_13f() the file_ids of
+    the holdings it loads. DataFrames carry no accession numbers, so
+    outside of main() and sql_bulk_13f() index.json and primary_doc.xml
+    requests are still made and only information tables are skipped.
+    
+    Args:
+        path (str): Optional; Location of the index database. If None
+            is passed, no filings are skipped. Defaults to None.
+            
+    Returns:
+        The IngestIndex in use, or None when disabled.
+    """
+    global _ingest_index
+    if _ingest_index is not None:
+        _ingest_index.close()
+    _ingest_index = IngestIndex(path) if path is not None else None
+    return _ingest_index
+
+def cache_stats():
+    """Returns hit/miss statistics of the response cache or None if disabled."""
+    return _cache.info() if _cache is not None else None
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4,
+                                                    pool_maxsize=FETCH_WORKERS
+                                                   )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['Accept-Encoding'] = 'gzip, deflate'
+            if USER_AGENT is not None:
+                session.headers['User-Agent'] = USER_AGENT
+            _session = session
+        return _session
+
+def fetch(url, max_age=None):
+    """Returns the body of a url on the SEC website as bytes.
+    
+    Every request waits on the shared RateController so that the
+    process stays within the rate and concurrency set by
+    configure_fetch(), and is sent through a pooled keep-alive session.
+    Throttled requests (429, 503, or a 403 rate threshold page), other
+    5xx responses and connection errors are sent again up to
+    FETCH_RETRIES times, after the Retry-After the server asked for or a
+    jittered exponential backoff. When configure_cache() has enabled the
+    response cache, filing documents are read from disk and other urls
+    are served from disk while younger than max_age and revalidated with
+    If-None-Match/If-Modified-Since after that.
+    
+    Args:
+        url (str): Link to request.
+        max_age (float): Optional; Seconds a cached response is used
+            without revalidation. math.inf treats the url as immutable.
+            Defaults to None, revalidating on every call.
+        
+    Returns:
+        The response body as bytes.
+        
+    Raises:
+        requests.HTTPError: The final response was an error status.
+        requests.ConnectionError: The request failed on every attempt.
+    """
+    cache = _cache
+    cached = cache.lookup(url) if cache is not None else None
+    headers = {}
+    if cached is not None:
+        body, etag, last_modified, fetched = cached
+        if ('/Archives/edgar/data/' in url
+                or (max_age is not None and time.time() - fetched <= max_age)):
+            cache.count('hits')
+            _metrics.inc('cache_hits')
+            cache.touch(url)
+            return body
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+    
+    controller = _controller
+    for attempt in itertools.count():
+        sent = controller.acquire()
+        try:
+            with _metrics.timer('request_seconds'):
+                resp = _get_session().get(url, headers=headers, timeout=FETCH_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            controller.release(sent, ok=False)
+            if attempt >= FETCH_RETRIES:
+                raise
+            retry_after = None
+        else:
+            throttled = _throttled(resp)
+            retry_after = _retry_after(resp) if throttled else None
+            ok = 200 <= resp.status_code < 300 or resp.status_code == 304
+            controller.release(sent, len(resp.content), throttled, retry_after, ok)
+            _metrics.inc('requests')
+            _metrics.inc('bytes', len(resp.content))
+            if throttled:
+                _metrics.inc('throttled')
+            if not throttled and resp.status_code not in RETRY_STATUSES:
+                break
+            if attempt >= FETCH_RETRIES:
+                resp.raise_for_status()
+        controller.retried()
+        _metrics.inc('retries')
+        time.sleep(_backoff(attempt, retry_after))
+    
+    if cached is not None and resp.status_code == 304:
+        cache.count('revalidated')
+        _metrics.inc('cache_revalidated')
+        cache.touch(url, revalidated=True)
+        return cached[0]
+    if cache is not None:
+        cache.count('misses')
+        _metrics.inc('cache_misses')
+        if resp.status_code == 200:
+            cache.store(url, resp.content,
+                        resp.headers.get('ETag'),
+                        resp.headers.get('Last-Modified')
+                       )
+    # Error pages are never handed to the parsers as documents
+    resp.raise_for_status()
+    return resp.content
+
+def _throttled(resp):
+    """Returns True if a response is the SEC website asking to slow down."""
+    return (resp.status_code in (429, 503)
+            or (resp.status_code == 403 and b'Request Rate Threshold Exceeded' in resp.content))
+
+def _retry_after(resp):
+    """Returns the seconds of a Retry-After header, or None without one."""
+    value = resp.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((when - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
+
+def _backoff(attempt, retry_after=None):
+    """Returns the jittered seconds to wait before sending a request again.
+    
+    Waits out Retry-After when the server gave one, and otherwise an
+    exponential delay with equal jitter so that threads throttled
+    together do not retry together.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, BACKOFF_BASE)
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def fetch_many(urls, max_workers=None, max_age=None, return_exceptions=False):
+    """Yields the bodies of a sequence of urls, in order, using a thread pool.
+    
+    Several requests are kept in flight at once while the shared
+    RateController holds the overall rate and concurrency at or below
+    the configured limits. Only a small window of responses is held
+    ahead of the consumer, so memory stays bounded for long link lists.
+    The effective throughput is printed once all urls are fetched.
+    
+    Args:
+        urls (iterable): Links to request.
+        max_workers (int): Optional; Number of concurrent requests.
+            Defaults to None, using the value set by configure_fetch().
+        max_age (float or list): Optional; max_age passed to fetch(),
+            either one value for every url or a list with one value per
+            url. Defaults to None.
+        return_exceptions (bool): Optional; Yield the exception raised
+            for a url in place of its body instead of raising it.
+            Defaults to False.
+            
+    Yields:
+        The response body of each url as bytes, in the order given.
+    """
+    def result(future):
+        try:
+            return future.result()
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return e
+    
+    workers = max_workers or FETCH_WORKERS
+    if not isinstance(max_age, list):
+        max_age = itertools.repeat(max_age)
+    before = _controller.info()
+    count = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for url, age in zip(urls, max_age):
+                # Requests are counted under the stage consuming the bodies
+                context = contextvars.copy_context()
+                pending.append(pool.submit(context.run, fetch, url, age))
+                count += 1
+                if len(pending) >= workers * 2:
+                    yield result(pending.popleft())
+            while pending:
+                yield result(pending.popleft())
+    finally:
+        # Also reached when the consumer closes the generator early
+        _report_throughput(count, before, _controller.info())
+
+def _report_throughput(count, before, after):
+    """Prints the requests/sec and MB/sec between two fetch_stats() results."""
+    requests_sent = after['requests'] - before['requests']
+    elapsed = after['elapsed'] - before['elapsed']
+    if count > 1 and requests_sent and elapsed > 0:
+        print(f'Fetched {count} urls, {requests_sent / elapsed:.1f} requests/sec, ' +
+              f'{(after["bytes"] - before["bytes"]) / elapsed / 2**20:.2f} MB/sec, ' +
+              f'{after["throttled"] - before["throttled"]} throttled ' +
+              f'(rate {after["rate"]:.1f}/sec, {after["concurrency"]} in flight).')
+
+class Journal:
+    """Append-only SQLite journal of pipeline work for checkpoint and resume.
+    
+    Every filing a pipeline stage processes is recorded under the
+    stage name and the filing's link, either with its parsed result or
+    with the error that stopped it. A later run given the same journal
+    replays the recorded results instead of fetching those filings
+    again, retries the failures, and only requests what is left. Entries
+    are never updated in place; the latest entry for a link wins, found
+    through an index on (stage, key, id) so that the entries superseded
+    by retries and reruns are never read.
+    
+    Args:
+        path (str): Location of the journal database file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute("""CREATE TABLE IF NOT EXISTS entries (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                stage TEXT NOT NULL,
+                                key TEXT NOT NULL,
+                                status TEXT NOT NULL,
+                                result BLOB,
+                                error TEXT,
+                                recorded REAL NOT NULL)""")
+        self._db.execute('DROP INDEX IF EXISTS ix_entries_stage_key')
+        self._db.execute("""CREATE INDEX IF NOT EXISTS ix_entries_latest
+                            ON entries (stage, key, id)""")
+        self._db.execute("""CREATE INDEX IF NOT EXISTS ix_entries_errors
+                            ON entries (recorded) WHERE status = 'error'""")
+
+    def record(self, stage, key, result=None, error=None):
+        """Appends the result of one item, or the exception it raised."""
+        if error is None:
+            row = (stage, key, 'ok', pickle.dumps(result), None, time.time())
+        else:
+            row = (stage, key, 'error', None, f'{type(error).__name__}: {error}', time.time())
+        with self._lock:
+            self._db.execute('INSERT INTO entries (stage, key, status, result, error, recorded) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', row)
+
+    def _latest(self, columns, where, params=()):
+        """Returns columns of the latest entry of each (stage, key) matching where."""
+        with self._lock:
+            return self._db.execute(f"""SELECT {columns} FROM entries AS e
+                                        WHERE {where} AND id = (
+                                            SELECT MAX(id) FROM entries
+                                            WHERE stage = e.stage AND key = e.key)
+                                        ORDER BY id""",
+                                    params).fetchall()
+
+    def results(self, stage, keys=None):
+        """Returns a dict of key to result for the completed items of a stage.
+        
+        Given keys, only their entries are looked up and only the completed
+        ones are unpickled, so the cost follows len(keys) rather than the
+        size of the journal.
+        """
+        where = "status = 'ok' AND stage = ?"
+        if keys is None:
+            rows = self._latest('key, result', where, (stage,))
+        else:
+            keys = list(dict.fromkeys(keys))
+            rows = []
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ', '.join('?' * len(chunk))
+                rows += self._latest('key, result', f'{where} AND key IN ({marks})',
+                                     [stage] + chunk)
+        return {key: pickle.loads(result) for key, result in rows}
+
+    def quarantined(self, stage=None, since=None):
+        """Returns a DataFrame of the items whose latest entry is an error.
+        
+        Args:
+            stage (str): Optional; Only items of this stage. Defaults to
+                None, all stages.
+            since (float): Optional; Only errors recorded at or after this
+                time.time() value. Defaults to None.
+        """
+        where, params = "status = 'error'", []
+        if stage:
+            where += ' AND stage = ?'
+            params.append(stage)
+        if since is not None:
+            where += ' AND recorded >= ?'
+            params.append(since)
+        rows = [(s, key, error, datetime.datetime.fromtimestamp(recorded))
+                for s, key, error, recorded
+                in self._latest('stage, key, error, recorded', where, params)]
+        return pd.DataFrame(rows, columns=['stage', 'key', 'error', 'recorded'])
+
+    def close(self):
+        """Closes the journal database."""
+        with self._lock:
+            self._db.close()
+
+class BloomFilter:
+    """In-memory Bloom filter of strings.
+    
+    Answers "possibly present" or "definitely absent" in constant time
+    with a bit array of about 1.8 bytes per key at a 0.1% false positive
+    rate. Positions come from double hashing one BLAKE2b digest.
+    
+    Args:
+        capacity (int): Number of keys the filter is sized for.
+        error_rate (float): Optional; False positive rate at capacity.
+            Defaults to 0.001.
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1024)
+        self.error_rate = error_rate
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+class IngestIndex:
+    """Persistent index of filings already loaded into SQL.
+    
+    Accession numbers and file_ids are kept in a SQLite table with an
+    in-memory BloomFilter in front of it. New filings, the common case,
+    are answered by the filter alone; only its positives are looked up
+    in SQLite. xml_list(), txt_list() and xml_13f() drop ingested
+    accessions before any request is made and holdings_13f() drops
+    ingested file_ids before requesting information tables, so links
+    reprocessed from overlapping date ranges or a rerun are not fetched
+    and parsed only to be discarded by sql_13f(). Keys are added in one
+    transaction once the SQL commit they belong to has succeeded.
+    
+    Args:
+        path (str): Location of the index database file.
+        error_rate (float): Optional; False positive rate of the Bloom
+            filter. Defaults to 0.001.
+    """
+    def __init__(self, path, error_rate=0.001):
+        self.path = path
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute("""CREATE TABLE IF NOT EXISTS ingested (
+                                kind TEXT NOT NULL,
+                                key TEXT NOT NULL,
+                                recorded REAL NOT NULL,
+                                PRIMARY KEY (kind, key)) WITHOUT ROWID""")
+        self._rebuild()
+
+    def _rebuild(self, capacity=None):
+        count = self._db.execute('SELECT COUNT(*) FROM ingested').fetchone()[0]
+        bloom = BloomFilter(max(capacity or 0, count * 2), self.error_rate)
+        for kind, key in self._db.execute('SELECT kind, key FROM ingested'):
+            bloom.add(f'{kind}:{key}')
+        self._bloom = bloom
+
+    def ingested(self, kind, keys):
+        """Returns the set of keys of a kind ('accession' or 'file_id') already ingested."""
+        with self._lock:
+            candidates = [str(key) for key in set(keys) if f'{kind}:{key}' in self._bloom]
+            found = set()
+            for start in range(0, len(candidates), 500):
+                chunk = candidates[start:start + 500]
+                marks = ', '.join('?' * len(chunk))
+                found.update(row[0] for row in self._db.execute(
+                    f'SELECT key FROM ingested WHERE kind = ? AND key IN ({marks})',
+                    [kind] + chunk))
+        return found
+
+    def add(self, accessions=(), file_ids=()):
+        """Records accession numbers and file_ids as ingested in one transaction."""
+        now = time.time()
+        rows = [('accession', str(key), now) for key in accessions if key]
+        rows += [('file_id', str(key), now) for key in file_ids if key]
+        if not rows:
+            return
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.executemany('INSERT OR IGNORE INTO ingested VALUES (?, ?, ?)', rows)
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            # The filter only learns keys once they are durable
+            if self._bloom.count + len(rows) > self._bloom.capacity:
+                self._rebuild(capacity=(self._bloom.count + len(rows)) * 2)
+            else:
+                for kind, key, _now in rows:
+                    self._bloom.add(f'{kind}:{key}')
+
+    def close(self):
+        """Closes the index database."""
+        with self._lock:
+            self._db.close()
+
+_ACCESSION_RE = re.compile(r'/data/\d+/(\d{10})-?(\d{2})-?(\d{6})')
+
+def _accession(link):
+    """Returns the 18 digit accession number in an EDGAR filing link, or None."""
+    match = _ACCESSION_RE.search(link)
+    return ''.join(match.groups()) if match else None
+
+def _skip_ingested(items, kind='accession', key=_accession):
+    """Returns items whose key is not in the configured IngestIndex."""
+    index = _ingest_index
+    if index is None or not items:
+        return items
+    keys = [key(item) for item in items]
+    done = index.ingested(kind, [k for k in keys if k])
+    if not done:
+        return items
+    kept = [item for item, k in zip(items, keys) if str(k) not in done]
+    _metrics.inc('skipped', len(items) - len(kept))
+    print(f'Skipped {len(items) - len(kept)} filings already ingested ({kind}).')
+    return kept
+
+def _run_stage(items, key, urls, parse, journal=None, stage=None):
+    """Yields each item with its parsed result, in order, through a journal.
+    
+    key(item) names an item in the journal, urls(item) lists the links it
+    needs and parse(item, bodies) turns their bodies into a result. The
+    work runs as a pipeline: fetch_many() threads fill a bounded window
+    of raw bodies, parse runs in the shared process pool (so it must be
+    a module level function or a functools.partial of one), and results
+    are handed back in order. Each stage only runs a few items ahead of
+    the next, which keeps memory bounded.
+    
+    Without a journal every body is fetched and any error is raised. With
+    one, completed items are replayed from it, only the rest are fetched,
+    and an item whose fetch or parse fails is recorded and skipped.
+    """
+    if isinstance(journal, str):
+        journal = Journal(journal)
+    done = journal.results(stage, map(key, items)) if journal is not None else {}
+    todo = [item for item in items if key(item) not in done]
+    bodies = fetch_many((url for item in todo for url in urls(item)),
+                        return_exceptions=journal is not None)
+    pool = _get_parse_pool()
+    limit = max(PARSE_WORKERS, 1) * 2
+    
+    def submit(item):
+        future = Future()
+        k = key(item)
+        if k in done:
+            _metrics.inc('replayed')
+            future.set_result((None, done[k]))
+            return future
+        got = [next(bodies) for _url in urls(item)]
+        failed = [body for body in got if isinstance(body, Exception)]
+        if failed:
+            future.set_exception(failed[0])
+            return future
+        _metrics.inc('parse_bytes', sum(len(body) for body in got))
+        if pool is not None:
+            future = pool.submit(_timed_parse, parse, item, got)
+        else:
+            try:
+                future.set_result(_timed_parse(parse, item, got))
+            except Exception as e:
+                future.set_exception(e)
+        return future
+    
+    def resolve(item, future):
+        k = key(item)
+        if journal is None or k in done:
+            seconds, result = future.result()
+        else:
+            try:
+                seconds, result = future.result()
+            except Exception as e:
+                journal.record(stage, k, error=e)
+                _metrics.inc('quarantined')
+                print(f'Quarantined {k}: {type(e).__name__}: {e}')
+                return False, None
+            journal.record(stage, k, result)
+        if seconds is not None:
+            _metrics.observe('parse_seconds', seconds)
+        _metrics.inc('items')
+        return True, result
+    
+    window = deque()
+    for item in items:
+        window.append((item, submit(item)))
+        if len(window) >= limit:
+            item, future = window.popleft()
+            ok, result = resolve(item, future)
+            if ok:
+                yield item, result
+    while window:
+        item, future = window.popleft()
+        ok, result = resolve(item, future)
+        if ok:
+            yield item, result
+    bodies.close()
+
+def _timed_parse(parse, item, bodies):
+    """Returns the seconds parse(item, bodies) took along with its result."""
+    start = time.perf_counter()
+    result = parse(item, bodies)
+    return time.perf_counter() - start, result
+
+def iter_batches(items, batch_size):
+    """Yields consecutive lists of at most batch_size items."""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def _quarter_end(year, qtr):
+    """Returns the last day of a calendar quarter."""
+    return datetime.date(year + qtr // 4, qtr % 4 * 3 + 1, 1) - datetime.timedelta(days=1)
+
+def _quarter_closed(year, qtr):
+    """Returns True once a quarter ended more than LISTING_GRACE_DAYS ago."""
+    closes = _quarter_end(year, qtr) + datetime.timedelta(days=LISTING_GRACE_DAYS + 1)
+    return datetime.date.today() >= closes
+
+def _link_date(link):
+    """Returns the date of a master index link, e.g. master.20201001.idx.
+    
+    Quarterly full-index links are dated at the end of their quarter.
+    """
+    parts = link.split('/')
+    if 'full-index' in parts:
+        return _quarter_end(int(parts[-3]), int(parts[-2][-1]))
+    mdate = parts[-1].split('.')[1]
+    fmt = "%Y%m%d" if len(mdate) == 8 else "%y%m%d"
+    return datetime.datetime.strptime(mdate, fmt).date()
+
+LISTING_TTL = 3600
+LISTING_GRACE_DAYS = 7
+
+def _listing_max_age(year, qtr=None, ttl=None):
+    """Returns the fetch() max_age for a daily-index directory listing.
+    
+    A year listing is complete once the year is over and a quarter
+    listing once the quarter is over, both allowing LISTING_GRACE_DAYS
+    for late postings, after which they are cached indefinitely. Open
+    listings are reused for ttl seconds.
+    """
+    if _quarter_closed(year, qtr or 4):
+        return math.inf
+    return LISTING_TTL if ttl is None else ttl
 
-def pull_link_list(year=datetime.date.today().year, prior_years=None):
+@_instrumented
+def pull_link_list(year=datetime.date.today().year, prior_years=None, since=None,
+                   listing_ttl=None, full_index=False):
     """Creates a list of url links to the daily master index files on the SEC website.
     
     The United States Securities and Exchange Commission's database website EDGAR 
@@ -38,15 +1325,37 @@ def pull_link_list(year=datetime.date.today().year, prior_years=None):
     one with a delimiter. This function creates a list of url links to the master
     index file for each day in a given year or years with the prior_years argument.
     
+    Directory listings are requested concurrently through fetch_many(). With
+    the response cache enabled by configure_cache(), listings of closed years
+    and quarters are read from disk without a request and the open quarter is
+    refreshed once listing_ttl has passed, so repeated planning runs cost
+    only a handful of requests.
+    
+    For backfills, full_index links each closed quarter to its compressed
+    quarterly master file under full-index/ instead, one request in place
+    of roughly 60 daily files, and lists daily files only for the current,
+    incomplete quarter. parse_links() reads both kinds of link into the same
+    DataFrame. A quarter first loaded from daily files is listed once more
+    by its quarterly file after it closes; the upserts in sql_13f() skip the
+    filings already stored.
+    
     Args:
         year (int): Optional; The ending year for the list of links. Defaults to current
             year.
         prior_years (int): Optional; Number of years to return prior to current or given
             year. Default is None.
+        since (datetime.date): Optional; Earliest date to list. Years and quarters
+            ending before it are not requested and earlier daily files are left
+            out. Default is None.
+        listing_ttl (float): Optional; Seconds a cached listing of an open year
+            or quarter is reused. Defaults to None, using LISTING_TTL.
+        full_index (bool): Optional; Link closed quarters to their quarterly
+            master index file. Defaults to False.
             
     Returns:
         A list of links to all of the daily master index files for the year(s)
-        specified.
+        specified, or with full_index the quarterly files followed by the
+        daily files of the open quarter.
         
     Raises:
         TypeError: Arguments must be integers.
@@ -70,31 +1379,47 @@ def pull_link_list(year=datetime.date.today().year, prior_years=None):
     else:  
         years = [year] 
     
-    base_url = r"https://www.sec.gov/Archives/edgar/daily-index"
+    base_url = SEC_URL + "/Archives/edgar/daily-index"
     master_idx_list = []
     
-    for y in years:
-        year_url = make_url(base_url, 
-                            [y, 'index.json']
-                           )
-        content = requests.get(year_url).json()
-
-        for item in content['directory']['item'][0:4]:
-            qtr_url = make_url(base_url, 
-                               [y, item['name'], 'index.json']
-                              )
-            qtr_content = requests.get(qtr_url).json()
-            
-            for file in qtr_content['directory']['item'][0:]:
-                if "master" in file['name']:
-                    file_url = make_url(base_url, 
-                                        [y, item['name'], file['name']]
-                                       )
-                    master_idx_list.append(file_url)
-                    
-            speed_bump()
-        
-        speed_bump()
+    if since is not None:
+        years = [y for y in years if y >= since.year]
+        since_qtr = (since.year, (since.month - 1) // 3 + 1)
+    
+    if full_index:
+        full_url = SEC_URL + "/Archives/edgar/full-index"
+        for y in years:
+            for q in range(1, 5):
+                if since is not None and (y, q) < since_qtr:
+                    continue
+                if _quarter_closed(y, q):
+                    master_idx_list.append(make_url(full_url, [y, f'QTR{q}', 'master.gz']))
+        # Only years with a quarter still open need their daily files
+        years = [y for y in years if not _quarter_closed(y, 4)]
+    
+    year_urls = [make_url(base_url, [y, 'index.json']) for y in years]
+    qtr_dirs = []
+    year_ages = [_listing_max_age(y, ttl=listing_ttl) for y in years]
+    for y, content in zip(years, fetch_many(year_urls, max_age=year_ages)):
+        for item in json.loads(content)['directory']['item'][0:4]:
+            qtr = int(item['name'][-1])
+            if since is not None and (y, qtr) < since_qtr:
+                continue
+            if full_index and _quarter_closed(y, qtr):
+                continue
+            qtr_dirs.append((y, item['name']))
+    
+    qtr_urls = [make_url(base_url, [y, qtr, 'index.json']) for y, qtr in qtr_dirs]
+    qtr_ages = [_listing_max_age(y, int(qtr[-1]), listing_ttl) for y, qtr in qtr_dirs]
+    for (y, qtr), qtr_content in zip(qtr_dirs, fetch_many(qtr_urls, max_age=qtr_ages)):
+        for file in json.loads(qtr_content)['directory']['item'][0:]:
+            if "master" in file['name']:
+                if since is not None and _link_date(file['name']) < since:
+                    continue
+                file_url = make_url(base_url, 
+                                    [y, qtr, file['name']]
+                                   )
+                master_idx_list.append(file_url)
     
     return master_idx_list
 
@@ -173,9 +1498,126 @@ def sql_path(yaml_path=None, login_key='login', user_key='username',
     
     return sql_path
 
+ENGINE_OPTIONS = {'pool_size': 5, 'max_overflow': 10, 'pool_pre_ping': True}
+_engines = {}
+_engine_lock = threading.Lock()
+_transactions = threading.local()
+
+def configure_engines(pool_size=None, max_overflow=None, pool_pre_ping=None):
+    """Sets the connection pool options used for engines created afterwards.
+    
+    Args:
+        pool_size (int): Optional; Connections kept open per engine.
+            Defaults to None, leaving the current value (5) unchanged.
+        max_overflow (int): Optional; Connections allowed beyond
+            pool_size. Defaults to None, leaving the current value (10)
+            unchanged.
+        pool_pre_ping (bool): Optional; Test connections for liveness
+            when checked out of the pool. Defaults to None, leaving the
+            current value (True) unchanged.
+    """
+    for key, value in [('pool_size', pool_size), 
+                       ('max_overflow', max_overflow),
+                       ('pool_pre_ping', pool_pre_ping)]:
+        if value is not None:
+            ENGINE_OPTIONS[key] = value
+
+def get_engine(path):
+    """Returns the shared SQLAlchemy engine for a connection string.
+    
+    Engines are created once per connection string with the pool
+    options in ENGINE_OPTIONS and reused by every SQL function, so a
+    pipeline run keeps a single connection pool per database.
+    
+    Args:
+        path (str): Connection string to use in SQLAlchemy
+            create_engine() function.
+            
+    Returns:
+        A SQLAlchemy Engine.
+    """
+    with _engine_lock:
+        engine = _engines.get(path)
+        if engine is None:
+            url = sql.engine.make_url(path)
+            options = dict(ENGINE_OPTIONS)
+            if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+                # In-memory SQLite uses a single connection per thread.
+                options = {'pool_pre_ping': options['pool_pre_ping']}
+            engine = sql.create_engine(path, **options, **_engine_args(path))
+            _engines[path] = engine
+        return engine
+
+def dispose_engines():
+    """Closes the pooled connections of every shared engine and forgets them."""
+    with _engine_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+@contextlib.contextmanager
+def sql_transaction(path):
+    """Runs the SQL functions called inside the block in one transaction.
+    
+    While the block is open, sql_dates(), sql_13f() and sql_idx_dates()
+    calls for the same connection string on this thread share its
+    connection, and everything is committed together when the block
+    exits, or rolled back if it raises. This lets a pipeline run mark
+    index dates processed only alongside the 13F tables loaded from them.
+    
+    Args:
+        path (str): Connection string to use in SQLAlchemy
+            create_engine() function.
+            
+    Yields:
+        The SQLAlchemy Connection holding the transaction.
+    """
+    active = _transactions.__dict__.setdefault('connections', {})
+    if path in active:
+        yield active[path]
+        return
+    pending = _transactions.__dict__.setdefault('after_commit', {})
+    callbacks = pending[path] = []
+    try:
+        with get_engine(path).begin() as connection:
+            active[path] = connection
+            try:
+                yield connection
+            finally:
+                del active[path]
+    finally:
+        del pending[path]
+    for func in callbacks:
+        func()
+
+def _after_commit(path, func):
+    """Calls func once the sql_transaction() open for path on this thread commits.
+    
+    func is dropped if the transaction rolls back, and called at once
+    when no transaction is open.
+    """
+    callbacks = _transactions.__dict__.get('after_commit', {}).get(path)
+    if callbacks is None:
+        func()
+    else:
+        callbacks.append(func)
+
+def _create_dates_table(connection, table):
+    """Creates the table of processed index files used by sql_dates()."""
+    meta = sql.MetaData()
+    datetable = sql.Table(table, meta,
+                          sql.Column('Date',sql.types.DateTime,
+                                     unique=True,nullable=False,index=True),
+                          sql.Column('Link',sql.types.VARCHAR(255),
+                                     unique=True,nullable=False)
+                         )
+    datetable.create(connection)
+    print(f'{table} SQL table created.')
+
+@_instrumented
 def sql_dates(path, table=None, index=None, column=None,
               year=datetime.date.today().year, prior_years=None,
-              yaml_path=None, api_key=None):
+              yaml_path=None, api_key=None, incremental=False, full_index=False):
     """Returns a list of links for SEC master index files.
     
     Utilizes the pull_link_list function to generate a list of
@@ -186,6 +1628,13 @@ def sql_dates(path, table=None, index=None, column=None,
     by the pull_link_list function. A list of dates that are
     yet to be processed is then returned.
     
+    Only the processed links dated within the range of the listed
+    links are read from SQL, and they are compared as a set. In
+    incremental mode the latest processed date (the watermark) is read
+    first and only the index directories from that date on are listed,
+    so a daily run costs the same however much history the table
+    holds. Dates before the watermark are then assumed processed.
+    
     Args:
         path (str): Connection string to use in SQLAlchemy
             create_engine() function.
@@ -207,6 +1656,11 @@ def sql_dates(path, table=None, index=None, column=None,
         api_key (str): Optional; Location key in for yaml file
             for table, index, and/or column inputs. Defaults to
             None.
+        incremental (bool): Optional; List only links dated on or
+            after the latest processed date. Defaults to False.
+        full_index (bool): Optional; List closed quarters by their
+            quarterly master index file (see pull_link_list()
+            docstring). Defaults to False.
             
         Returns:
             List of unprocessed daily master index file links from
@@ -214,65 +1668,156 @@ def sql_dates(path, table=None, index=None, column=None,
             up to date.
             
         Raises:
-            ValueError: No yaml path given for yaml_path argument.
+            ValueError: No yaml path given for yaml_path argument,
+                when no table is given either.
         """
     
-    if yaml_path == None:
+    if yaml_path == None and table is None:
         raise ValueError('No yaml path given for yaml_path argument.')
-        
-    master_idx_list = pull_link_list(year=year, 
-                                     prior_years=prior_years
-                                    )
     
-    with open(yaml_path, 'r') as file:
-        sql_yaml = yaml.load(file, 
-                             Loader=yaml.FullLoader
-                            )
-    if api_key is not None:
+    if yaml_path is not None and api_key is not None:
+        with open(yaml_path, 'r') as file:
+            sql_yaml = yaml.load(file, 
+                                 Loader=yaml.FullLoader
+                                )
         table = sql_yaml[api_key].get('table', table)
         index = sql_yaml[api_key].get('index', index)
         column = sql_yaml[api_key].get('column', column)
+    date_col = index or 'Date'
+    link_col = column or 'Link'
     
-    engine = sql.create_engine(path)
-    connection = engine.connect()
+    with sql_transaction(path) as connection:
+        if not connection.dialect.has_table(connection, table):
+            _create_dates_table(connection, table)
+            return
+        
+        datetable = sql.Table(table, sql.MetaData(), autoload_with=connection)
+        since = None
+        if incremental:
+            since = _as_date(connection.execute(
+                sql.select(sql.func.max(datetable.c[date_col]))).scalar())
+        master_idx_list = pull_link_list(year=year, 
+                                         prior_years=prior_years,
+                                         since=since,
+                                         full_index=full_index
+                                        )
+        if not master_idx_list:
+            print('SQL database is up to date.')
+            return
+        
+        link_dates = [_link_date(link) for link in master_idx_list]
+        processed = connection.execute(
+            sql.select(datetable.c[link_col]).where(
+                datetable.c[date_col] >= min(link_dates),
+                datetable.c[date_col] < max(link_dates) + datetime.timedelta(days=1)
+            )).scalars()
+        processed = set(processed)
     
-    if not connection.dialect.has_table(connection, table):
-        meta = sql.MetaData()
-        datetable = Table(table, meta,
-                          Column('Date',DateTime,
-                                 unique=True,nullable=False,index=True),
-                          Column('Link',VARCHAR(255),
-                                 unique=True,nullable=False)
-                         )
-        datetable.create(engine)
-        print(f'{table} SQL table created.')
+    new_dates = [link for link in master_idx_list if link not in processed]
+    if len(new_dates) >= 1:
+        return new_dates
     else:
-        date_sql = pd.read_sql_table(table, 
-                                     con=connection, 
-                                     index_col=index
-                                    )
-        new_dates = []
-        for link in master_idx_list:
-            if link not in date_sql[column].values:
-                new_dates.append(link)
-        if len(new_dates) >= 1:
-            return new_dates
-        else:
-            print('SQL database is up to date.')
+        print('SQL database is up to date.')
 
-def parse_links(dates):
-    """Returns a pandas DataFrame of filed SEC forms.
+def _as_date(value):
+    """Returns a date from a SQL date or datetime value, None if empty."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = pd.Timestamp(value)
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+INDEX_COLUMNS = ['CIK_int',
+                 'comp_name',
+                 'form_type',
+                 'date_filed',
+                 'file_name',
+                ]
+
+def _index_frame(body, link, forms=None):
+    """Returns the filings listed in one master index file as a DataFrame.
     
-    Extracts information on all of the filed forms listed
-    on SEC daily master index files. It accepts a list of
+    When forms is given, lines are matched against the form types before
+    anything is handed to pandas, so only the wanted rows are parsed.
+    """
+    if link.endswith('.gz'):
+        body = gzip.decompress(body)
+    content = body.decode('latin-1')
+    start_index = re.search('CIK', content).start()
+    header_end = content.index('\n', start_index)
+    if forms is None:
+        form_dtype = 'category'
+        table = content[start_index:header_end] + content[content.index('\n', header_end + 1):]
+    else:
+        form_dtype = pd.CategoricalDtype(forms)
+        pattern = re.compile(r'^[^|\r\n]*\|[^|\r\n]*\|(?:%s)\|[^\r\n]*' 
+                             % '|'.join(re.escape(f) for f in forms), re.M)
+        rows = pattern.findall(content, header_end)
+        table = '\n'.join([content[start_index:header_end].rstrip('\r')] + rows)
+    df = pd.read_csv(StringIO(table),
+                     sep='|',
+                     names=INDEX_COLUMNS, 
+                     header=0,
+                     dtype={'CIK_int':'int32', 'form_type':form_dtype},
+                     parse_dates=['date_filed']
+                    )
+    if df.empty:
+        # Nothing to parse, so read_csv leaves the dates as objects
+        df['date_filed'] = df['date_filed'].astype('datetime64[us]')
+    df['link'] = SEC_URL + "/Archives/" + df['file_name'].str.\
+        slice(stop=-4).str.replace("-", "", regex=False) + "/index.json"
+    return df
+
+def iter_links(dates, forms=None):
+    """Yields a pandas DataFrame of filed SEC forms for each index file.
+    
+    Streaming version of parse_links(). Each daily or quarterly master
+    index file is downloaded, filtered and parsed on its own, so only one
+    file's rows are held in memory at a time.
+    
+    Args:
+        dates (list): List of links to daily or quarterly SEC
+            master index files.
+        forms (str or list): Optional; Form type(s) to keep, e.g.
+            '13F-HR'. Other lines are dropped before parsing. Defaults
+            to None, keeping every form.
+            
+    Yields:
+        A DataFrame of the forms listed in each file, in the order of
+        dates, with CIK_int as int32 and form_type as a categorical.
+        
+    Raises:
+        TypeError: dates must be a list type.
+    """
+    if not isinstance(dates, list):
+        raise TypeError('dates must be a list type.')
+    if isinstance(forms, str):
+        forms = [forms]
+    
+    for k, body in zip(dates, fetch_many(dates)):
+        yield _index_frame(body, k, forms)
+
+@_instrumented
+def parse_links(dates, forms=None):
+    """Returns a pandas DataFrame of filed SEC forms.
+    
+    Extracts information on all of the filed forms listed
+    on SEC daily master index files. It accepts a list of
     links to these index files as its input. This list can 
     be generated using the pull_link_list function or 
     compared against a SQL database using the sql_dates 
-    function, resulting in only unprocessed dates.
+    function, resulting in only unprocessed dates. Quarterly
+    full-index master files, plain or gzip compressed, are
+    read the same way. Use iter_links() to process the files
+    one at a time.
     
     Args:
-        dates (list): List of links to daily SEC master
-            index files
+        dates (list): List of links to daily or quarterly SEC
+            master index files
+        forms (str or list): Optional; Form type(s) to keep (see
+            iter_links() docstring). Defaults to None.
             
         Returns:
             DataFrame containing information on all of the
@@ -282,36 +1827,14 @@ def parse_links(dates):
         Raises:
             TypeError: dates must be a list type.
     """
-    if not isinstance(dates, list):
-        raise TypeError('dates must be a list type.')
-        
-    idx_dfs = []
-    for k in dates:
-        content = requests.get(k).text
-        names = ['CIK_int',
-                 'comp_name',
-                 'form_type',
-                 'date_filed',
-                 'file_name',
-                ]
-        start_index = re.search('CIK', content).start()
-        df = pd.read_csv(StringIO(content[start_index:]),
-                         sep='|',
-                         skiprows=[1], 
-                         names=names, 
-                         header=0,
-                         parse_dates=['date_filed']
-                        )
-        df['link'] = "https://www.sec.gov/Archives/" + df['file_name'].str.\
-            replace("-", "").str.replace(".txt", "/index.json")
-        idx_dfs.append(df)
-        speed_bump()
-    
+    idx_dfs = list(iter_links(dates, forms))
     all_forms = pd.concat(idx_dfs, 
                           axis = 0, 
                           ignore_index = True
                          )
-    print(f'Parsed index links for {len(idx_dfs)} dates.')
+    if not isinstance(all_forms['form_type'].dtype, pd.CategoricalDtype):
+        all_forms['form_type'] = all_forms['form_type'].astype('category')
+    print(f'Parsed index links for {len(idx_dfs)} index files.')
     return all_forms
 
 def xml_list(df, form, form_col='form_type', link_col='link'):
@@ -320,7 +1843,8 @@ def xml_list(df, form, form_col='form_type', link_col='link'):
     Produces a list of links from a column in the DataFrame
     given filtered by the form type provided. This list will
     be use to extract the proper xml path for the file(s)
-    associated with the form type.
+    associated with the form type. Filings recorded in the
+    IngestIndex set by configure_ingest_index() are left out.
     
     Args:
         df (pandas DataFrame): DataFrame containing a
@@ -339,11 +1863,62 @@ def xml_list(df, form, form_col='form_type', link_col='link'):
     """
     if not isinstance(df, pd.DataFrame):
         raise TypeError('df must be pandas DataFrame.')
+    if isinstance(form, str):
+        form = [form]
         
-    xml_list = df[df[form_col]==form][link_col].tolist()
-    return xml_list
+    xml_list = df[df[form_col].isin(form)][link_col].tolist()
+    return _skip_ingested(xml_list)
+
+def txt_list(df, form, form_col='form_type', file_col='file_name'):
+    """Returns a list of links to SEC complete submission text files.
+    
+    Counterpart of xml_list() for submissions_13f(), built from the
+    file_name column of a parse_links() DataFrame. Filings recorded in
+    the IngestIndex set by configure_ingest_index() are left out.
+    
+    Args:
+        df (pandas DataFrame): DataFrame containing a
+            column with the file name of each submission.
+        form (str or list): Form type(s) to use as filter(s).
+        form_col (str): The DataFrame column used for form type
+            filtering. Defaults to 'form_type'.
+        file_col (str): DataFrame column containing submission
+            file names. Defaults to 'file_name'.
+        
+    Returns:
+        List of links to complete submission .txt files.
+        
+    Raises:
+        TypeError: df must be pandas DataFrame.
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError('df must be pandas DataFrame.')
+    if isinstance(form, str):
+        form = [form]
+    
+    files = df[df[form_col].isin(form)][file_col]
+    return _skip_ingested((SEC_URL + "/Archives/" + files).tolist())
+
+def _filing_links(j, bodies):
+    """Returns the xml links of a filing's index.json and its no holdings link."""
+    decode = json.loads(bodies[0])
+    xml_dict = {}
+    xml_count = 0
+    for dic in decode['directory']['item'][0:]:
+        for v in dic.values(): 
+            if ".xml" in v.lower():
+                xml_count += 1
+    for dic in decode['directory']['item'][0:]:
+        if dic['name'] == "primary_doc.xml" and xml_count > 1:
+            xml_dict['doc_xml'] = j.replace('index.json', '') + dic['name']
+            xml_dict['doc_mod'] = dic['last-modified']
+        elif ".xml" in dic['name'].lower() and dic['name'] != "primary_doc.xml":
+            xml_dict['hold_xml'] = j.replace('index.json', '') + dic['name']
+            xml_dict['hold_mod'] = dic['last-modified']
+    return xml_dict, j[:j.index('/Archives/')] + decode['directory']['name']
 
-def xml_13f(json_list):
+@_instrumented
+def xml_13f(json_list, journal=None):
     """Returns two lists of Form 13F xml links.
     
     (Form Type: 13F-HR) Registered Investment Advisors a.k.a "Institutional
@@ -361,11 +1936,18 @@ def xml_13f(json_list):
     the no_hold list.
     
     Assuming a parse_links() function call has been run, an xml_list()
-    function call could produce the list required for input. Runtime is 
-    about 120 links per minute.
+    function call could produce the list required for input. Requests are
+    made concurrently through fetch_many(), so runtime is bound by the
+    shared rate limit (about 600 links per minute at 10 requests per
+    second). Links of filings recorded in the IngestIndex set by
+    configure_ingest_index() are skipped without a request.
     
     Args:
         json_list (list): List json links for individual SEC 13F forms.
+        journal (Journal or str): Optional; Journal, or path to one, that
+            records each filing so an interrupted run resumes where it
+            stopped and a failing filing is quarantined instead of
+            aborting the batch. Defaults to None.
         
     Returns:
         List of dicts containing the xml link for the primary doc and
@@ -379,39 +1961,24 @@ def xml_13f(json_list):
     """
     if not isinstance(json_list, list):
         raise TypeError('Argument must be a list type.')
+    json_list = _skip_ingested(json_list)
     
     start_time = time.time()
     
-    json_list = json_list
     link_list = []
     no_hold = []
     lcounter = 0
     
-    for j in json_list:
-        decode = requests.get(j).json()
-        xml_dict = {}
-        xml_count = 0
-        for dic in decode['directory']['item'][0:]:
-            for v in dic.values(): 
-                if ".xml" in v.lower():
-                    xml_count += 1
-        for dic in decode['directory']['item'][0:]:
-            if dic['name'] == "primary_doc.xml" and xml_count > 1:
-                xml_dict['doc_xml'] = j.replace('index.json', '') + dic['name']
-                xml_dict['doc_mod'] = dic['last-modified']
-            elif ".xml" in dic['name'].lower() and dic['name'] != "primary_doc.xml":
-                xml_dict['hold_xml'] = j.replace('index.json', '') + dic['name']
-                xml_dict['hold_mod'] = dic['last-modified']
+    for _j, (xml_dict, no_hold_link) in _run_stage(json_list, lambda j: j, lambda j: [j],
+                                                   _filing_links, journal, 'xml_13f'):
         if xml_dict:
             link_list.append(xml_dict)
         else:
-            no_hold.append('https://www.sec.gov' + decode['directory']['name'])
+            no_hold.append(no_hold_link)
         lcounter += 1
         if lcounter % 500 == 0:
             print(f'Processed {lcounter} 13F-HR form links.')
 
-        speed_bump()
-
     print(f'\nFiles extracted, {((time.time() - start_time)/60):.2f} minutes.')
     print(str(f'Processed {len(json_list)} json links. '+
               f'{len(no_hold)} links have no holdings file.'))
@@ -419,7 +1986,405 @@ def xml_13f(json_list):
 
     return link_list, no_hold
 
-def filers_13f(xml_list, key='doc_xml'):
+_local_names = {}
+
+def _local_name(tag):
+    """Returns the lowercase local name of an lxml tag, memoized per tag."""
+    name = _local_names.get(tag)
+    if name is None:
+        name = _local_names.setdefault(tag, tag.rpartition('}')[2].lower())
+    return name
+
+# Form 13F primary doc schema. Each output field maps to the namespace-
+# stripped lowercase local name of its element, whether the document must
+# contain it, and the type it is converted to when the DataFrame is built.
+# Top level fields take the first matching element in the document.
+PRIMARY_DOC_FIELDS = {'CIK': ('cik', True, 'str'),
+                      'form': ('submissiontype', True, 'str'),
+                      'type': ('reporttype', True, 'str'),
+                      'file_no': ('form13ffilenumber', False, 'str'),
+                      'instruct5': ('provideinfoforinstruction5', True, 'str'),
+                      'instrc5info': ('additionalinformation', False, 'str'),
+                      'period': ('periodofreport', True, 'date'),
+                      'quarter': ('reportcalendarorquarter', True, 'date'),
+                      'amend': ('isamendment', False, 'str'),
+                      'entry_total': ('tableentrytotal', False, 'int'),
+                      'value_total': ('tablevaluetotal', False, 'float'),
+                      'incld_mgrs': ('otherincludedmanagerscount', False, 'int'),
+                      'confd_flag': ('isconfidentialomitted', False, 'str'),
+                     }
+
+# Repeating blocks of the primary doc. Each block key maps to the local
+# name of its container element, the local name of an ancestor the
+# container must sit within (or None), and the fields read from the
+# container's descendants. Values inside a block are only assigned to the
+# innermost open block, so an otherManager nested in an otherManager2 is
+# read as part of the otherManager2 entry.
+PRIMARY_DOC_BLOCKS = {'filingmanager': ('filingmanager', None,
+                                        {'company': ('name', True, 'str'),
+                                         'street1': ('street1', True, 'str'),
+                                         'street2': ('street2', False, 'str'),
+                                         'city': ('city', True, 'str'),
+                                         'stateorcountry': ('stateorcountry', True, 'str'),
+                                         'zipcode': ('zipcode', True, 'str'),
+                                        }),
+                      'oth_mgr': ('othermanager', 'othermanagersinfo',
+                                  {'CIK': ('cik', False, 'str'),
+                                   'file_no': ('form13ffilenumber', False, 'str'),
+                                   'name': ('name', True, 'str'),
+                                  }),
+                      'incl_mgr': ('othermanager2', None,
+                                   {'seq_no': ('sequencenumber', True, 'str'),
+                                    'cik': ('cik', False, 'str'),
+                                    'name': ('name', True, 'str'),
+                                    'file_no': ('form13ffilenumber', False, 'str'),
+                                   }),
+                      'signature': ('signatureblock', None,
+                                    {'name': ('name', True, 'str'),
+                                     'title': ('title', True, 'str'),
+                                     'phone': ('phone', True, 'str'),
+                                     'city': ('city', True, 'str'),
+                                     'stateorcountry': ('stateorcountry', True, 'str'),
+                                     'sig_date': ('signaturedate', True, 'str'),
+                                    }),
+                     }
+
+# Sections whose presence, rather than content, changes the output.
+PRIMARY_DOC_SECTIONS = ('summarypage', 'othermanagersinfo')
+
+def compile_doc_schema(fields, blocks=None, sections=()):
+    """Compiles a declarative xml schema into a single-pass extractor.
+    
+    The returned function streams a document once with lxml's iterparse
+    and fills every field of the schema with constant time lookups on
+    each element's namespace-stripped local name, instead of a separate
+    search of the whole tree per field.
+    
+    Args:
+        fields (dict): Output field to (local name, required, type)
+            tuples. The first matching element in the document is used.
+        blocks (dict): Optional; Block key to (container local name,
+            ancestor local name or None, fields dict) tuples. Each
+            container found produces one dict of its fields, in schema
+            order. Defaults to None.
+        sections (tuple): Optional; Local names whose presence is
+            recorded as True under the same key. Defaults to ().
+            
+    Returns:
+        A function taking xml bytes and returning a dict with the top
+        level fields found, a list of dicts for each block key and the
+        sections present.
+        
+    Raises:
+        ValueError: The returned function raises when a required field
+            or block field is missing.
+    """
+    blocks = blocks or {}
+    top = {}
+    for field, (tag, _required, _type) in fields.items():
+        top.setdefault(tag, []).append(field)
+    top_required = [(field, tag) for field, (tag, required, _type) in fields.items() 
+                    if required]
+    containers = {tag: (key, parent) for key, (tag, parent, _sub) in blocks.items()}
+    block_tags = {}
+    block_order = {}
+    block_required = {}
+    for key, (_tag, _parent, sub) in blocks.items():
+        block_tags[key] = {tag: field for field, (tag, _r, _t) in sub.items()}
+        block_order[key] = list(sub)
+        block_required[key] = [(field, tag) for field, (tag, required, _t) in sub.items()
+                               if required]
+    section_names = frozenset(sections)
+    
+    def extract(content):
+        doc = {key: [] for key in blocks}
+        path = []
+        open_blocks = []
+        for event, elem in etree.iterparse(BytesIO(content), 
+                                           events=('start', 'end'), 
+                                           recover=True
+                                          ):
+            if not isinstance(elem.tag, str):
+                continue
+            name = _local_name(elem.tag)
+            if event == 'start':
+                block = containers.get(name)
+                if block is not None and (block[1] is None or block[1] in path):
+                    open_blocks.append((block[0], {}, len(path)))
+                if name in section_names:
+                    doc[name] = True
+                path.append(name)
+                continue
+            
+            path.pop()
+            if open_blocks and open_blocks[-1][2] == len(path):
+                key, record, _depth = open_blocks.pop()
+                for field, tag in block_required[key]:
+                    if field not in record:
+                        raise ValueError(f'{key} block is missing required '
+                                         f'element {tag}.')
+                doc[key].append({field: record[field] for field in block_order[key]
+                                 if field in record})
+                continue
+            
+            text = elem.text or ''
+            for field in top.get(name, ()):
+                if field not in doc:
+                    doc[field] = text
+            if open_blocks:
+                key, record, _depth = open_blocks[-1]
+                field = block_tags[key].get(name)
+                if field is not None and field not in record:
+                    record[field] = text
+        
+        for field, tag in top_required:
+            if field not in doc:
+                raise ValueError(f'Document is missing required element {tag}.')
+        return doc
+    
+    return extract
+
+_primary_doc_extractor = compile_doc_schema(PRIMARY_DOC_FIELDS, 
+                                            PRIMARY_DOC_BLOCKS, 
+                                            PRIMARY_DOC_SECTIONS
+                                           )
+
+def parse_primary_doc(content):
+    """Returns a dict of the fields in a Form 13F primary doc.
+    
+    Applies the extractor compiled from PRIMARY_DOC_FIELDS,
+    PRIMARY_DOC_BLOCKS and PRIMARY_DOC_SECTIONS in a single pass over
+    the document.
+    
+    Args:
+        content (bytes): Primary doc xml.
+        
+    Returns:
+        A dict of the top level fields found, a list of dicts for
+        each block and True for each section present.
+        
+    Raises:
+        ValueError: Document is missing a required element.
+    """
+    return _primary_doc_extractor(content)
+
+class ColumnBuffer:
+    """Accumulates rows as one list per column for a single DataFrame build.
+    
+    Columns are created the first time a row contains them and padded
+    with None for earlier and later rows that lack them, matching the
+    columns pandas would produce from concatenating one row DataFrames.
+    
+    Args:
+        columns (list): Optional; Column names created up front, in
+            output order. Defaults to ().
+    """
+    def __init__(self, columns=()):
+        self.columns = {col: [] for col in columns}
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, row):
+        """Adds one row given as a dict of column name to value."""
+        for col, value in row.items():
+            values = self.columns.get(col)
+            if values is None:
+                values = self.columns[col] = [None] * self.rows
+            values.append(value)
+        self.rows += 1
+        for values in self.columns.values():
+            if len(values) < self.rows:
+                values.append(None)
+
+    def broadcast(self, row, count):
+        """Adds count rows that all repeat the values of one row dict."""
+        for col, value in row.items():
+            values = self.columns.get(col)
+            if values is None:
+                values = self.columns[col] = [None] * self.rows
+            values.extend([value] * count)
+        self.rows += count
+        for values in self.columns.values():
+            if len(values) < self.rows:
+                values.extend([None] * (self.rows - len(values)))
+
+    def frame(self, types=None):
+        """Returns the buffered rows as a DataFrame with schema types applied."""
+        df = pd.DataFrame(self.columns)
+        if types is not None:
+            _convert_types(df, types)
+        return df
+
+def _convert_types(df, types):
+    """Converts DataFrame columns in place using schema type names."""
+    for col, kind in types.items():
+        if col not in df.columns or pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        if kind == 'date':
+            df[col] = pd.to_datetime(df[col], format = '%m-%d-%Y')
+        elif kind == 'datetime':
+            df[col] = pd.to_datetime(df[col])
+        elif kind == 'int':
+            df[col] = pd.to_numeric(df[col])
+        elif kind == 'float':
+            df[col] = df[col].astype('float')
+    return df
+
+FILE_INFO_TYPES = dict({field: kind for field, (_tag, _req, kind) 
+                        in PRIMARY_DOC_FIELDS.items()},
+                       date_filed='datetime')
+
+def _filer_row(doc):
+    """Returns a dict of filer information from a parsed primary doc."""
+    comp_dict = {}
+    comp_dict['CIK'] = doc['CIK']
+    for _fm in doc['filingmanager']:
+        comp_dict.update(_fm)
+    return comp_dict
+
+def _manager_json(managers):
+    """Joins a list of manager dicts into space separated json strings."""
+    return ' '.join(json.dumps(i) for i in managers)
+
+def _file_info_row(doc, date_filed):
+    """Returns a dict of filing metadata from a parsed primary doc."""
+    comp_dict = {}
+    
+    comp_dict['CIK'] = doc['CIK']
+    comp_dict['form'] = doc['form']
+    comp_dict['type'] = doc['type']
+    comp_dict['date_filed'] = date_filed
+    if 'file_no' in doc:
+        comp_dict['file_no'] = doc['file_no']
+    comp_dict['instruct5'] = doc['instruct5']
+    if doc['instruct5'] == 'Y':
+        comp_dict['instrc5info'] = doc['instrc5info']
+    comp_dict['period'] = doc['period']
+    comp_dict['quarter'] = doc['quarter']
+    if 'amend' in doc:
+        comp_dict['amend'] = doc['amend']
+    if doc.get('othermanagersinfo'):
+        comp_dict['oth_mgr'] = _manager_json(doc['oth_mgr'])
+    if not doc['signature']:
+        raise ValueError('Document is missing required element signatureblock.')
+    comp_dict['signature'] = json.dumps(doc['signature'][-1])
+    if doc.get('summarypage'):
+        comp_dict['entry_total'] = doc['entry_total']
+        comp_dict['value_total'] = doc['value_total']
+        comp_dict['incld_mgrs'] = doc['incld_mgrs']
+        if 'confd_flag' in doc:
+            comp_dict['confd_flag'] = doc['confd_flag']
+        if doc['incld_mgrs'] != '0':
+            comp_dict['incl_mgr'] = _manager_json(doc['incl_mgr'])
+    return comp_dict
+
+def _hold_header_row(doc, date_filed):
+    """Returns a dict of the filing fields repeated on each holding."""
+    comp_dict = {}
+    comp_dict['CIK'] = doc['CIK']
+    comp_dict['form'] = doc['form']
+    comp_dict['period'] = doc['period']
+    comp_dict['file_no'] = doc.get('file_no')
+    comp_dict['date_filed'] = date_filed
+    return comp_dict
+
+def _filers_frame(filer_buf):
+    """Builds the filers_13f() DataFrame from a ColumnBuffer of filer rows."""
+    full_df = filer_buf.frame()
+    full_df.drop_duplicates(subset='CIK',
+                            inplace=True,
+                            ignore_index=True
+                           )
+    if 'street2' in full_df.columns:
+        full_df = full_df[['CIK', 'company', 'street1', 'street2',
+                          'city', 'stateorcountry', 'zipcode'
+                         ]]
+    return full_df
+
+SURROGATE_KEYS = False
+READABLE_KEYS = True
+
+def configure_keys(surrogate=None, readable=None):
+    """Sets whether file_id and hold_id are 64-bit integers or readable strings.
+    
+    Readable keys concatenate the CIK, file number and period (and the
+    CUSIP for hold_id) and are stored as Text. Surrogate keys are
+    deterministic 64-bit hashes of the same strings, which shrink the SQL
+    tables and their id indexes and speed up the dedup join in
+    sql_13f(). New tables get them as a BIGINT primary key, so a CUSIP
+    reported more than once in a filing is numbered ':1', ':2', ...
+    before hashing to keep every holding. Keep to one kind of key per
+    table.
+    
+    Args:
+        surrogate (bool): Optional; Use 64-bit integer keys. Defaults
+            to None, leaving the current value (SURROGATE_KEYS)
+            unchanged.
+        readable (bool): Optional; With surrogate keys, also keep the
+            readable strings in file_id_text and hold_id_text columns,
+            which sql_13f() uses to check new keys for collisions.
+            Defaults to None, leaving the current value (READABLE_KEYS)
+            unchanged.
+    """
+    global SURROGATE_KEYS, READABLE_KEYS
+    if surrogate is not None:
+        SURROGATE_KEYS = bool(surrogate)
+    if readable is not None:
+        READABLE_KEYS = bool(readable)
+
+def surrogate_keys(text):
+    """Returns deterministic signed 64-bit keys for a Series of key strings.
+    
+    The keys are SipHash values computed by pandas.util.hash_array over
+    the whole array at once, the same in every run and process.
+    
+    Args:
+        text (pandas Series): Readable key strings.
+        
+    Returns:
+        A pandas Series of int64 keys with the index of text.
+        
+    Raises:
+        ValueError: Two different key strings hashed to the same key.
+    """
+    values = text.to_numpy(dtype=object)
+    keys = pd.util.hash_array(values).view('int64')
+    if pd.unique(keys).size != pd.unique(values).size:
+        raise ValueError('Surrogate key collision; use readable keys for this data.')
+    return pd.Series(keys, index=text.index)
+
+def _set_key(df, column, text):
+    """Sets a key column of df from its readable strings, as configure_keys() says."""
+    if SURROGATE_KEYS:
+        df[column] = surrogate_keys(text)
+        if READABLE_KEYS:
+            df[column + '_text'] = text
+    else:
+        df[column] = text
+    return df
+
+def _file_info_frame(info_buf):
+    """Builds the file_info_13f() DataFrame from a ColumnBuffer of filing rows."""
+    info_df = info_buf.frame(FILE_INFO_TYPES)
+    return _set_key(info_df, 'file_id', _file_id_text(info_df))
+
+def _file_id_text(df):
+    """Returns the readable file_id of each filing from its CIK, file_no and period."""
+    return (df.CIK + df.file_no + df.period.astype('str')).str.replace('-','')
+
+def _file_ids(df):
+    """Returns the file_id of each filing, a surrogate key if configured."""
+    text = _file_id_text(df)
+    return surrogate_keys(text) if SURROGATE_KEYS else text
+
+def _parse_filer(dic, bodies):
+    """Parse stage of filers_13f()."""
+    return _filer_row(parse_primary_doc(bodies[0]))
+
+@_instrumented
+def filers_13f(xml_list, key='doc_xml', journal=None):
     """Returns a pandas DataFrame with 13F filer information.
     
     Using a list of dictionaries, the function extracts information
@@ -428,13 +2393,17 @@ def filers_13f(xml_list, key='doc_xml'):
     contains contact and identification information.
     
     The first list returned from an xml_13f() call can produce
-    the proper list for the xml_list argument.
+    the proper list for the xml_list argument. When file info or
+    holdings are also needed, primary_docs_13f() reads each primary
+    doc once for all three.
     
     Args:
         xml_list (list): List of dictionaries containing xml links
             to the "primary doc" portion of a Form 13F filing.
         key (str): Dictionary key containing xml link to primary
             doc. Defaults to "doc_xml".
+        journal (Journal or str): Optional; Checkpoint journal (see
+            xml_13f() docstring). Defaults to None.
             
     Returns:
         A pandas DataFrame with 13F filer information.
@@ -451,53 +2420,31 @@ def filers_13f(xml_list, key='doc_xml'):
     start_time = time.time()
     
     loop_no = 0
-    append_list = []
-    
-    for dic in xml_list:
-    
-        dlink = dic[key]
-        dreq = requests.get(dlink).content
-        dsoup = BeautifulSoup(dreq, 'lxml')
-
-        comp_dict = {}
-        comp_dict['CIK'] = dsoup.find(re.compile('.*cik')).text
-        for _fm in dsoup.find_all(re.compile('.*filingmanager')):
-            comp_dict['company'] = _fm.find(re.compile('.*name')).text
-            for _ad in _fm.find_all(re.compile('.*address')):
-                comp_dict['street1'] = _ad.find(re.compile('.*street1')).text
-                if _ad.find(re.compile('.*street2')) is not None:
-                    comp_dict['street2'] = _ad.find(re.compile('.*street2')).text
-                comp_dict['city'] = _ad.find(re.compile('.*city')).text
-                comp_dict['stateorcountry'] = _ad.find(re.compile('.*stateorcountry')).text
-                comp_dict['zipcode'] = _ad.find(re.compile('.*zipcode')).text
+    filer_buf = ColumnBuffer()
+    
+    rows = _run_stage(xml_list, lambda dic: dic[key], lambda dic: [dic[key]],
+                      _parse_filer, journal, 'filers_13f')
+    for _dic, comp_dict in rows:
 
         if loop_no % 500 == 0:
             print(str(f'Extracting info on 13F filers, ' + 
                       f'{((time.time() - start_time)/60):.2f} minutes'))
 
-        comp_df = pd.DataFrame([comp_dict])    
-        append_list.append(comp_df)
+        filer_buf.append(comp_dict)
         loop_no += 1
-        speed_bump()
 
-    full_df = pd.concat(append_list, 
-                        axis = 0, 
-                        ignore_index = True
-                       )
-    full_df.drop_duplicates(subset='CIK',
-                            inplace=True,
-                            ignore_index=True
-                           )
-    if 'street2' in full_df.columns:
-        full_df = full_df[['CIK', 'company', 'street1', 'street2',
-                          'city', 'stateorcountry', 'zipcode'
-                         ]]
+    full_df = _filers_frame(filer_buf)
     print(f'\n{len(xml_list)} 13F-HR filers processed.')
     print('_'*50)
     
     return full_df
 
-def file_info_13f(xml_list, doc_key='doc_xml', date_key='doc_mod'):
+def _parse_file_info(dic, bodies, date_key):
+    """Parse stage of file_info_13f()."""
+    return _file_info_row(parse_primary_doc(bodies[0]), dic[date_key])
+
+@_instrumented
+def file_info_13f(xml_list, doc_key='doc_xml', date_key='doc_mod', journal=None):
     """Returns a pandas DataFrame of data related to Form 13F filings.
     
     Using a list of dictionaries, the function extracts metadata on
@@ -518,6 +2465,8 @@ def file_info_13f(xml_list, doc_key='doc_xml', date_key='doc_mod'):
             doc. Defaults to "doc_xml".
         date_key (str): Dictionary key containing timestamp of filing.
             Defaults to "doc_mod".
+        journal (Journal or str): Optional; Checkpoint journal (see
+            xml_13f() docstring). Defaults to None.
             
     Returns:
         A pandas DataFrame with information on individual 13F filings.
@@ -534,111 +2483,228 @@ def file_info_13f(xml_list, doc_key='doc_xml', date_key='doc_mod'):
     start_time = time.time()
     
     loop_no = 0
-    append_list = []
-    
-    for dic in xml_list:
-        
-        dlink = dic[doc_key]
-        dreq = requests.get(dlink).content
-        dsoup = BeautifulSoup(dreq, 'lxml')    
-
-        comp_dict = {}
-        
-        comp_dict['CIK'] = dsoup.find(re.compile('.*cik')).text
-        comp_dict['form'] = dsoup.find(re.compile('.*submissiontype')).text
-        comp_dict['type'] = dsoup.find(re.compile('.*reporttype')).text
-        comp_dict['date_filed'] = dic[date_key]
-        if dsoup.find(re.compile('.*form13ffilenumber')):
-            comp_dict['file_no'] =\
-                dsoup.find(re.compile('.*form13ffilenumber')).text
-        comp_dict['instruct5'] =\
-            dsoup.find(re.compile('.*provideinfoforinstruction5')).text
-        if dsoup.find(re.compile('.*provideinfoforinstruction5')).text == 'Y':
-            comp_dict['instrc5info'] =\
-                dsoup.find(re.compile('.*additionalinformation')).text
-        comp_dict['period'] = dsoup.find(re.compile('.*periodofreport')).text
-        comp_dict['quarter'] =\
-            dsoup.find(re.compile('.*reportcalendarorquarter')).text
-        if dsoup.find(re.compile('.*isamendment')):
-            comp_dict['amend'] = dsoup.find(re.compile('.*isamendment')).text
-        if dsoup.find(re.compile('.*othermanagersinfo')):
-            othmgr = []
-            for _om in dsoup.find(re.compile('.*othermanagersinfo')).children:
-                if _om.name == re.compile('.*othermanager'):
-                    omd = {}
-                    if _om.find(re.compile('.*cik')):
-                        omd['CIK'] = m.find(re.compile('.*cik')).text
-                    if _om.find(re.compile('.*form13ffilenumber')):
-                        omd['file_no'] =\
-                            _om.find(re.compile('.*form13ffilenumber')).text
-                    omd['name'] = _om.find(re.compile('.*name')).text
-                    othmgr.append(omd)
-            othmgr_json = [''.join(json.dumps(i)) for i in othmgr]
-            othmgr_str = ' '.join(othmgr_json)
-            comp_dict['oth_mgr'] = othmgr_str
-        for _s in dsoup.find_all(re.compile('.*signatureblock')):
-            sig = {}
-            sig['name'] = _s.find(re.compile('.*name')).text
-            sig['title'] = _s.find(re.compile('.*title')).text
-            sig['phone'] = _s.find(re.compile('.*phone')).text
-            sig['city'] = _s.find(re.compile('.*city')).text
-            sig['stateorcountry'] = _s.find(re.compile('.*stateorcountry')).text
-            sig['sig_date'] = _s.find(re.compile('.*signaturedate')).text
-        comp_dict['signature'] = json.dumps(sig)
-        if dsoup.find(re.compile('.*summarypage')):
-            comp_dict['entry_total'] = dsoup.find(re.compile('.*tableentrytotal')).text
-            comp_dict['value_total'] = dsoup.find(re.compile('.*tablevaluetotal')).text
-            comp_dict['incld_mgrs'] =\
-                dsoup.find(re.compile('.*otherincludedmanagerscount')).text
-            if dsoup.find(re.compile('.*isconfidentialomitted')):
-                comp_dict['confd_flag'] =\
-                    dsoup.find(re.compile('.*isconfidentialomitted')).text
-            if dsoup.find(re.compile('.*otherincludedmanagerscount')).text != '0':
-                othmgr2 = []
-                for _om2 in dsoup.find_all('.*othermanager2'):
-                    imd ={}
-                    imd['seq_no'] = _om2.find(re.compile('.*sequencenumber')).text
-                    if _om2.find(re.compile('.*cik')):
-                        imd['cik'] = _om2.find(re.compile('.*cik')).text
-                    imd['name'] = _om2.find(re.compile('.*name')).text
-                    if _om2.find(re.compile('.*form13ffilenumber')):
-                        imd['file_no'] =\
-                            _om2.find(re.compile('.*form13ffilenumber')).text
-                    othmgr2.append(imd)
-                othmgr2_json = [''.join(json.dumps(i)) for i in othmgr2]
-                othmgr2_str = ' '.join(othmgr2_json)
-                comp_dict['incl_mgr'] = othmgr2_str
+    info_buf = ColumnBuffer()
+    
+    rows = _run_stage(xml_list, lambda dic: dic[doc_key], lambda dic: [dic[doc_key]],
+                      functools.partial(_parse_file_info, date_key=date_key),
+                      journal, 'file_info_13f')
+    for _dic, row in rows:
 
         if loop_no % 500 == 0:
             print(f'Extracting 13F file info, {((time.time() - start_time)/60):.2f} minutes')
         
-        comp_df = pd.DataFrame([comp_dict])
-        comp_df[['period', 'quarter']] = comp_df[['period', 'quarter']]\
-            .apply(pd.to_datetime, format = '%m-%d-%Y')
-        comp_df[['date_filed']] = comp_df[['date_filed']].apply(pd.to_datetime)
-        if dsoup.find(re.compile('.*summarypage')):
-            comp_df[['value_total']] = comp_df[['value_total']].astype('float')
-            comp_df[['entry_total','incld_mgrs']] =\
-                comp_df[['entry_total','incld_mgrs']].astype('int')
-        append_list.append(comp_df)
+        info_buf.append(row)
         loop_no += 1
-        speed_bump()
         
-    info_df = pd.concat(append_list, 
-                        axis = 0, 
-                        ignore_index = True
-                       )
-    info_df['file_id'] = info_df.CIK + info_df.file_no + info_df.period.astype('str')
-    info_df['file_id'] = info_df['file_id'].str.replace('-','')
+    info_df = _file_info_frame(info_buf)
     print(f'\nInformation on {len(xml_list)} 13F-HR forms processed.')
     print('_'*50)
     
     return info_df
 
+def _parse_primary_docs(dic, bodies, doc_key, doc_date_key, hold_date_key):
+    """Parse stage of primary_docs_13f()."""
+    doc = parse_primary_doc(bodies[0])
+    header_row = None
+    if hold_date_key in dic:
+        header_row = _hold_header_row(doc, dic[hold_date_key])
+        header_row[doc_key] = dic[doc_key]
+    return _filer_row(doc), _file_info_row(doc, dic[doc_date_key]), header_row
+
+@_instrumented
+def primary_docs_13f(xml_list, doc_key='doc_xml', doc_date_key='doc_mod',
+                     hold_date_key='hold_mod', journal=None):
+    """Returns filer, file info and holdings header DataFrames for 13F filings.
+    
+    Fetches and parses each filing's primary doc a single time and
+    builds the outputs of filers_13f() and file_info_13f() from it,
+    along with the filing fields holdings_13f() repeats on every
+    holding. Passing the third DataFrame to holdings_13f() as its
+    header_df argument lets it request only the holdings docs, so a
+    full run makes one primary doc request per filing instead of three.
+    
+    The first list returned from an xml_13f() call can produce
+    the proper list for the xml_list argument.
+    
+    Args:
+        xml_list (list): List of dictionaries containing xml links
+            to the "primary doc" portion of a Form 13F filing and
+            timestamp information.
+        doc_key (str): Dictionary key containing xml link to primary
+            doc. Defaults to "doc_xml".
+        doc_date_key (str): Dictionary key containing the timestamp
+            used for file info. Defaults to "doc_mod".
+        hold_date_key (str): Dictionary key containing the timestamp
+            used for holdings. Defaults to "hold_mod".
+        journal (Journal or str): Optional; Checkpoint journal (see
+            xml_13f() docstring). Defaults to None.
+            
+    Returns:
+        A pandas DataFrame with 13F filer information.
+        
+        A pandas DataFrame with information on individual 13F filings.
+        
+        A pandas DataFrame with the holdings header of each filing,
+        keyed by the primary doc link in a column named after doc_key.
+        
+    Raises:
+        TypeError: xml_list must be a list type.
+        TypeError: xml_list must be a list of dicts.    
+    """
+    if not isinstance(xml_list, list):
+        raise TypeError('xml_list must be a list type.')
+    elif not isinstance(xml_list[0], dict):
+        raise TypeError('xml_list must be a list of dicts.')
+
+    start_time = time.time()
+    
+    loop_no = 0
+    filer_buf = ColumnBuffer()
+    info_buf = ColumnBuffer()
+    header_buf = ColumnBuffer(HOLD_HEADER_COLUMNS + [doc_key])
+    
+    parse = functools.partial(_parse_primary_docs, doc_key=doc_key, 
+                              doc_date_key=doc_date_key, hold_date_key=hold_date_key)
+    rows = _run_stage(xml_list, lambda dic: dic[doc_key], lambda dic: [dic[doc_key]],
+                      parse, journal, 'primary_docs_13f')
+    for _dic, (filer_row, info_row, header_row) in rows:
+        
+        if loop_no % 500 == 0:
+            print(f'Extracting 13F primary docs, {((time.time() - start_time)/60):.2f} minutes')
+        
+        filer_buf.append(filer_row)
+        info_buf.append(info_row)
+        if header_row is not None:
+            header_buf.append(header_row)
+        loop_no += 1
+    
+    filers_df = _filers_frame(filer_buf)
+    info_df = _file_info_frame(info_buf)
+    header_df = header_buf.frame(HOLD_TYPES)
+    print(f'\n{len(xml_list)} 13F-HR primary docs processed.')
+    print('_'*50)
+    
+    return filers_df, info_df, header_df
+
+# Information table elements, by namespace-stripped lowercase local name,
+# mapped to the holdings_13f() column they fill.
+INFOTABLE_TAGS = {'nameofissuer': 'name',
+                  'cusip': 'CUSIP',
+                  'titleofclass': 'class',
+                  'value': 'mkt_val',
+                  'sshprnamt': 'shares',
+                  'sshprnamttype': 'type',
+                  'putcall': 'put_call',
+                  'investmentdiscretion': 'discretion',
+                  'sole': 'va_sole',
+                  'shared': 'va_shared',
+                  'none': 'va_none',
+                  'othermanager': 'othmgrdisc',
+                 }
+HOLD_COLUMNS = list(INFOTABLE_TAGS.values())
+HOLD_HEADER_COLUMNS = ['CIK', 'form', 'period', 'file_no', 'date_filed']
+HOLD_TYPES = {'period': 'date',
+              'date_filed': 'datetime',
+              'mkt_val': 'float',
+              'shares': 'float',
+              'va_sole': 'float',
+              'va_shared': 'float',
+              'va_none': 'float',
+             }
+
+def parse_infotable(content, columns=None):
+    """Parses a Form 13F information table into column buffers.
+    
+    Streams the holdings doc with lxml's iterparse, matching each
+    element's namespace-stripped local name against INFOTABLE_TAGS and
+    clearing every infoTable element once its row has been taken, so
+    memory stays flat for filers with tens of thousands of positions.
+    Only the first occurrence of a tag within an infoTable is kept.
+    
+    Args:
+        content (bytes): Holdings doc xml.
+        columns (dict): Optional; Dictionary of column name to list
+            that rows are appended to. Defaults to None, creating new
+            buffers for the columns in HOLD_COLUMNS.
+            
+    Returns:
+        The dictionary of column buffers, with None for optional
+        elements missing from a holding.
+    """
+    if columns is None:
+        columns = {col: [] for col in HOLD_COLUMNS}
+    row = {}
+    for _event, elem in etree.iterparse(BytesIO(content), 
+                                        events=('end',), 
+                                        recover=True, 
+                                        huge_tree=True
+                                       ):
+        if not isinstance(elem.tag, str):
+            continue
+        name = _local_name(elem.tag)
+        col = INFOTABLE_TAGS.get(name)
+        if col is not None:
+            if col not in row:
+                row[col] = elem.text or ''
+        elif name == 'infotable':
+            for col, values in columns.items():
+                values.append(row.get(col))
+            row = {}
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    return columns
+
+def _holdings_frame(header_buf, hold_cols):
+    """Builds the holdings_13f() DataFrame from header and holdings buffers."""
+    header_buf.columns.update(hold_cols)
+    full_df = header_buf.frame(HOLD_TYPES)
+    full_df = full_df.drop(columns=[col for col in ['put_call', 'othmgrdisc']
+                                    if full_df[col].isna().all()])
+    if 'othmgrdisc' in full_df.columns:
+        full_df[['othmgrdisc']] = full_df[['othmgrdisc']].apply(pd.to_numeric, 
+                                                                errors='coerce'
+                                                               )
+    return _add_hold_id(full_df)
+
+def _add_hold_id(full_df, carry=None):
+    """Adds the hold_id key built from the filing fields and CUSIP.
+    
+    With surrogate keys, repeats of a CUSIP within a filing are numbered
+    so that every holding has its own key. A stream that can split a
+    filing across DataFrames passes the same carry dict with each one;
+    it holds the counts of the last filing seen.
+    """
+    if full_df.empty:
+        # Every filing was skipped or had an empty information table
+        return _set_key(full_df, 'hold_id', pd.Series([], index=full_df.index, dtype='str'))
+    filing = _file_id_text(full_df)
+    text = filing + ':' + full_df.CUSIP.str.replace('-','')
+    if SURROGATE_KEYS:
+        repeat = text.groupby(text, sort=False, dropna=False).cumcount()
+        if carry:
+            repeat += text.map(carry).fillna(0).astype('int64')
+        if carry is not None and len(text):
+            last = (filing == filing.iloc[-1]).to_numpy()
+            carry.clear()
+            carry.update((repeat[last] + 1).groupby(text[last]).max().to_dict())
+        text = text.where(repeat == 0, text + ':' + repeat.astype('str'))
+    return _set_key(full_df, 'hold_id', text)
+
+def _parse_holdings(dic, bodies, date_key):
+    """Parse stage of holdings_13f(); the header is None without a primary doc."""
+    comp_dict = None
+    if len(bodies) > 1:
+        comp_dict = _hold_header_row(parse_primary_doc(bodies[1]), dic[date_key])
+    return comp_dict, parse_infotable(bodies[0])
+
+@_instrumented
 def holdings_13f(xml_list, 
                  hold_key='hold_xml',
                  doc_key='doc_xml',
-                 date_key='hold_mod'
+                 date_key='hold_mod',
+                 header_df=None,
+                 journal=None
                  ):
     """Returns a pandas DataFrame of 13F holdings information.
     
@@ -662,6 +2728,11 @@ def holdings_13f(xml_list,
             doc. Defaults to "doc_xml".
         date_key (str): Dictionary key containing timestamp of filing.
             Defaults to "hold_mod".
+        header_df (pandas DataFrame): Optional; Holdings header
+            DataFrame returned by primary_docs_13f(). When given, the
+            primary docs are not requested again. Defaults to None.
+        journal (Journal or str): Optional; Checkpoint journal (see
+            xml_13f() docstring). Defaults to None.
             
     Returns:
         A pandas DataFrame with information on the _holdings of 
@@ -679,138 +2750,759 @@ def holdings_13f(xml_list,
     start_time = time.time()
     
     loop_no = 0
-    hold_list = []
-    append_list = []
-    
-    for dic in xml_list:
-        
-        hlink = dic[hold_key]
-        hreq = requests.get(hlink).content
-        hsoup = BeautifulSoup(hreq, 'lxml')
-        for _holding in hsoup.find_all(re.compile('.*infotable')): 
-
-            hold_dict = {}
-            hold_dict['name'] = _holding.find(re.compile('.*nameofissuer')).text
-            hold_dict['CUSIP'] = _holding.find(re.compile('.*cusip')).text
-            hold_dict['class'] = _holding.find(re.compile('.*titleofclass')).text
-            hold_dict['mkt_val'] = _holding.find(re.compile('.*value')).text
-            hold_dict['shares'] = _holding.find(re.compile('.*sshprnamt')).text
-            hold_dict['type'] = _holding.find(re.compile('.*sshprnamttype')).text
-            if _holding.find(re.compile('.*putcall')):
-                hold_dict['put_call'] = _holding.find(re.compile('.*putcall')).text
-            hold_dict['discretion'] = _holding\
-                .find(re.compile('.*investmentdiscretion')).text
-            hold_dict['va_sole'] = _holding.find(re.compile('.*votingauthority'))\
-                .find(re.compile('.*sole')).text
-            hold_dict['va_shared'] = _holding.find(re.compile('.*votingauthority'))\
-                .find(re.compile('.*shared')).text
-            hold_dict['va_none'] = _holding.find(re.compile('.*votingauthority'))\
-                .find(re.compile('.*none')).text
-            if _holding.find(re.compile('.*othermanager')):
-                hold_dict['othmgrdisc'] = _holding.find(re.compile('.*othermanager')).text
-            
-            hold_list.append(hold_dict)
-            
-        speed_bump()
-        
-        dlink = dic[doc_key]
-        dreq = requests.get(dlink).content
-        dsoup = BeautifulSoup(dreq, 'lxml')    
-
-        comp_dict = {}
-        comp_dict['CIK'] = dsoup.find(re.compile('.*cik')).text
-        comp_dict['form'] = dsoup.find(re.compile('.*submissiontype')).text
-        comp_dict['period'] = dsoup.find(re.compile('.*periodofreport')).text
-        comp_dict['file_no'] = dsoup.find(re.compile('.*form13ffilenumber')).text
-        comp_dict['date_filed'] = dic[date_key]
+    header_buf = ColumnBuffer(HOLD_HEADER_COLUMNS)
+    hold_cols = {col: [] for col in HOLD_COLUMNS}
+    
+    if header_df is not None:
+        headers = header_df.drop_duplicates(subset=doc_key)\
+            .set_index(doc_key)[HOLD_HEADER_COLUMNS].to_dict('index')
+        # Filings whose primary doc was quarantined have no header to repeat,
+        # and information tables of ingested file_ids need not be fetched
+        file_ids = dict(zip(header_df[doc_key], _file_ids(header_df)))
+        xml_list = _skip_ingested([dic for dic in xml_list if dic[doc_key] in headers],
+                                  'file_id', lambda dic: file_ids[dic[doc_key]])
+        urls = lambda dic: [dic[hold_key]]
+    else:
+        # Holdings and primary doc links are interleaved so that both documents
+        # of a filing arrive together from a single request stream.
+        urls = lambda dic: [dic[hold_key], dic[doc_key]]
+    
+    parse = functools.partial(_parse_holdings, date_key=date_key)
+    for dic, (comp_dict, filing_cols) in _run_stage(xml_list, lambda dic: dic[hold_key], 
+                                                    urls, parse, journal, 'holdings_13f'):
+        if comp_dict is None:
+            comp_dict = headers[dic[doc_key]]
+        
+        # Holdings go straight into the column lists; the filing fields are
+        # repeated once per holding parsed.
+        for col, values in filing_cols.items():
+            hold_cols[col].extend(values)
+        header_buf.broadcast(comp_dict, len(hold_cols['name']) - len(header_buf))
     
         if loop_no % 500 == 0:
             print(str(f'Extracting 13F holdings, ' +
                       f'{((time.time() - start_time)/60):.2f} minutes'))
-
-        hold_df = pd.DataFrame(hold_list)
-        hold_cols = ['mkt_val', 'shares', 'va_sole', 'va_shared', 'va_none'] 
-        hold_df[hold_cols] = hold_df[hold_cols].astype('float')
-        comp_df = pd.DataFrame([comp_dict])
-        
-        comp_df[['period']] = comp_df[['period']].apply(pd.to_datetime, 
-                                                        format = '%m-%d-%Y'
-                                                       )
-        comp_df[['date_filed']] = comp_df[['date_filed']].apply(pd.to_datetime)
-        stitch_df = pd.concat([comp_df,hold_df], 
-                              axis = 1
-                             ).ffill()
-        append_list.append(stitch_df)
-        hold_list = []
         loop_no += 1
-        speed_bump()
 
-    full_df = pd.concat(append_list, 
-                        axis = 0, 
-                        ignore_index = True
-                       )
-    if 'othmgrdisc' in full_df.columns:
-        full_df[['othmgrdisc']] = full_df[['othmgrdisc']].apply(pd.to_numeric, 
-                                                                errors='coerce'
-                                                               )
-    full_df['hold_id'] = full_df.CIK + full_df.file_no + full_df.period.astype('str')\
-        + ':' + full_df.CUSIP
-    full_df['hold_id'] = full_df['hold_id'].str.replace('-','')
+    full_df = _holdings_frame(header_buf, hold_cols)
     print(f'\n{len(xml_list)} 13F-HR holding files processed.')
     print('_'*50)
     
     return full_df
 
-def sql_13f(path, table, df, id_col=None,
-           typeset = {'CIK':Text,
-                      'form':Text,
-                      'type':Text,
-                      'date_filed':DateTime,
-                      'file_no':Text,
-                      'period':Date,
-                      'quarter':Date,
-                      'signature':Text,
-                      'entry_total':Integer,
-                      'value_total':Float,
-                      'incld_mgrs':Integer,
-                      'confd_flag':Text,
-                      'amend':Text,
-                      'instruct5':Text,
-                      'instrc5info':Text,
-                      'oth_mgr':Text,
-                      'incl_mgr':Text,
-                      'file_id':Text,
-                      'name':Text,
-                      'CUSIP':Text,
-                      'class':Text,
-                      'mkt_val':Float,
-                      'shares':Float,
-                      'type':Text,
-                      'discretion':Text,
-                      'va_sole':Float,
-                      'va_shared':Float,
-                      'va_none':Float,
-                      'put_call': Text,
-                      'othmgrdisc':Text,
-                      'hold_id':Text,
-                      'company':Text,
-                      'street1':Text,
-                      'street2':Text,
-                      'city':Text,
-                      'stateorcountry':Text,
-                      'zipcode':Text,
-                      'CIK_int':Integer,
-                      'comp_name':Text,
-                      'form_type':Text,
-                      'file_name':Text,
-                      'link':Text
-                     }
-                ):
+_DOCUMENT_RE = re.compile(rb'<DOCUMENT>(.*?)</DOCUMENT>', re.S)
+_DOC_TAG_RE = {tag: re.compile(rb'<%s>([^\r\n<]*)' % tag) 
+               for tag in (b'TYPE', b'FILENAME', b'ACCEPTANCE-DATETIME')}
+_DOC_TEXT_RE = re.compile(rb'<TEXT>\s*(?:<XML>)?(.*?)(?:</XML>\s*)?</TEXT>', re.S)
+
+def split_submission(content):
+    """Splits an EDGAR complete submission text file into its documents.
+    
+    Args:
+        content (bytes): Complete submission .txt file.
+        
+    Returns:
+        The acceptance timestamp as a 'YYYY-MM-DD HH:MM:SS' string, or
+        None if the header has none.
+        
+        A list of dicts with the type, filename and text of each
+        document, text being the bytes inside its <XML> or <TEXT> tags.
+    """
+    header_end = content.find(b'<DOCUMENT>')
+    accepted = _DOC_TAG_RE[b'ACCEPTANCE-DATETIME'].search(content, 0, header_end)
+    if accepted is not None:
+        accepted = datetime.datetime.strptime(accepted.group(1).strip().decode(),
+                                              '%Y%m%d%H%M%S').strftime('%Y-%m-%d %H:%M:%S')
+    documents = []
+    for match in _DOCUMENT_RE.finditer(content):
+        section = match.group(1)
+        doc = {}
+        for key, tag in (('type', b'TYPE'), ('filename', b'FILENAME')):
+            found = _DOC_TAG_RE[tag].search(section)
+            doc[key] = found.group(1).strip().decode('latin-1') if found else None
+        text = _DOC_TEXT_RE.search(section)
+        doc['text'] = text.group(1).strip() if text else b''
+        documents.append(doc)
+    return accepted, documents
+
+def _parse_submission(link, bodies):
+    """Parse stage of submissions_13f(); None when there is no information table."""
+    accepted, documents = split_submission(bodies[0])
+    primary = hold = None
+    for document in documents:
+        if document['type'] == 'INFORMATION TABLE':
+            hold = hold or document['text']
+        elif (document['type'] or '').startswith('13F') and primary is None:
+            primary = document['text']
+    if primary is None or hold is None:
+        return None
+    doc = parse_primary_doc(primary)
+    return (_filer_row(doc), _file_info_row(doc, accepted), 
+            _hold_header_row(doc, accepted), parse_infotable(hold))
+
+@_instrumented
+def submissions_13f(txt_list, journal=None):
+    """Returns filer, file info and holdings DataFrames from full submission files.
+    
+    Alternative to the xml_13f(), primary_docs_13f() and holdings_13f()
+    chain that makes one request per filing. The complete submission
+    .txt file named in the file_name column of parse_links() holds every
+    document of a filing; it is split with split_submission(), the
+    primary doc and the document of type INFORMATION TABLE are handed to
+    the existing parsers, and the filing date is taken from the
+    submission's acceptance timestamp.
+    
+    Args:
+        txt_list (list): List of links to complete submission .txt
+            files, e.g. from txt_list().
+        journal (Journal or str): Optional; Checkpoint journal (see
+            xml_13f() docstring). Defaults to None.
+            
+    Returns:
+        A pandas DataFrame with 13F filer information.
+        
+        A pandas DataFrame with information on individual 13F filings.
+        
+        A pandas DataFrame with information on the holdings of
+        individual 13F filings.
+        
+        List of links to filings with no information table.
+        
+    Raises:
+        TypeError: txt_list must be a list type.
+    """
+    if not isinstance(txt_list, list):
+        raise TypeError('txt_list must be a list type.')
+    
+    start_time = time.time()
+    
+    loop_no = 0
+    no_hold = []
+    filer_buf = ColumnBuffer()
+    info_buf = ColumnBuffer()
+    header_buf = ColumnBuffer(HOLD_HEADER_COLUMNS)
+    hold_cols = {col: [] for col in HOLD_COLUMNS}
+    
+    for link, result in _run_stage(txt_list, lambda link: link, lambda link: [link],
+                                   _parse_submission, journal, 'submissions_13f'):
+        if result is None:
+            no_hold.append(link)
+            continue
+        
+        filer_row, info_row, header_row, filing_cols = result
+        filer_buf.append(filer_row)
+        info_buf.append(info_row)
+        for col, values in filing_cols.items():
+            hold_cols[col].extend(values)
+        header_buf.broadcast(header_row, len(hold_cols['name']) - len(header_buf))
+        
+        if loop_no % 500 == 0:
+            print(f'Extracting 13F submissions, {((time.time() - start_time)/60):.2f} minutes')
+        loop_no += 1
+    
+    filers_df = _filers_frame(filer_buf)
+    info_df = _file_info_frame(info_buf)
+    hold_df = _holdings_frame(header_buf, hold_cols)
+    print(f'\n{loop_no} 13F-HR submissions processed. '
+          f'{len(no_hold)} links have no holdings file.')
+    print('_'*50)
+    
+    return filers_df, info_df, hold_df, no_hold
+
+# Form 13F data set columns, by file, mapped to the primary doc fields
+# parse_primary_doc() returns for the same element.
+BULK_COVERPAGE = {'REPORTTYPE': 'type',
+                  'FORM13FFILENUMBER': 'file_no',
+                  'PROVIDEINFOFORINSTRUCTION5': 'instruct5',
+                  'ADDITIONALINFORMATION': 'instrc5info',
+                  'REPORTCALENDARORQUARTER': 'quarter',
+                  'ISAMENDMENT': 'amend',
+                 }
+BULK_SUMMARYPAGE = {'TABLEENTRYTOTAL': 'entry_total',
+                    'TABLEVALUETOTAL': 'value_total',
+                    'OTHERINCLUDEDMANAGERSCOUNT': 'incld_mgrs',
+                    'ISCONFIDENTIALOMITTED': 'confd_flag',
+                   }
+BULK_BLOCKS = {'filingmanager': ('COVERPAGE', 
+                                 {'FILINGMANAGER_NAME': 'company',
+                                  'FILINGMANAGER_STREET1': 'street1',
+                                  'FILINGMANAGER_STREET2': 'street2',
+                                  'FILINGMANAGER_CITY': 'city',
+                                  'FILINGMANAGER_STATEORCOUNTRY': 'stateorcountry',
+                                  'FILINGMANAGER_ZIPCODE': 'zipcode',
+                                 }),
+               'oth_mgr': ('OTHERMANAGER', 
+                           {'CIK': 'CIK',
+                            'FORM13FFILENUMBER': 'file_no',
+                            'NAME': 'name',
+                           }),
+               'incl_mgr': ('OTHERMANAGER2',
+                            {'SEQUENCENUMBER': 'seq_no',
+                             'CIK': 'cik',
+                             'NAME': 'name',
+                             'FORM13FFILENUMBER': 'file_no',
+                            }),
+               'signature': ('SIGNATURE',
+                             {'NAME': 'name',
+                              'TITLE': 'title',
+                              'PHONE': 'phone',
+                              'CITY': 'city',
+                              'STATEORCOUNTRY': 'stateorcountry',
+                              'SIGNATUREDATE': 'sig_date',
+                             }),
+              }
+BULK_INFOTABLE = {'NAMEOFISSUER': 'name',
+                  'CUSIP': 'CUSIP',
+                  'TITLEOFCLASS': 'class',
+                  'VALUE': 'mkt_val',
+                  'SSHPRNAMT': 'shares',
+                  'SSHPRNAMTTYPE': 'type',
+                  'PUTCALL': 'put_call',
+                  'INVESTMENTDISCRETION': 'discretion',
+                  'VOTING_AUTH_SOLE': 'va_sole',
+                  'VOTING_AUTH_SHARED': 'va_shared',
+                  'VOTING_AUTH_NONE': 'va_none',
+                  'OTHERMANAGER': 'othmgrdisc',
+                 }
+BULK_DATES = ('PERIODOFREPORT', 'REPORTCALENDARORQUARTER', 'SIGNATUREDATE')
+BULK_FLAGS = {'Y': 'true', 'N': 'false'}
+BULK_CHUNKSIZE = 500000
+
+BULK_REQUIRED = ('SUBMISSION', 'COVERPAGE', 'INFOTABLE')
+
+def _bulk_table(zf, name, chunksize=None):
+    """Reads one tab separated file of a Form 13F data set zip as strings.
+    
+    Empty fields are read as empty strings. Returns None when the zip
+    has no such file, or an iterator of DataFrames when chunksize is set.
+    
+    Raises:
+        ValueError: Zip has no file for one of BULK_REQUIRED.
+    """
+    members = {os.path.basename(m).upper(): m for m in zf.namelist()}
+    member = members.get(name + '.TSV')
+    if member is None:
+        if name in BULK_REQUIRED:
+            raise ValueError(f'{os.path.basename(zf.filename or "zip")} has no ' +
+                             f'{name}.tsv; not a Form 13F data set.')
+        return None
+    return pd.read_csv(zf.open(member), 
+                       sep='\t',
+                       dtype=str,
+                       keep_default_na=False,
+                       quoting=csv.QUOTE_NONE,
+                       chunksize=chunksize
+                      )
+
+def _bulk_date(value):
+    """Converts a data set DD-MON-YYYY date to the primary doc MM-DD-YYYY."""
+    if not value:
+        return value
+    return datetime.datetime.strptime(value, '%d-%b-%Y').strftime('%m-%d-%Y')
+
+def _bulk_docs(zf, forms):
+    """Returns parse_primary_doc() style dicts and filing dates by accession.
+    
+    Each filing of a form in forms is rebuilt from the SUBMISSION,
+    COVERPAGE, SUMMARYPAGE, OTHERMANAGER, OTHERMANAGER2 and SIGNATURE
+    files, so the row builders used for the xml documents apply as is.
+    """
+    submissions = _bulk_table(zf, 'SUBMISSION')
+    submissions = submissions[submissions.SUBMISSIONTYPE.isin(forms)]
+    docs = {}
+    for row in submissions.itertuples(index=False):
+        docs[row.ACCESSION_NUMBER] = ({'CIK': row.CIK.zfill(10),
+                                       'form': row.SUBMISSIONTYPE,
+                                       'period': _bulk_date(row.PERIODOFREPORT),
+                                       'filingmanager': [],
+                                       'oth_mgr': [],
+                                       'incl_mgr': [],
+                                       'signature': [],
+                                      }, 
+                                      datetime.datetime.strptime(row.FILING_DATE, 
+                                                                 '%d-%b-%Y'))
+    
+    for name, fields in (('COVERPAGE', BULK_COVERPAGE), ('SUMMARYPAGE', BULK_SUMMARYPAGE)):
+        table = _bulk_table(zf, name)
+        if table is None:
+            continue
+        for row in table.to_dict('records'):
+            entry = docs.get(row['ACCESSION_NUMBER'])
+            if entry is None:
+                continue
+            doc = entry[0]
+            for col, field in fields.items():
+                value = row.get(col, '')
+                if col in BULK_DATES:
+                    value = _bulk_date(value)
+                if field in ('amend', 'confd_flag'):
+                    value = BULK_FLAGS.get(value, value)
+                if value != '' or field == 'instrc5info':
+                    doc[field] = value
+            if name == 'SUMMARYPAGE':
+                doc['summarypage'] = True
+    
+    for block, (name, fields) in BULK_BLOCKS.items():
+        table = _bulk_table(zf, name)
+        if table is None:
+            continue
+        if 'SEQUENCENUMBER' in table.columns:
+            table = table.sort_values('SEQUENCENUMBER', key=pd.to_numeric, kind='stable')
+        for row in table.to_dict('records'):
+            entry = docs.get(row['ACCESSION_NUMBER'])
+            if entry is None:
+                continue
+            item = {}
+            for col, field in fields.items():
+                value = row.get(col, '')
+                if col in BULK_DATES:
+                    value = _bulk_date(value)
+                if value != '':
+                    item[field] = value
+            entry[0][block].append(item)
+            if block == 'oth_mgr':
+                entry[0]['othermanagersinfo'] = True
+    return docs
+
+def _bulk_accessions(zip_path, form='13F-HR'):
+    """Returns the 18 digit accession numbers of a data set's filings of form."""
+    forms = [form] if isinstance(form, str) else form
+    with zipfile.ZipFile(zip_path) as zf:
+        submissions = _bulk_table(zf, 'SUBMISSION')
+    accessions = submissions.ACCESSION_NUMBER[submissions.SUBMISSIONTYPE.isin(forms)]
+    return accessions.str.replace('-', '').tolist()
+
+@_instrumented
+def bulk_13f(zip_path, form='13F-HR'):
+    """Returns filer and file info DataFrames from a Form 13F data set.
+    
+    The SEC publishes every Form 13F filed in a quarter as a zip of tab
+    separated files. This reads a local copy and builds the same
+    DataFrames as filers_13f() and file_info_13f(), file_id included,
+    without a single request. Holdings are read with
+    bulk_holdings_13f(), and sql_bulk_13f() loads all three into SQL.
+    
+    Args:
+        zip_path (str): Location of a Form 13F data set zip file.
+        form (str or list): Optional; Submission type(s) to read.
+            Defaults to '13F-HR'.
+            
+    Returns:
+        A pandas DataFrame with 13F filer information.
+        
+        A pandas DataFrame with information on individual 13F filings.
+        
+    Raises:
+        ValueError: Document is missing a required element.
+        ValueError: Zip is not a Form 13F data set.
+    """
+    forms = [form] if isinstance(form, str) else form
+    
+    filer_buf = ColumnBuffer()
+    info_buf = ColumnBuffer()
+    with zipfile.ZipFile(zip_path) as zf:
+        docs = _bulk_docs(zf, forms)
+    for doc, date_filed in docs.values():
+        filer_buf.append(_filer_row(doc))
+        info_buf.append(_file_info_row(doc, date_filed))
+    
+    filers_df = _filers_frame(filer_buf)
+    info_df = _file_info_frame(info_buf)
+    print(f'{len(docs)} 13F filings read from {os.path.basename(zip_path)}.')
+    return filers_df, info_df
+
+def bulk_holdings_13f(zip_path, form='13F-HR', chunksize=BULK_CHUNKSIZE):
+    """Yields holdings DataFrames from a Form 13F data set.
+    
+    Streams INFOTABLE.tsv out of the zip in chunks of rows and joins
+    each chunk to the filing fields of its submission, giving the
+    columns and types of holdings_13f() including hold_id. Unlike
+    holdings_13f(), put_call and othmgrdisc are always present so that
+    every chunk has the same columns.
+    
+    Args:
+        zip_path (str): Location of a Form 13F data set zip file.
+        form (str or list): Optional; Submission type(s) to read.
+            Defaults to '13F-HR'.
+        chunksize (int): Optional; Information table rows per
+            DataFrame. Defaults to BULK_CHUNKSIZE.
+            
+    Yields:
+        A pandas DataFrame with information on the holdings of
+        individual 13F filings.
+        
+    Raises:
+        ValueError: Zip is not a Form 13F data set.
+    """
+    forms = [form] if isinstance(form, str) else form
+    
+    with zipfile.ZipFile(zip_path) as zf:
+        submissions = _bulk_table(zf, 'SUBMISSION')
+        submissions = submissions[submissions.SUBMISSIONTYPE.isin(forms)]
+        coverpage = _bulk_table(zf, 'COVERPAGE')[['ACCESSION_NUMBER', 'FORM13FFILENUMBER']]
+        header_df = submissions.merge(coverpage, on='ACCESSION_NUMBER', how='left')
+        header_df = pd.DataFrame({'ACCESSION_NUMBER': header_df.ACCESSION_NUMBER,
+                                  'CIK': header_df.CIK.str.zfill(10),
+                                  'form': header_df.SUBMISSIONTYPE,
+                                  'period': pd.to_datetime(header_df.PERIODOFREPORT, 
+                                                           format='%d-%b-%Y'),
+                                  'file_no': header_df.FORM13FFILENUMBER.mask(
+                                      header_df.FORM13FFILENUMBER.eq('')),
+                                  'date_filed': pd.to_datetime(header_df.FILING_DATE, 
+                                                               format='%d-%b-%Y'),
+                                 })
+        
+        carry = {}
+        for chunk in _bulk_table(zf, 'INFOTABLE', chunksize):
+            holdings = chunk[['ACCESSION_NUMBER'] + list(BULK_INFOTABLE)]\
+                .rename(columns=BULK_INFOTABLE)
+            for col in ('put_call', 'othmgrdisc'):
+                holdings[col] = holdings[col].mask(holdings[col].eq(''))
+            full_df = holdings.merge(header_df, on='ACCESSION_NUMBER', how='inner')\
+                [HOLD_HEADER_COLUMNS + HOLD_COLUMNS]
+            if full_df.empty:
+                continue
+            _convert_types(full_df, HOLD_TYPES)
+            full_df['othmgrdisc'] = pd.to_numeric(full_df['othmgrdisc'], errors='coerce')
+            yield _add_hold_id(full_df, carry)
+
+def _engine_args(path):
+    """Returns create_engine() keyword arguments needed by the bulk loaders."""
+    url = sql.engine.make_url(path)
+    if url.get_backend_name() in ('mysql', 'mariadb') and url.get_driver_name() == 'pymysql':
+        # LOAD DATA LOCAL INFILE is refused unless the client enables it.
+        return {'connect_args': {'local_infile': True}}
+    return {}
+
+def _bulk_frame(df, dtype, index_label):
+    """Returns df with its index as a column and Date columns as dates."""
+    frame = df.reset_index()
+    frame.columns = [index_label or df.index.name or 'index'] + list(df.columns)
+    for col, col_type in dtype.items():
+        if (col in frame.columns and col_type in (sql.types.Date, sql.types.DATE)
+                and pd.api.types.is_datetime64_any_dtype(frame[col])):
+            frame[col] = frame[col].dt.date
+    return frame
+
+def _copy_postgresql(connection, table, frame):
+    """Streams a DataFrame into PostgreSQL with COPY FROM STDIN."""
+    quote = connection.dialect.identifier_preparer.quote
+    cols = ', '.join(quote(c) for c in frame.columns)
+    statement = str(f'COPY {quote(table)} ({cols}) FROM STDIN ' +
+                    "WITH (FORMAT csv, NULL '\\N')")
+    buf = StringIO()
+    frame.to_csv(buf, index=False, header=False, na_rep='\\N')
+    buf.seek(0)
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):
+            cursor.copy_expert(statement, buf)
+        else:
+            with cursor.copy(statement) as copy:
+                copy.write(buf.getvalue())
+    finally:
+        cursor.close()
+
+def _load_data_mysql(connection, table, frame):
+    """Loads a DataFrame into MySQL with LOAD DATA LOCAL INFILE."""
+    quote = connection.dialect.identifier_preparer.quote
+    frame = frame.copy()
+    for col in frame.columns:
+        if pd.api.types.is_string_dtype(frame[col]):
+            frame[col] = frame[col].str.replace('\\', '\\\\', regex=False)
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False,
+                                     newline='', encoding='utf-8') as tmp:
+        frame.to_csv(tmp, index=False, header=False, na_rep='\\N')
+    try:
+        cols = ', '.join(quote(c) for c in frame.columns)
+        connection.exec_driver_sql(
+            f"LOAD DATA LOCAL INFILE '{tmp.name}' INTO TABLE {quote(table)} " +
+            "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' " +
+            "OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '\\\\' " +
+            f"LINES TERMINATED BY '\\n' ({cols})")
+    finally:
+        os.remove(tmp.name)
+
+def _executemany(connection, table, frame, chunksize):
+    """Inserts a DataFrame in chunks with the DBAPI cursor's executemany."""
+    quote = connection.dialect.identifier_preparer.quote
+    if connection.dialect.name == 'sqlite':
+        # Store timestamps in the text format SQLAlchemy uses for SQLite.
+        frame = frame.copy()
+        for col in frame.columns:
+            if pd.api.types.is_datetime64_any_dtype(frame[col]):
+                frame[col] = frame[col].dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+            elif frame[col].dtype == object:
+                frame[col] = frame[col].map(lambda v: v.isoformat() 
+                                            if isinstance(v, datetime.date) else v)
+    paramstyle = connection.dialect.paramstyle
+    positions = range(len(frame.columns))
+    if paramstyle == 'qmark':
+        markers = ['?' for i in positions]
+    elif paramstyle == 'numeric':
+        markers = [f':{i + 1}' for i in positions]
+    elif paramstyle == 'named':
+        markers = [f':p{i}' for i in positions]
+    else:
+        markers = ['%s' for i in positions]
+    cols = ', '.join(quote(c) for c in frame.columns)
+    statement = f'INSERT INTO {quote(table)} ({cols}) VALUES ({", ".join(markers)})'
+    values = frame.astype(object).where(frame.notna(), None)
+    for start in range(0, len(values), chunksize):
+        rows = list(values.iloc[start:start + chunksize].itertuples(index=False, name=None))
+        if paramstyle == 'named':
+            rows = [{f'p{i}': v for i, v in enumerate(row)} for row in rows]
+        connection.exec_driver_sql(statement, rows)
+
+BULK_METHODS = ('auto', 'copy', 'load', 'executemany', 'to_sql')
+
+def bulk_load(connection, table, df, dtype=None, index_label=None,
+              method='auto', chunksize=10000):
+    """Appends a DataFrame to a SQL table using the dialect's bulk path.
+    
+    The table is created from the DataFrame's columns and the dtype
+    mapping if it does not exist, exactly as DataFrame.to_sql() would,
+    and the rows are then written with the fastest path the connection
+    supports:
+    
+        'copy': PostgreSQL COPY FROM STDIN (psycopg2 or psycopg 3).
+        'load': MySQL LOAD DATA LOCAL INFILE; requires local_infile on
+            the client connection, which sql_13f() enables for pymysql.
+        'executemany': Chunked DBAPI executemany, used for SQLite.
+        'to_sql': pandas DataFrame.to_sql(), the fallback for anything
+            else and when LOAD DATA is refused by the server.
+    
+    Args:
+        connection (SQLAlchemy Connection): Connection inside the
+            transaction to write in.
+        table (str): SQL table to append to.
+        df (pandas DataFrame): Rows to append. The index is written as
+            a column, as with to_sql(index=True).
+        dtype (dict): Optional; Column names and SQLAlchemy types used
+            when creating the table. Defaults to None.
+        index_label (str): Optional; Column name for the index.
+            Defaults to None, using the index name or 'index'.
+        method (str): Optional; One of BULK_METHODS. 'auto' picks the
+            path for the connection's dialect. Defaults to 'auto'.
+        chunksize (int): Optional; Rows per executemany call. Defaults
+            to 10000.
+            
+    Returns:
+        The method used to write the rows.
+        
+    Raises:
+        ValueError: method argument must be one of BULK_METHODS.
+    """
+    if method not in BULK_METHODS:
+        raise ValueError(f'method argument must be one of {BULK_METHODS}.')
+    dtype = dtype or {}
+    
+    dialect = connection.dialect.name
+    if method == 'auto':
+        if dialect == 'postgresql':
+            method = 'copy'
+        elif dialect in ('mysql', 'mariadb'):
+            method = 'load'
+        else:
+            method = 'executemany'
+    if method == 'copy':
+        cursor = connection.connection.driver_connection.cursor()
+        if not (hasattr(cursor, 'copy_expert') or hasattr(cursor, 'copy')):
+            method = 'to_sql'
+        cursor.close()
+    
+    df.head(0).to_sql(table, 
+                      con = connection, 
+                      if_exists = 'append', 
+                      index = True, 
+                      index_label = index_label,
+                      dtype = dtype)
+    if len(df) == 0:
+        return method
+    
+    if method == 'to_sql':
+        df.to_sql(table, 
+                  con = connection, 
+                  if_exists = 'append', 
+                  index = True, 
+                  index_label = index_label,
+                  dtype = dtype)
+        return method
+    
+    frame = _bulk_frame(df, dtype, index_label)
+    if method == 'copy':
+        _copy_postgresql(connection, table, frame)
+    elif method == 'load':
+        try:
+            _load_data_mysql(connection, table, frame)
+        except sql.exc.DBAPIError:
+            # Servers with local_infile disabled refuse the statement
+            # without affecting the open transaction.
+            return bulk_load(connection, table, df, dtype, index_label, 'to_sql')
+    else:
+        _executemany(connection, table, frame, chunksize)
+    return method
+
+def _ensure_id_index(connection, table, id_col):
+    """Creates an index on the id column of a SQL table if none exists.
+    
+    The anti-join used by _insert_missing() looks up every staged id in
+    the target table, so the id column needs an index to keep the
+    insert from scanning the table once per row.
+    """
+    inspector = sql.inspect(connection)
+    indexed = [i['column_names'][:1] for i in inspector.get_indexes(table)]
+    indexed.append(inspector.get_pk_constraint(table).get('constrained_columns', [])[:1])
+    try:
+        indexed += [u['column_names'][:1] for u in inspector.get_unique_constraints(table)]
+    except NotImplementedError:
+        pass
+    if [id_col] in indexed:
+        return
+    sql_table = sql.Table(table, sql.MetaData(), autoload_with=connection)
+    id_column = sql_table.c[id_col]
+    # MySQL can only index a prefix of TEXT columns.
+    length = {'mysql_length': 255} if isinstance(id_column.type, sql.types.String) else {}
+    sql.Index(f'ix_{table}_{id_col}', id_column, **length).create(connection)
+
+def _create_keyed_table(connection, table, df, id_col, dtype, index_label=None):
+    """Creates an empty SQL table for a DataFrame with id_col as its primary key."""
+    frame = _bulk_frame(df.head(0), dtype, index_label)
+    connection.exec_driver_sql(pd.io.sql.get_schema(frame, table, keys=id_col,
+                                                    con=connection, dtype=dtype))
+
+def _check_collisions(connection, table, stage, id_col, text_col):
+    """Raises ValueError if staged surrogate keys match rows with other key strings."""
+    quote = connection.dialect.identifier_preparer.quote
+    columns = [c['name'] for c in sql.inspect(connection).get_columns(table)]
+    if text_col not in columns:
+        return
+    clashes = connection.execute(sql.text(
+        f'SELECT COUNT(*) FROM {quote(stage)} s JOIN {quote(table)} t ' +
+        f'ON t.{quote(id_col)} = s.{quote(id_col)} ' +
+        f'WHERE t.{quote(text_col)} <> s.{quote(text_col)}')).scalar()
+    if clashes:
+        raise ValueError(f'{clashes} surrogate {id_col} values collide with keys in {table}.')
+
+def _create_stage(connection, table, stage, columns, dtype):
+    """Creates a session-temporary staging table with the types of a SQL table.
+    
+    Temporary tables live on the transaction's connection only and are
+    dropped by the server when the session ends, so a crash leaves no
+    staging tables behind. Unlike CREATE TABLE, CREATE TEMPORARY TABLE
+    does not commit an open transaction on MySQL.
+    """
+    target = sql.Table(table, sql.MetaData(), autoload_with=connection)
+    types = {c.name: c.type for c in target.columns}
+    cols = [sql.Column(c, types[c] if c in types else dtype.get(c, sql.types.Text))
+            for c in columns]
+    sql.Table(stage, sql.MetaData(), *cols, prefixes=['TEMPORARY']).create(connection)
+
+def _insert_missing(connection, table, df, id_col, dtype, index_label=None,
+                    method='auto', text_col=None):
+    """Inserts the rows of a DataFrame whose id is not yet in a SQL table.
+    
+    The DataFrame is written into a temporary staging table with
+    bulk_load() and copied into the target with a single INSERT ... SELECT
+    that skips ids already present, so the existing ids never leave the
+    database. The statement also
+    carries the dialect's conflict clause (ON CONFLICT DO NOTHING on
+    PostgreSQL and SQLite, INSERT IGNORE on MySQL) so that rows hitting a
+    unique constraint are skipped rather than failing the batch. Given the
+    readable text_col of a surrogate id_col, staged keys are first
+    checked for collisions with the rows already in the table.
+    
+    Returns:
+        Number of rows inserted.
+    """
+    stage = f'{table}_stage_{uuid.uuid4().hex[:8]}'
+    quote = connection.dialect.identifier_preparer.quote
+    labels = [index_label or df.index.name or 'index'] + list(df.columns)
+    col_list = ', '.join(quote(c) for c in labels)
+    select = str(f'SELECT {col_list} FROM {quote(stage)} s WHERE NOT EXISTS ' +
+                 f'(SELECT 1 FROM {quote(table)} t ' +
+                 f'WHERE t.{quote(id_col)} = s.{quote(id_col)})')
+    dialect = connection.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        statement = f'INSERT IGNORE INTO {quote(table)} ({col_list}) {select}'
+    elif dialect in ('postgresql', 'sqlite'):
+        statement = f'INSERT INTO {quote(table)} ({col_list}) {select} ON CONFLICT DO NOTHING'
+    else:
+        statement = f'INSERT INTO {quote(table)} ({col_list}) {select}'
+    
+    _create_stage(connection, table, stage, labels, dtype)
+    bulk_load(connection, stage, df, dtype, index_label, method)
+    try:
+        if text_col is not None:
+            _check_collisions(connection, table, stage, id_col, text_col)
+        return connection.execute(sql.text(statement)).rowcount
+    finally:
+        try:
+            # DROP TEMPORARY TABLE leaves a MySQL transaction open
+            temporary = 'TEMPORARY ' if dialect in ('mysql', 'mariadb') else ''
+            connection.execute(sql.text(f'DROP {temporary}TABLE {quote(stage)}'))
+        except sql.exc.DBAPIError:
+            # A failed statement aborts the transaction on PostgreSQL, and
+            # the rollback removes the staging table with it.
+            pass
+
+# Column types sql_13f() creates tables with, by SQLAlchemy type name
+SQL_TYPES = {'CIK': 'Text',
+             'form': 'Text',
+             'type': 'Text',
+             'date_filed': 'DateTime',
+             'file_no': 'Text',
+             'period': 'Date',
+             'quarter': 'Date',
+             'signature': 'Text',
+             'entry_total': 'Integer',
+             'value_total': 'Float',
+             'incld_mgrs': 'Integer',
+             'confd_flag': 'Text',
+             'amend': 'Text',
+             'instruct5': 'Text',
+             'instrc5info': 'Text',
+             'oth_mgr': 'Text',
+             'incl_mgr': 'Text',
+             'file_id': 'Text',
+             'file_id_text': 'Text',
+             'name': 'Text',
+             'CUSIP': 'Text',
+             'class': 'Text',
+             'mkt_val': 'Float',
+             'shares': 'Float',
+             'discretion': 'Text',
+             'va_sole': 'Float',
+             'va_shared': 'Float',
+             'va_none': 'Float',
+             'put_call': 'Text',
+             'othmgrdisc': 'Text',
+             'hold_id': 'Text',
+             'hold_id_text': 'Text',
+             'company': 'Text',
+             'street1': 'Text',
+             'street2': 'Text',
+             'city': 'Text',
+             'stateorcountry': 'Text',
+             'zipcode': 'Text',
+             'CIK_int': 'Integer',
+             'comp_name': 'Text',
+             'form_type': 'Text',
+             'file_name': 'Text',
+             'link': 'Text'
+            }
+
+@_instrumented
+def sql_13f(path, table, df, id_col=None, typeset=None, method='auto'):
     """Uploads Form 13F DataFrames to SQL.
     
     Utilizing SQLAlchemy, the function creates or updates SQL tables using
     pandas DataFrames containing information on daily SEC filings generally
-    and Form 13F filings specifically.
+    and Form 13F filings specifically. New tables get an index on id_col,
+    or a BIGINT primary key when id_col holds the 64-bit surrogate keys
+    set up by configure_keys(). Existing tables are updated server side: the DataFrame is staged in
+    a temporary table and only rows whose id_col value is not already in
+    the table are inserted.
     
     Args:
         path (str): Connection string to use in SQLAlchemy
@@ -819,11 +3511,16 @@ def sql_13f(path, table, df, id_col=None,
         df (pandas DataFrame): DataFrame to use to update SQL table.
         id_col (str): DataFrame column to compare to primary key of SQL
             table. Defaults to None.
-        typeset (dict): Dictionary of column names and SQLAlchemy types.
-            Default dictionary contains all of the columns produced by
-            the parse_links(), filer_13f(), file_info_13f(), and
-            holdings_13f() function calls. A list comprehension
-            produces the proper list depending on the DataFrame.
+        typeset (dict): Optional; Dictionary of column names and
+            SQLAlchemy types. Defaults to None, using the types named in
+            SQL_TYPES, which cover all of the columns produced by the
+            parse_links(), filer_13f(), file_info_13f(), and
+            holdings_13f() function calls. A dict comprehension
+            produces the proper set depending on the DataFrame.
+        method (str): Optional; Bulk load path passed to bulk_load():
+            'auto', 'copy', 'load', 'executemany' or 'to_sql'. Defaults
+            to 'auto', choosing COPY on PostgreSQL, LOAD DATA LOCAL
+            INFILE on MySQL and executemany elsewhere.
     
     Raises:
         TypeError: df argument must be a pandas DataFrame.
@@ -835,30 +3532,104 @@ def sql_13f(path, table, df, id_col=None,
     if id_col == None:
         raise ValueError('No id column (primary key) found.')
         
-    engine = sql.create_engine(path)
-    connection = engine.connect()
-    
+    if typeset is None:
+        typeset = {key: getattr(sql.types, value) for (key, value) in SQL_TYPES.items()}
     sqltypes = {key:value for (key, value) in typeset.items() if key in df.columns}
+    surrogate = id_col in df.columns and pd.api.types.is_integer_dtype(df[id_col])
+    text_col = None
+    if surrogate:
+        sqltypes[id_col] = sql.types.BigInteger
+        # Equal surrogate keys are the same holding loaded twice
+        df = df.drop_duplicates(subset=id_col)
+        if id_col + '_text' in df.columns:
+            text_col = id_col + '_text'
 
-    # Check if tables exists, if true create table, if false append
-    if not connection.dialect.has_table(connection, table):
-        df.to_sql(table, 
-                  con = connection, 
-                  if_exists = 'fail', 
-                  index = True, 
-                  dtype = sqltypes)    
-    else:
-        exist_df = pd.read_sql_table(table, con=connection, columns=[id_col])
-        exist_hold_id = exist_df[id_col].to_list()
-        upload = df[~df[id_col].isin(exist_hold_id)]
-        upload.to_sql(table, 
-                      con = connection, 
-                      if_exists = 'append', 
-                      index = True, 
-                      dtype = sqltypes)
+    with sql_transaction(path) as connection:
+        # Check if tables exists, if true create table, if false append
+        if not connection.dialect.has_table(connection, table):
+            if surrogate:
+                _create_keyed_table(connection, table, df, id_col, sqltypes)
+            bulk_load(connection, table, df, sqltypes, method=method)
+            inserted = len(df)
+        else:
+            inserted = _insert_missing(connection, table, df, id_col, sqltypes,
+                                       method=method, text_col=text_col)
+        _ensure_id_index(connection, table, id_col)
+        index = _ingest_index
+        if index is not None and id_col == 'hold_id':
+            # holdings_13f() skips the information tables of these filings from now on
+            filings = df[['CIK', 'file_no', 'period']].drop_duplicates()
+            _after_commit(path, functools.partial(index.add,
+                                                  file_ids=_file_ids(filings).dropna().tolist()))
+    _metrics.inc('sql_rows', max(inserted, 0))
         
     print(f"SQL {table} table updated.")
 
+@_instrumented
+def sql_13f_batches(path, batches, method='auto', max_pending=1):
+    """Commits a stream of Form 13F batches to SQL from a writer thread.
+    
+    Writer stage for batched runs. Each batch is a pair of a list of
+    (table, df, id_col) uploads and an on_commit callable or None. A
+    writer thread owns the sql_transaction() of every batch: it uploads
+    the batch's DataFrames with sql_13f(), commits them together and
+    then calls on_commit. Meanwhile the calling thread keeps iterating
+    batches, so the next batch is fetched and parsed while the previous
+    one is committed. When max_pending batches are waiting the producer
+    blocks, which keeps memory bounded by the batch size. After a failed
+    batch nothing more is written and its exception is raised.
+    
+    Args:
+        path (str): Connection string to use in SQLAlchemy
+            create_engine() function.
+        batches (iterable): (uploads, on_commit) pairs, typically from a
+            generator running the fetch and parse stages.
+        method (str): Optional; Bulk load path passed to sql_13f().
+            Defaults to 'auto'.
+        max_pending (int): Optional; Batches allowed to wait for the
+            writer. Defaults to 1.
+            
+    Returns:
+        The number of batches committed.
+    """
+    pending = queue.Queue(maxsize=max_pending)
+    errors = []
+    
+    def writer():
+        while True:
+            batch = pending.get()
+            if batch is None:
+                return
+            if errors:
+                continue
+            uploads, on_commit = batch
+            try:
+                if uploads:
+                    with sql_transaction(path):
+                        for table, df, id_col in uploads:
+                            sql_13f(path, table, df, id_col=id_col, method=method)
+                if on_commit is not None:
+                    on_commit()
+            except Exception as e:
+                errors.append(e)
+    
+    thread = threading.Thread(target=writer, name='sql_13f_batches', daemon=True)
+    thread.start()
+    committed = 0
+    try:
+        for batch in batches:
+            if errors:
+                break
+            pending.put(batch)
+            committed += 1
+    finally:
+        pending.put(None)
+        thread.join()
+    if errors:
+        raise errors[0]
+    return committed
+
+@_instrumented
 def sql_idx_dates(path, table, dates):
     """Creates or updates a SQL table of processed daily index files.
     
@@ -884,38 +3655,401 @@ def sql_idx_dates(path, table, dates):
     
     mdate_list = []
     for m in dates:
-        datetuple = []
-        mdate = m.split('/')[-1].split('.')[1]
-        mdate_dt = datetime.datetime.strptime(mdate, "%Y%m%d")
+        # Quarterly files are stamped at the end of the quarter's last day so
+        # they never collide with that day's daily file in a unique Date column
+        mtime = datetime.time(23, 59, 59) if '/full-index/' in m else datetime.time()
+        mdate_dt = datetime.datetime.combine(_link_date(m), mtime)
         datetuple = [m, mdate_dt]
         mdate_list.append(datetuple)
     idx_df = pd.DataFrame(mdate_list, columns = ['Link', 'Date']).set_index('Date')
     
-    engine = sql.create_engine(path)
-    connection = engine.connect()
+    with sql_transaction(path) as connection:
+        # Check if tables exists, if true create table, if false append
+        if not connection.dialect.has_table(connection, table):
+            idx_df.to_sql(table, 
+                      con = connection, 
+                      if_exists = 'fail', 
+                      index = True,
+                      index_label = 'Date',
+                      dtype = {'Link':sql.types.Text,
+                               'Date':sql.types.DateTime
+                              }
+                         )
+        else:
+            _insert_missing(connection, table, idx_df, 'Link',
+                            dtype = {'Link':sql.types.Text,
+                                     'Date':sql.types.DateTime
+                                    },
+                            index_label = 'Date'
+                           )
+        _ensure_id_index(connection, table, 'Link')
+    
+    print(f'SQL {table} dates table updated.')
 
-    # Check if tables exists, if true create table, if false append
-    if not connection.dialect.has_table(connection, table):
-        idx_df.to_sql(table, 
-                  con = connection, 
-                  if_exists = 'fail', 
-                  index = True,
-                  index_label = 'Date',
-                  dtype = {'Link':Text,
-                           'Date':Date
+@_instrumented
+def sql_bulk_13f(path, zip_path, filer_table, info_table, hold_table, 
+                 form='13F-HR', chunksize=BULK_CHUNKSIZE, method='auto'):
+    """Loads a Form 13F data set into SQL through sql_13f().
+    
+    Reads the filers and file info with bulk_13f() and streams the
+    holdings with bulk_holdings_13f(), upserting each DataFrame on
+    CIK, file_id and hold_id respectively inside a single transaction,
+    so a quarter either loads completely or not at all. Once it commits,
+    the accessions and file_ids are added to the IngestIndex set by
+    configure_ingest_index(), so a run over the EDGAR website skips them.
+    
+    Args:
+        path (str): Connection string to use in SQLAlchemy
+            create_engine() function.
+        zip_path (str): Location of a Form 13F data set zip file.
+        filer_table (str): SQL table of 13F filers.
+        info_table (str): SQL table of 13F file information.
+        hold_table (str): SQL table of 13F holdings.
+        form (str or list): Optional; Submission type(s) to load.
+            Defaults to '13F-HR'.
+        chunksize (int): Optional; Information table rows per
+            upsert. Defaults to BULK_CHUNKSIZE.
+        method (str): Optional; Bulk load path passed to sql_13f().
+            Defaults to 'auto'.
+    """
+    filers_df, info_df = bulk_13f(zip_path, form)
+    with sql_transaction(path):
+        index = _ingest_index
+        if index is not None:
+            _after_commit(path, functools.partial(index.add,
+                                                  accessions=_bulk_accessions(zip_path, form),
+                                                  file_ids=info_df['file_id'].tolist()))
+        sql_13f(path, filer_table, filers_df, id_col='CIK', method=method)
+        sql_13f(path, info_table, info_df, id_col='file_id', method=method)
+        rows = 0
+        for hold_df in bulk_holdings_13f(zip_path, form, chunksize):
+            sql_13f(path, hold_table, hold_df, id_col='hold_id', method=method)
+            rows += len(hold_df)
+    print(f'{rows} holdings loaded from {os.path.basename(zip_path)}.')
+
+# Parquet sink. pyarrow is optional and only imported by these functions.
+# Each dataset is hive partitioned on the columns below, by the id column
+# its rows are keyed on; 'quarter' is derived from date_filed when the
+# DataFrame has no such column, e.g. for parse_links() output.
+PARQUET_PARTITIONS = {'hold_id': ['period'],
+                      'file_id': ['period'],
+                      'CIK': [],
+                      'link': ['quarter', 'form_type'],
+                     }
+PARQUET_PARTITION_TYPES = {'period': 'date32',
+                           'quarter': 'string',
+                           'form_type': 'string',
+                           'form': 'string',
                           }
-                     )
+PARQUET_DICTIONARY = ['CUSIP', 'name', 'class']
+
+def _import_arrow():
+    """Returns the pyarrow, pyarrow.parquet and pyarrow.dataset modules."""
+    try:
+        import pyarrow, pyarrow.parquet, pyarrow.dataset
+    except ImportError as e:
+        raise ImportError('The Parquet sink requires pyarrow; '
+                          'install it with pip install pyarrow.') from e
+    return pyarrow, pyarrow.parquet, pyarrow.dataset
+
+def _parquet_partitioning(fields):
+    """Returns a hive partitioning for the partition columns given."""
+    pa, _pq, ds = _import_arrow()
+    schema = pa.schema([(f, getattr(pa, PARQUET_PARTITION_TYPES.get(f, 'string'))())
+                        for f in fields])
+    return ds.partitioning(schema, flavor='hive')
+
+def _parquet_fields(root):
+    """Returns the partition columns of a dataset from its directory names."""
+    fields = []
+    path = root
+    while True:
+        subdirs = sorted(d for d in os.listdir(path) 
+                         if os.path.isdir(os.path.join(path, d)) and '=' in d)
+        if not subdirs:
+            return fields
+        fields.append(subdirs[0].split('=', 1)[0])
+        path = os.path.join(path, subdirs[0])
+
+@_instrumented
+def parquet_13f(root, df, id_col=None, partition_cols=None):
+    """Writes a Form 13F DataFrame to a partitioned Parquet dataset.
+    
+    Columnar alternative to sql_13f(). The DataFrame is written under
+    root as a hive partitioned dataset (period=2020-12-31/...), so one
+    quarter can be read without scanning the rest. Writes are idempotent:
+    each partition the DataFrame touches is rewritten with its existing
+    rows whose id_col is not in the DataFrame plus the new rows, and
+    untouched partitions are left as they are. CUSIP, name and class are
+    stored dictionary encoded.
+    
+    Args:
+        root (str): Directory of the dataset, one per table.
+        df (pandas DataFrame): DataFrame produced by parse_links(),
+            filers_13f(), file_info_13f() or holdings_13f().
+        id_col (str): DataFrame column that identifies a row.
+            Defaults to None.
+        partition_cols (list): Optional; Columns to partition on. 
+            Defaults to None, using PARQUET_PARTITIONS for id_col.
+            
+    Raises:
+        TypeError: df argument must be a pandas DataFrame.
+        ValueError: No id column (primary key) found.
+        ImportError: pyarrow is not installed.
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError('df argument must be a pandas DataFrame.')
+    if id_col == None:
+        raise ValueError('No id column (primary key) found.')
+    pa, pq, ds = _import_arrow()
+    if partition_cols is None:
+        partition_cols = PARQUET_PARTITIONS.get(id_col, [])
+    
+    df = df.copy()
+    if 'quarter' in partition_cols and 'quarter' not in df.columns:
+        df['quarter'] = df['date_filed'].dt.to_period('Q').astype(str)
+    for col in partition_cols:
+        if PARQUET_PARTITION_TYPES.get(col) == 'date32':
+            df[col] = pd.to_datetime(df[col]).dt.date
+        else:
+            df[col] = df[col].astype(str)
+    for col in PARQUET_DICTIONARY:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    partitioning = _parquet_partitioning(partition_cols)
+    if os.path.isdir(root) and os.listdir(root):
+        dataset = ds.dataset(root, format='parquet', partitioning=partitioning)
+        touched = None
+        for col in partition_cols:
+            expr = ds.field(col).isin(df[col].drop_duplicates().tolist())
+            touched = expr if touched is None else touched & expr
+        existing = dataset.to_table(filter=touched).to_pandas(date_as_object=True)
+        existing = existing[~existing[id_col].isin(df[id_col])]
+        if len(existing):
+            df = pd.concat([df, existing], ignore_index=True)
+            for col in PARQUET_DICTIONARY:
+                if col in df.columns:
+                    df[col] = df[col].astype('category')
+    
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(table, root, 
+                     format='parquet',
+                     partitioning=partitioning if partition_cols else None,
+                     basename_template='part-{i}.parquet',
+                     existing_data_behavior='delete_matching'
+                    )
+    print(f'Parquet {os.path.basename(os.path.normpath(root))} dataset updated.')
+
+@_instrumented
+def read_parquet_13f(root, columns=None, filters=None):
+    """Returns a pandas DataFrame read from a dataset written by parquet_13f().
+    
+    Only the columns asked for are read, and filters on partition
+    columns skip whole directories, e.g. filters=[('period', '=',
+    datetime.date(2020, 12, 31))] opens a single quarter of holdings.
+    Filters on other columns are checked against row group statistics
+    before any data is read.
+    
+    Args:
+        root (str): Directory of the dataset.
+        columns (list): Optional; Columns to read. Defaults to None,
+            reading every column.
+        filters (list): Optional; Predicates as (column, op, value)
+            tuples, or lists of them combined with OR, in the format
+            pyarrow.parquet.read_table() takes. Defaults to None.
+            
+    Returns:
+        A pandas DataFrame of the matching rows.
+        
+    Raises:
+        ImportError: pyarrow is not installed.
+    """
+    pa, pq, ds = _import_arrow()
+    partitioning = _parquet_partitioning(_parquet_fields(root))
+    dataset = ds.dataset(root, format='parquet', partitioning=partitioning)
+    expr = pq.filters_to_expression(filters) if filters else None
+    fragments = list(dataset.get_fragments(filter=expr))
+    if fragments:
+        # Batches may differ in optional columns such as put_call
+        schema = pa.unify_schemas([f.physical_schema for f in fragments] + 
+                                  [partitioning.schema])
+        dataset = ds.dataset(root, format='parquet', partitioning=partitioning,
+                             schema=schema)
+    table = dataset.to_table(columns=columns, filter=expr)
+    return table.to_pandas(date_as_object=False)
+
+def _quarantined_accessions(journal, links, since=None):
+    """Returns the accession numbers of links with filings quarantined in a journal."""
+    if journal is None:
+        return set()
+    failed = {_accession(key) for key in journal.quarantined(since=since)['key']}
+    return failed.intersection(map(_accession, links))
+
+def _mark_ingested(batch, filings=(), failed=()):
+    """Adds a committed batch's filings to the IngestIndex, failures excepted.
+    
+    filings pairs each loaded file_id with its accession number, or None
+    where the filing was loaded whole. A file_id whose information table
+    was quarantined, its accession in failed, is left out so a later run
+    still fetches it.
+    """
+    if _ingest_index is None:
+        return
+    accessions = [_accession(link) for link in batch]
+    _ingest_index.add(accessions=[a for a in accessions if a not in failed],
+                      file_ids=[f for a, f in filings if a is None or a not in failed])
+
+def _run_index_file(path, link, args):
+    """Loads the 13F-HR filings of one master index file in committed batches."""
+    idx_df = next(iter_links([link], forms=args.form))
+    filings = 0
+    started = time.time()
+    if args.submissions:
+        links = txt_list(idx_df, args.form)
     else:
-        exist_df = pd.read_sql_table(table, con=connection, columns=['Link'])
-        exist_hold_id = exist_df['Link'].to_list()
-        upload = idx_df[~idx_df['Link'].isin(exist_hold_id)]
-        upload.to_sql(table, 
-                      con = connection, 
-                      if_exists = 'append', 
-                      index = True, 
-                      dtype = {'Link':VARCHAR,
-                               'Date':Date
-                              }
-                     )
+        links = xml_list(idx_df, args.form)
+    
+    def batches():
+        # Runs on this thread while sql_13f_batches() commits the previous batch
+        nonlocal filings
+        for batch in iter_batches(links, args.batch_size):
+            uploads = []
+            if args.submissions:
+                filers_df, info_df, hold_df, _no_hold = submissions_13f(batch,
+                                                                        journal=args.journal)
+                loaded = [(None, file_id) for file_id in info_df['file_id']]
+            else:
+                link_list, _no_hold = xml_13f(batch, journal=args.journal)
+                if not link_list:
+                    failed = _quarantined_accessions(args.journal, batch, started)
+                    yield uploads, functools.partial(_mark_ingested, batch, failed=failed)
+                    continue
+                filers_df, info_df, header_df = primary_docs_13f(link_list, journal=args.journal)
+                hold_df = holdings_13f(link_list, header_df=header_df, journal=args.journal)
+                loaded = list(zip(header_df['doc_xml'].map(_accession), _file_ids(header_df)))
+            if not info_df.empty:
+                uploads = [(args.filers_table, filers_df, 'CIK'),
+                           (args.info_table, info_df, 'file_id')]
+                if not hold_df.empty:
+                    uploads.append((args.holdings_table, hold_df, 'hold_id'))
+                filings += len(info_df)
+            failed = _quarantined_accessions(args.journal, batch, started)
+            yield uploads, functools.partial(_mark_ingested, batch, loaded, failed)
     
-    print(f'SQL {table} dates table updated.')
\ No newline at end of file
+    sql_13f_batches(path, batches())
+    # Only marked once every batch of the file has been committed and none
+    # of its filings is quarantined, so the next run lists it again to retry.
+    # Every filing of the file is either replayed as completed or processed
+    # again in this run, so only errors recorded since it started count.
+    failed = _quarantined_accessions(args.journal, links, started)
+    if failed:
+        print(f'{len(failed)} filings quarantined; {link} left for the next run.')
+        return filings
+    sql_idx_dates(path, args.dates_table, [link])
+    return filings
+
+def main(argv=None):
+    """Runs the index to SQL pipeline from the command line.
+    
+    Lists the master index files not yet recorded in the dates table,
+    then for each file streams its 13F-HR filings through fetching,
+    parsing and sql_13f_batches() in batches of --batch-size filings,
+    each committed in one transaction by a writer thread while the next
+    batch is fetched and parsed. A file is recorded as processed only
+    after all of its batches are committed and none of its filings is
+    quarantined in the --journal, so an interrupted run picks up again at
+    the first unfinished file and quarantined filings are retried. Memory
+    is bounded by the batch size rather than the size of a quarter.
+    
+    Example:
+        python -m SEC_13F --db sqlite:///sec.db --year 2021 --batch-size 200
+    
+    Args:
+        argv (list): Optional; Command line arguments. Defaults to None,
+            using sys.argv.
+            
+    Returns:
+        The number of filings loaded.
+    """
+    parser = argparse.ArgumentParser(prog='python -m SEC_13F',
+                                     description='Load SEC Form 13F filings into SQL.')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--db', help='SQLAlchemy connection string.')
+    target.add_argument('--yaml', help='yaml file read by sql_path() for the connection string.')
+    parser.add_argument('--api-key', help='yaml key with the connection inputs.')
+    parser.add_argument('--year', type=int, default=datetime.date.today().year)
+    parser.add_argument('--prior-years', type=int, default=None)
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Concurrent requests (see configure_fetch()).')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Requests per second across all threads.')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='Parse processes (see configure_parse()).')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Filings fetched, parsed and committed together.')
+    parser.add_argument('--user-agent', default=None)
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--journal', default=None, help='Checkpoint journal file.')
+    parser.add_argument('--ingest-index', default=None,
+                        help='Index of loaded filings that are skipped before fetching.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only list index files from the latest processed date on.')
+    parser.add_argument('--full-index', action='store_true',
+                        help='Use quarterly index files for closed quarters.')
+    parser.add_argument('--submissions', action='store_true',
+                        help='Read each filing from its complete submission .txt file.')
+    parser.add_argument('--surrogate-keys', action='store_true',
+                        help='Store file_id and hold_id as 64-bit integer keys.')
+    parser.add_argument('--no-readable-keys', action='store_true',
+                        help='With --surrogate-keys, leave out the *_id_text columns.')
+    parser.add_argument('--form', default='13F-HR')
+    parser.add_argument('--metrics-jsonl', default=None,
+                        help='Append a JSON line of metrics after every stage.')
+    parser.add_argument('--metrics-prom', default=None,
+                        help='Prometheus text file rewritten after every stage.')
+    parser.add_argument('--profile', action='append', default=None, metavar='STAGE',
+                        help='Stage function to run under cProfile and tracemalloc.')
+    parser.add_argument('--profile-dir', default=None)
+    parser.add_argument('--dates-table', default='dates')
+    parser.add_argument('--filers-table', default='filers')
+    parser.add_argument('--info-table', default='file_info')
+    parser.add_argument('--holdings-table', default='holdings')
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error('--batch-size must be greater than zero')
+    
+    path = args.db or sql_path(args.yaml, api_key=args.api_key)
+    configure_fetch(rate=args.rate, max_workers=args.concurrency, user_agent=args.user_agent)
+    configure_parse(args.parse_workers)
+    configure_metrics(args.metrics_jsonl, args.metrics_prom,
+                      profile=args.profile, profile_dir=args.profile_dir)
+    if args.cache_dir is not None:
+        configure_cache(args.cache_dir)
+    if args.journal is not None:
+        args.journal = Journal(args.journal)
+    if args.ingest_index is not None:
+        configure_ingest_index(args.ingest_index)
+    if args.surrogate_keys:
+        configure_keys(surrogate=True, readable=not args.no_readable_keys)
+    
+    with sql_transaction(path) as connection:
+        if not connection.dialect.has_table(connection, args.dates_table):
+            _create_dates_table(connection, args.dates_table)
+    links = sql_dates(path, table=args.dates_table, year=args.year, 
+                      prior_years=args.prior_years, incremental=args.incremental,
+                      full_index=args.full_index) or []
+    
+    start_time = time.time()
+    filings = 0
+    try:
+        for n, link in enumerate(links, 1):
+            filings += _run_index_file(path, link, args)
+            print(f'Index file {n} of {len(links)} done, {filings} filings loaded, '
+                  f'{((time.time() - start_time)/60):.2f} minutes.')
+    finally:
+        dispose_engines()
+    return filings
+
+if __name__ == '__main__':
+    main()
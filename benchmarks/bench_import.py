@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Import time budget of SEC_13F.py, measured with python -X importtime.
+#
+# Each run imports the module in a fresh interpreter and reads its
+# cumulative import time; the fastest run is compared against --budget-ms.
+# It also checks that the heavy dependencies are still loaded lazily. Exits
+# with status 1 when either check fails, so it can gate CI, e.g.
+#   python benchmarks/bench_import.py --runs 7 --budget-ms 100
+
+import argparse, os, subprocess, sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY = ('pandas', 'sqlalchemy', 'lxml', 'requests', 'yaml', 'pymysql', 'multiprocessing')
+BUDGET_MS = 100.0
+
+def import_times(code='import SEC_13F'):
+    """Returns {module: (self_us, cumulative_us, depth)} for a fresh import."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(self_us), int(cumulative), depth)
+    return times
+
+def loaded_heavy():
+    """Returns the heavy dependencies imported by import SEC_13F."""
+    code = ('import sys, SEC_13F; '
+            f'print(",".join(m for m in {HEAVY!r} if m in sys.modules))')
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, '-c', code], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    # The last line is ours; anything before it was printed by the import
+    return [m for m in out.splitlines()[-1].split(',') if m] if out.strip() else []
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the import time of SEC_13F.py.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    parser.add_argument('--top', type=int, default=10,
+                        help='Slowest direct imports listed from the fastest run.')
+    args = parser.parse_args(argv)
+
+    runs = [import_times() for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times['SEC_13F'][1])
+    total_ms = best['SEC_13F'][1] / 1000
+    print(f'import SEC_13F: {total_ms:.1f} ms (best of {args.runs}), budget {args.budget_ms:.0f} ms')
+    # Modules imported directly by SEC_13F are listed just before it, one level deeper
+    names = list(best)
+    position = names.index('SEC_13F')
+    children = []
+    for name in reversed(names[:position]):
+        depth = best[name][2]
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((best[name][1], name))
+    for cumulative, name in sorted(children, reverse=True)[:args.top]:
+        print(f'{cumulative / 1000:10.1f} ms  {name}')
+
+    heavy = loaded_heavy()
+    failed = False
+    if heavy:
+        print('Loaded at import: ' + ', '.join(heavy))
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f'Over budget by {total_ms - args.budget_ms:.1f} ms')
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
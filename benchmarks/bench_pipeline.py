@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# End to end benchmark of the 13F pipeline against the local EDGAR stand-in
+# in edgar_stub.py, so runs are reproducible and never touch sec.gov.
+#
+# Reports wall time, CPU seconds, peak RSS, filings/min and rows/sec for
+# every stage, parse CPU seconds per MB of xml, and SQLite load throughput,
+# as JSON, along with the rate and concurrency the fetch controller settled
+# on. Latency and 429 responses can be injected to see how it holds up, e.g.
+#   python benchmarks/bench_pipeline.py --filings 500 --latency 50 \
+#       --error-rate 0.02 --concurrency 16 --rate 50 --output bench.json
+
+import argparse, json, os, resource, shutil, sys, tempfile, threading, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import SEC_13F
+from edgar_stub import EdgarStub, serve
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def rss_bytes():
+    """Returns the resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # ru_maxrss is the peak so far, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageTimer:
+    """Measures wall time, CPU time and peak RSS of one pipeline stage.
+
+    CPU time includes the parse processes, whose memory is not part of
+    the peak RSS reported.
+    """
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self):
+        self.peak = rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        self._cpu = self._cpu_seconds()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._start
+        self.cpu = self._cpu_seconds() - self._cpu
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+    @staticmethod
+    def _cpu_seconds():
+        usage = [resource.getrusage(who) for who in
+                 (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+        return sum(u.ru_utime + u.ru_stime for u in usage)
+
+def stage_result(timer, filings=None, rows=None, failed=None):
+    result = {'wall_s': round(timer.wall, 4),
+              'cpu_s': round(timer.cpu, 4),
+              'peak_rss_mb': round(timer.peak / 2**20, 1)}
+    if filings is not None:
+        result['filings'] = filings
+        result['filings_per_min'] = round(filings / timer.wall * 60, 1)
+    if rows is not None:
+        result['rows'] = rows
+        result['rows_per_sec'] = round(rows / timer.wall, 1)
+    if failed is not None:
+        result['failed'] = failed
+    return result
+
+def parse_cpu(stub, repeat=20):
+    """Returns CPU seconds per MB of xml for the primary doc and holdings parsers."""
+    result = {}
+    for name, parse, body in (('parse_primary_doc', SEC_13F.parse_primary_doc, stub.primary_doc(1000000)),
+                              ('parse_infotable', SEC_13F.parse_infotable, stub.response(
+                                  '/Archives/edgar/data/1000000/000095012321000000/infotable.xml')[2])):
+        start = time.process_time()
+        for _ in range(repeat):
+            parse(body)
+        elapsed = time.process_time() - start
+        result[name] = round(elapsed / (len(body) * repeat / 2**20), 4)
+    return result
+
+def run(args):
+    stub = EdgarStub(args.filings, args.holdings, args.days,
+                     latency=args.latency / 1000, error_rate=args.error_rate)
+    server, url = serve(stub)
+    SEC_13F.configure_fetch(rate=args.rate, max_workers=args.concurrency,
+                            user_agent='SEC_13F benchmark bench@example.com', base_url=url)
+    SEC_13F.configure_cache(None)
+    SEC_13F.configure_parse(args.parse_workers)
+    # Read before the finally block below puts parsing back in process
+    parse_workers = SEC_13F.PARSE_WORKERS
+
+    tmpdir = tempfile.mkdtemp()
+    journal = SEC_13F.Journal(os.path.join(tmpdir, 'journal.db'))
+    failed = lambda stage: len(journal.quarantined(stage))
+    stages = {}
+    try:
+        with StageTimer() as t:
+            links = SEC_13F.pull_link_list(2021)
+        stages['pull_link_list'] = stage_result(t, rows=len(links))
+
+        with StageTimer() as t:
+            idx = SEC_13F.parse_links(links, forms='13F-HR')
+            json_list = SEC_13F.xml_list(idx, '13F-HR')
+        stages['parse_links'] = stage_result(t, rows=len(idx))
+
+        with StageTimer() as t:
+            link_list, _no_hold = SEC_13F.xml_13f(json_list, journal=journal)
+        stages['xml_13f'] = stage_result(t, len(json_list), len(link_list), failed('xml_13f'))
+
+        with StageTimer() as t:
+            filers, info, header = SEC_13F.primary_docs_13f(link_list, journal=journal)
+        stages['primary_docs_13f'] = stage_result(t, len(link_list), len(info),
+                                                  failed('primary_docs_13f'))
+
+        with StageTimer() as t:
+            hold = SEC_13F.holdings_13f(link_list, header_df=header, journal=journal)
+        stages['holdings_13f'] = stage_result(t, len(link_list), len(hold), failed('holdings_13f'))
+
+        if not args.skip_submissions:
+            txt = SEC_13F.txt_list(idx, '13F-HR')
+            with StageTimer() as t:
+                sub_hold = SEC_13F.submissions_13f(txt, journal=journal)[2]
+            stages['submissions_13f'] = stage_result(t, len(txt), len(sub_hold),
+                                                     failed('submissions_13f'))
+
+        path = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+        with StageTimer() as t:
+            SEC_13F.sql_13f(path, 'filers', filers, id_col='CIK')
+            SEC_13F.sql_13f(path, 'file_info', info, id_col='file_id')
+            SEC_13F.sql_13f(path, 'holdings', hold, id_col='hold_id')
+        stages['sql_13f'] = stage_result(t, rows=len(filers) + len(info) + len(hold))
+        fetch = SEC_13F.fetch_stats()
+    finally:
+        journal.close()
+        SEC_13F.dispose_engines()
+        SEC_13F.configure_parse(0)
+        server.shutdown()
+        shutil.rmtree(tmpdir)
+
+    return {'config': {'filings': args.filings, 'holdings': args.holdings, 'days': args.days,
+                       'latency_ms': args.latency, 'error_rate': args.error_rate,
+                       'rate': args.rate, 'concurrency': args.concurrency,
+                       'parse_workers': parse_workers},
+            'requests': stub.requests,
+            'throttled': stub.throttled,
+            'fetch': fetch,
+            'stages': stages,
+            'parse_cpu_s_per_mb': parse_cpu(stub)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the 13F pipeline against a local EDGAR stand-in.')
+    parser.add_argument('--filings', type=int, default=200)
+    parser.add_argument('--holdings', type=int, default=500, help='Holdings per filing.')
+    parser.add_argument('--days', type=int, default=5, help='Daily index files.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Milliseconds added per response.')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of filing document requests answered with 429.')
+    parser.add_argument('--rate', type=float, default=1000.0, help='Requests per second.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--parse-workers', type=int, default=None)
+    parser.add_argument('--skip-submissions', action='store_true',
+                        help='Leave out the submissions_13f() stage.')
+    parser.add_argument('--output', default=None, help='Write the JSON report to a file.')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    print(text)
+
+if __name__ == '__main__':
+    main()
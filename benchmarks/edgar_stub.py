@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Local stand-in for the parts of EDGAR that SEC_13F.py reads.
+#
+# Serves daily-index listings, master index files, filing index.json
+# directories, primary docs, information tables and complete submission
+# .txt files generated from the recorded documents in fixtures/. Filing n
+# is the fixture filing with CIK 1000000 + n and holdings repeated up to
+# --holdings rows. Latency and 429 responses can be injected, e.g.
+#   python benchmarks/edgar_stub.py --port 8000 --filings 500 --latency 50
+# then point the client at it with
+#   SEC_13F.configure_fetch(base_url='http://127.0.0.1:8000')
+
+import argparse, json, os, random, re, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+ACCEPTED = '2021-02-16 16:05:12'
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as file:
+        return file.read()
+
+class EdgarStub:
+    """Generates EDGAR responses for a synthetic set of 13F-HR filings.
+
+    Args:
+        filings (int): Number of 13F-HR filings listed.
+        holdings (int): Holdings in each information table.
+        days (int): Daily index files the filings are spread over.
+        other_forms (int): Non 13F rows listed per 13F-HR row, as in the
+            real indexes where 13F-HR is about 1% of the lines.
+        latency (float): Seconds added to every response.
+        error_rate (float): Share of filing document requests answered
+            with 429 Too Many Requests.
+        year (int): Year of the daily index.
+    
+    Paths added to the missing set are answered with 404 Not Found, to
+    break single documents.
+    """
+    def __init__(self, filings=200, holdings=500, days=5, other_forms=20,
+                 latency=0.0, error_rate=0.0, year=2021, seed=13):
+        self.filings = filings
+        self.holdings = holdings
+        self.days = [f'{year}02{d + 1:02d}' for d in range(days)]
+        self.other_forms = other_forms
+        self.latency = latency
+        self.error_rate = error_rate
+        self.year = year
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.throttled = 0
+        self.missing = set()
+        self._lock = threading.Lock()
+        self._primary_doc = _fixture('primary_doc.xml')
+        self._header = _fixture('master.idx').split(b'CIK|')[0]
+        infotable = _fixture('infotable.xml')
+        entries = re.findall(rb'<(?:\w+:)?infoTable>.*?</(?:\w+:)?infoTable>', infotable, re.S)
+        rows = []
+        for i in range(holdings):
+            entry = entries[i % len(entries)]
+            # Unique CUSIPs keep every holding's hold_id distinct
+            rows.append(re.sub(rb'(<(?:\w+:)?cusip>)[^<]*', b'\\g<1>%09d' % i, entry))
+        start = infotable.index(entries[0])
+        end = infotable.rindex(entries[-1]) + len(entries[-1])
+        self._infotable = infotable[:start] + b'\n  '.join(rows) + infotable[end:]
+
+    def accession(self, n):
+        """Returns the CIK and dashed accession number of filing n."""
+        return 1000000 + n, f'0000950123-21-{n:06d}'
+
+    def master_index(self, day):
+        """Returns the master index file for one of the days."""
+        lines = [self._header, b'CIK|Company Name|Form Type|Date Filed|File Name\n',
+                 b'-' * 80 + b'\n']
+        for n in range(self.days.index(day), self.filings, len(self.days)):
+            cik, acc = self.accession(n)
+            lines.append(f'{cik}|FILER {n}|13F-HR|{day}|edgar/data/{cik}/{acc}.txt\n'.encode())
+            for k in range(self.other_forms):
+                lines.append(f'{cik}|FILER {n}|8-K|{day}|edgar/data/{cik}/{acc}-{k}.txt\n'.encode())
+        return b''.join(lines)
+
+    def primary_doc(self, cik):
+        return self._primary_doc.replace(b'<cik>0001067983</cik>', b'<cik>%010d</cik>' % cik)
+
+    def submission(self, cik, acc):
+        return b''.join([
+            f'<SEC-DOCUMENT>{acc}.txt : 20210216\n<SEC-HEADER>{acc}.hdr.sgml : 20210216\n'.encode(),
+            b'<ACCEPTANCE-DATETIME>20210216160512\n</SEC-HEADER>\n',
+            b'<DOCUMENT>\n<TYPE>13F-HR\n<SEQUENCE>1\n<FILENAME>primary_doc.xml\n<TEXT>\n<XML>\n',
+            self.primary_doc(cik), b'\n</XML>\n</TEXT>\n</DOCUMENT>\n',
+            b'<DOCUMENT>\n<TYPE>INFORMATION TABLE\n<SEQUENCE>2\n<FILENAME>infotable.xml\n',
+            b'<TEXT>\n<XML>\n', self._infotable, b'\n</XML>\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>\n'])
+
+    def document(self, n, name):
+        """Returns the request path of a document of filing n, e.g. primary_doc.xml."""
+        cik, acc = self.accession(n)
+        return f'/Archives/edgar/data/{cik}/{acc.replace("-", "")}/{name}'
+
+    def response(self, path):
+        """Returns (status, headers, body) for a request path."""
+        if path in self.missing:
+            return 404, {}, b'Not Found'
+        listing = lambda names, base: json.dumps({'directory': {
+            'name': base, 'item': [{'name': n, 'last-modified': ACCEPTED} for n in names]}}).encode()
+        daily = f'/Archives/edgar/daily-index/{self.year}'
+        if path == daily + '/index.json':
+            return 200, {}, listing(['QTR1'], daily)
+        if path == daily + '/QTR1/index.json':
+            return 200, {}, listing([f'master.{d}.idx' for d in self.days], daily + '/QTR1')
+        match = re.fullmatch(daily + r'/QTR1/master\.(\d{8})\.idx', path)
+        if match and match.group(1) in self.days:
+            return 200, {}, self.master_index(match.group(1))
+
+        match = re.fullmatch(r'/Archives/edgar/data/(\d+)/(\d{18}|[\d-]{20}\.txt)(/[\w.]+)?', path)
+        if match is None:
+            return 404, {}, b'Not Found'
+        if self.error_rate and self.random.random() < self.error_rate:
+            with self._lock:
+                self.throttled += 1
+            return 429, {'Retry-After': '1'}, b'Too Many Requests'
+        cik = int(match.group(1))
+        if match.group(2).endswith('.txt'):
+            return 200, {}, self.submission(cik, match.group(2)[:-4])
+        base = f'/Archives/edgar/data/{cik}/{match.group(2)}'
+        doc = match.group(3)
+        if doc == '/index.json':
+            return 200, {}, listing([f'{match.group(2)}.txt', 'infotable.xml', 'primary_doc.xml'], base)
+        if doc == '/primary_doc.xml':
+            return 200, {}, self.primary_doc(cik)
+        if doc == '/infotable.xml':
+            return 200, {}, self._infotable
+        return 404, {}, b'Not Found'
+
+def serve(stub, host='127.0.0.1', port=0):
+    """Starts a threaded HTTP server for a stub; returns the server and its url."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            with stub._lock:
+                stub.requests += 1
+            if stub.latency:
+                time.sleep(stub.latency)
+            status, headers, body = stub.response(self.path)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for EDGAR.')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--filings', type=int, default=200)
+    parser.add_argument('--holdings', type=int, default=500)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help='Milliseconds per response.')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of filing document requests answered with 429.')
+    args = parser.parse_args(argv)
+    stub = EdgarStub(args.filings, args.holdings, args.days,
+                     latency=args.latency / 1000, error_rate=args.error_rate)
+    server, url = serve(stub, port=args.port)
+    print(f'Serving {args.filings} filings at {url}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
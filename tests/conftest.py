@@ -0,0 +1,66 @@
+# coding: utf-8
+
+# Shared fixtures. Tests run offline: EDGAR is the edgar_stub stand-in used
+# by the benchmarks and databases are throwaway SQLite files.
+
+import os, sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+
+import SEC_13F
+from edgar_stub import EdgarStub, serve
+
+@pytest.fixture
+def db(tmp_path):
+    """Connection string of a throwaway SQLite database."""
+    yield 'sqlite:///' + str(tmp_path / 'test.db')
+    SEC_13F.dispose_engines()
+
+@pytest.fixture
+def edgar(monkeypatch):
+    """Serves a small EdgarStub and points fetch() at it.
+
+    Fetch, parse, cache, ingest index and key settings are put back when
+    the test ends.
+    """
+    for name in ('_controller', 'FETCH_WORKERS', 'FETCH_RETRIES', 'USER_AGENT',
+                 'SEC_URL', 'BACKOFF_BASE', 'PARSE_WORKERS', '_cache',
+                 'SURROGATE_KEYS', 'READABLE_KEYS'):
+        monkeypatch.setattr(SEC_13F, name, getattr(SEC_13F, name))
+    stub = EdgarStub(filings=6, holdings=10, days=2)
+    server, url = serve(stub)
+    SEC_13F.configure_fetch(rate=1000, max_workers=4, retries=0, base_url=url,
+                            user_agent='SEC_13F tests test@example.com')
+    SEC_13F.configure_parse(0)
+    SEC_13F.BACKOFF_BASE = 0.01
+    yield stub
+    SEC_13F.configure_ingest_index(None)
+    SEC_13F.configure_cache(None)
+    server.shutdown()
+    server.server_close()
+    with SEC_13F._session_lock:
+        SEC_13F._session = None
+
+@pytest.fixture
+def filings(edgar):
+    """The index.json links of the 13F-HR filings served by the stub."""
+    idx = SEC_13F.parse_links(SEC_13F.pull_link_list(2021), forms='13F-HR')
+    return SEC_13F.xml_list(idx, '13F-HR')
+
+@pytest.fixture
+def run(edgar, db, tmp_path, monkeypatch):
+    """Runs python -m SEC_13F against the stub; returns the paths it requested."""
+    response = edgar.response
+    requested = []
+    monkeypatch.setattr(edgar, 'response', lambda path: requested.append(path) or response(path))
+
+    def run(*extra):
+        del requested[:]
+        args = ['--db', db, '--year', '2021', '--parse-workers', '0', '--batch-size', '4',
+                '--journal', str(tmp_path / 'journal.db')] + list(extra)
+        SEC_13F.main(args)
+        return list(requested)
+    return run
@@ -0,0 +1,67 @@
+# coding: utf-8
+
+# fixtures/form13f.zip is the Form 13F data set rendering of the recorded
+# filing in benchmarks/fixtures (Berkshire Hathaway, 2020 Q4, 3 holdings)
+# plus one 13F-NT notice that the 13F-HR readers leave out.
+
+import datetime, os, zipfile
+
+import pandas as pd
+import pytest
+
+import SEC_13F
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RECORDED = os.path.join(os.path.dirname(FIXTURES), '..', 'benchmarks', 'fixtures')
+ZIP = os.path.join(FIXTURES, 'form13f.zip')
+FILED = datetime.datetime(2021, 2, 16)
+
+def recorded(name):
+    with open(os.path.join(RECORDED, name), 'rb') as file:
+        return file.read()
+
+def test_bulk_13f_matches_primary_doc():
+    doc = SEC_13F.parse_primary_doc(recorded('primary_doc.xml'))
+    filer_buf, info_buf = SEC_13F.ColumnBuffer(), SEC_13F.ColumnBuffer()
+    filer_buf.append(SEC_13F._filer_row(doc))
+    info_buf.append(SEC_13F._file_info_row(doc, FILED))
+
+    filers_df, info_df = SEC_13F.bulk_13f(ZIP)
+    pd.testing.assert_frame_equal(filers_df, SEC_13F._filers_frame(filer_buf))
+    pd.testing.assert_frame_equal(info_df, SEC_13F._file_info_frame(info_buf))
+    assert info_df.file_id.tolist() == ['000106798302804545' + '2020-12-31'.replace('-', '')]
+
+def test_bulk_holdings_13f_matches_information_table():
+    doc = SEC_13F.parse_primary_doc(recorded('primary_doc.xml'))
+    hold_cols = SEC_13F.parse_infotable(recorded('infotable.xml'))
+    header_buf = SEC_13F.ColumnBuffer()
+    header_buf.broadcast(SEC_13F._hold_header_row(doc, FILED), len(hold_cols['CUSIP']))
+    expected = SEC_13F._holdings_frame(header_buf, hold_cols)
+
+    hold_df = pd.concat(SEC_13F.bulk_holdings_13f(ZIP, chunksize=2), ignore_index=True)
+    assert len(hold_df) == 3
+    pd.testing.assert_frame_equal(hold_df[expected.columns], expected)
+    assert hold_df.put_call.isna().tolist() == [False, True, True]
+
+def test_bulk_reads_other_forms_on_request():
+    _filers_df, info_df = SEC_13F.bulk_13f(ZIP, form=['13F-HR', '13F-NT'])
+    assert sorted(info_df.form) == ['13F-HR', '13F-NT']
+
+def test_missing_coverpage_is_reported(tmp_path):
+    broken = tmp_path / 'broken.zip'
+    with zipfile.ZipFile(ZIP) as source, zipfile.ZipFile(broken, 'w') as target:
+        for name in source.namelist():
+            if name != 'COVERPAGE.tsv':
+                target.writestr(name, source.read(name))
+    with pytest.raises(ValueError, match='COVERPAGE'):
+        SEC_13F.bulk_13f(str(broken))
+    with pytest.raises(ValueError, match='COVERPAGE'):
+        list(SEC_13F.bulk_holdings_13f(str(broken)))
+
+def test_sql_bulk_13f_loads_once(db):
+    for _ in range(2):
+        SEC_13F.sql_bulk_13f(db, ZIP, 'filers', 'file_info', 'holdings')
+    with SEC_13F.sql_transaction(db) as connection:
+        counts = [connection.exec_driver_sql(f'SELECT COUNT(*) FROM {table}').scalar()
+                  for table in ('filers', 'file_info', 'holdings')]
+    assert counts == [1, 1, 3]
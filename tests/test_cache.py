@@ -0,0 +1,120 @@
+# coding: utf-8
+
+import math, time
+
+import pytest
+import requests
+
+import SEC_13F
+
+LISTING = '/Archives/edgar/daily-index/2021/index.json'
+
+def record(edgar, monkeypatch, reply=None):
+    """Records the paths requested from the stub, answering with reply if given."""
+    response = edgar.response
+    requested = []
+    def respond(path):
+        requested.append(path)
+        return reply(path) if reply is not None else response(path)
+    monkeypatch.setattr(edgar, 'response', respond)
+    return requested
+
+def test_filing_documents_are_served_from_disk(edgar, monkeypatch, tmp_path):
+    cache = SEC_13F.configure_cache(str(tmp_path / 'cache'))
+    url = SEC_13F.SEC_URL + edgar.document(0, 'infotable.xml')
+    body = SEC_13F.fetch(url)
+    requested = record(edgar, monkeypatch)
+    assert SEC_13F.fetch(url) == body
+    assert requested == []
+    assert (cache.stats['hits'], cache.stats['misses']) == (1, 1)
+
+def test_cache_survives_a_restart(edgar, monkeypatch, tmp_path):
+    SEC_13F.configure_cache(str(tmp_path / 'cache'))
+    url = SEC_13F.SEC_URL + edgar.document(1, 'primary_doc.xml')
+    body = SEC_13F.fetch(url)
+    cache = SEC_13F.configure_cache(str(tmp_path / 'cache'))
+    requested = record(edgar, monkeypatch)
+    assert SEC_13F.fetch(url) == body
+    assert requested == [] and cache.stats['hits'] == 1
+
+def test_listings_are_reused_while_younger_than_max_age(edgar, monkeypatch, tmp_path):
+    SEC_13F.configure_cache(str(tmp_path / 'cache'))
+    url = SEC_13F.SEC_URL + LISTING
+    body = SEC_13F.fetch(url)
+    requested = record(edgar, monkeypatch)
+    assert SEC_13F.fetch(url, max_age=60) == body
+    assert SEC_13F.fetch(url, max_age=math.inf) == body
+    assert requested == []
+    assert SEC_13F.fetch(url) == body
+    assert requested == [LISTING]
+
+def test_stale_listing_is_revalidated(edgar, monkeypatch, tmp_path):
+    cache = SEC_13F.configure_cache(str(tmp_path / 'cache'))
+    url = SEC_13F.SEC_URL + LISTING
+    status, headers, body = edgar.response(LISTING)
+    record(edgar, monkeypatch, lambda path: (status, dict(headers, ETag='"v1"'), body))
+    SEC_13F.fetch(url)
+    fetched = cache.lookup(url)[3]
+
+    session = SEC_13F._get_session()
+    get = session.get
+    sent = []
+    monkeypatch.setattr(session, 'get', lambda url, headers, **kw: sent.append(headers)
+                        or get(url, headers=headers, **kw))
+    record(edgar, monkeypatch, lambda path: (304, {}, b''))
+    time.sleep(0.01)
+    assert SEC_13F.fetch(url, max_age=0) == body
+    assert sent == [{'If-None-Match': '"v1"'}]
+    assert cache.stats['revalidated'] == 1
+    # A 304 restarts the max_age clock
+    assert cache.lookup(url)[3] > fetched
+
+def test_changed_listing_replaces_the_cached_body(edgar, monkeypatch, tmp_path):
+    cache = SEC_13F.configure_cache(str(tmp_path / 'cache'))
+    url = SEC_13F.SEC_URL + LISTING
+    SEC_13F.fetch(url)
+    record(edgar, monkeypatch, lambda path: (200, {}, b'{"directory": {"item": []}}'))
+    assert SEC_13F.fetch(url) == b'{"directory": {"item": []}}'
+    assert cache.lookup(url)[0] == b'{"directory": {"item": []}}'
+
+def test_error_responses_are_not_cached(edgar, tmp_path):
+    cache = SEC_13F.configure_cache(str(tmp_path / 'cache'))
+    path = edgar.document(2, 'infotable.xml')
+    edgar.missing.add(path)
+    with pytest.raises(requests.HTTPError):
+        SEC_13F.fetch(SEC_13F.SEC_URL + path)
+    assert cache.lookup(SEC_13F.SEC_URL + path) is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SEC_13F.ResponseCache(str(tmp_path / 'cache'), max_bytes=25)
+    for name in 'abc':
+        cache.store(name, name.encode() * 10)
+        time.sleep(0.01)
+    # Storing c pushed the size to 30 bytes and evicted a
+    assert cache.lookup('a') is None
+    cache.touch('b')
+    cache.store('d', b'd' * 10)
+    assert [cache.lookup(name) is not None for name in 'abcd'] == [False, True, False, True]
+    assert cache.info()['bytes'] == 20 and cache.stats['evicted'] == 2
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    cache = SEC_13F.ResponseCache(str(tmp_path / 'cache'), max_bytes=25)
+    cache.store('a', b'x' * 10)
+    cache.store('b', b'x' * 10)
+    cache.store('c', b'y' * 10)
+    # a is evicted but its body is still shared with b
+    assert cache.lookup('a') is None
+    assert cache.lookup('b')[0] == b'x' * 10
+
+def test_eviction_pages_through_the_oldest_entries(tmp_path):
+    cache = SEC_13F.ResponseCache(str(tmp_path / 'cache'), max_bytes=10**6)
+    for n in range(200):
+        cache.store(str(n), b'%03d' % n * 10)
+    cache.max_bytes = 600
+    cache._evict()
+    assert cache.info()['entries'] == 20
+    assert cache.lookup('0') is None and cache.lookup('199') is not None
+    for query in ('SELECT url FROM responses ORDER BY accessed LIMIT 64',
+                  "SELECT 1 FROM responses WHERE digest = 'x' LIMIT 1"):
+        plan = str(cache._db.execute('EXPLAIN QUERY PLAN ' + query).fetchall())
+        assert 'USING INDEX' in plan or 'USING COVERING INDEX' in plan
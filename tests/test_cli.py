@@ -0,0 +1,32 @@
+# coding: utf-8
+
+import SEC_13F
+
+def count(db, table):
+    with SEC_13F.sql_transaction(db) as connection:
+        return connection.exec_driver_sql(f'SELECT COUNT(*) FROM {table}').scalar()
+
+def test_loads_every_filing(run, db):
+    run()
+    assert (count(db, 'file_info'), count(db, 'holdings'), count(db, 'dates')) == (6, 60, 2)
+
+def test_up_to_date_run_only_lists(run, db):
+    run()
+    requested = run()
+    assert all('/daily-index/' in path for path in requested)
+    assert count(db, 'file_info') == 6
+
+def test_index_file_with_quarantined_filing_is_retried(run, edgar, db):
+    broken = edgar.document(3, 'primary_doc.xml')
+    edgar.missing.add(broken)
+    run()
+    assert count(db, 'file_info') == 5
+    # Filing 3 is listed in the second daily file, which stays unrecorded
+    assert count(db, 'dates') == 1
+
+    edgar.missing.clear()
+    requested = run()
+    assert broken in requested
+    assert count(db, 'file_info') == 6
+    assert count(db, 'holdings') == 60
+    assert count(db, 'dates') == 2
@@ -0,0 +1,63 @@
+# coding: utf-8
+
+import datetime
+
+import pytest
+
+import SEC_13F
+
+DAILY = 'https://www.sec.gov/Archives/edgar/daily-index/2020/QTR4/master.20201231.idx'
+QUARTER = 'https://www.sec.gov/Archives/edgar/full-index/2020/QTR4/master.gz'
+
+def dates(path, table='dates'):
+    with SEC_13F.sql_transaction(path) as connection:
+        return sorted(connection.exec_driver_sql(f'SELECT Link, Date FROM {table}').fetchall())
+
+@pytest.mark.parametrize('created', ['sql_idx_dates', '_create_dates_table'])
+def test_quarter_end_day_keeps_daily_and_quarterly_file(db, created):
+    if created == '_create_dates_table':
+        with SEC_13F.sql_transaction(db) as connection:
+            SEC_13F._create_dates_table(connection, 'dates')
+    SEC_13F.sql_idx_dates(db, 'dates', [DAILY])
+    SEC_13F.sql_idx_dates(db, 'dates', [QUARTER])
+    rows = dates(db)
+    assert [link for link, _date in rows] == [DAILY, QUARTER]
+    assert {str(date)[:19] for _link, date in rows} == {'2020-12-31 00:00:00',
+                                                        '2020-12-31 23:59:59'}
+
+def test_processed_quarter_end_files_are_not_listed_again(db, monkeypatch):
+    with SEC_13F.sql_transaction(db) as connection:
+        SEC_13F._create_dates_table(connection, 'dates')
+    SEC_13F.sql_idx_dates(db, 'dates', [DAILY, QUARTER])
+    monkeypatch.setattr(SEC_13F, 'pull_link_list', lambda **kwargs: [QUARTER, DAILY])
+    assert SEC_13F.sql_dates(db, table='dates', year=2020) is None
+
+def test_link_date_of_quarterly_file():
+    assert SEC_13F._link_date(QUARTER) == datetime.date(2020, 12, 31)
+
+def test_incremental_run_lists_only_from_the_watermark(run, edgar, db):
+    run('--incremental')
+    assert [link.rsplit('/', 1)[1] for link, _date in dates(db)] == [
+        'master.20210201.idx', 'master.20210202.idx']
+
+    # A new daily file is posted. With --prior-years 1 a full run would list
+    # 2020 too, which the stub does not serve; the watermark skips that year.
+    edgar.days.append('20210203')
+    requested = run('--incremental', '--prior-years', '1')
+    assert not [path for path in requested if '/2020/' in path]
+    assert [path for path in requested if '/daily-index/' in path] == [
+        '/Archives/edgar/daily-index/2021/index.json',
+        '/Archives/edgar/daily-index/2021/QTR1/index.json',
+        '/Archives/edgar/daily-index/2021/QTR1/master.20210203.idx']
+    assert len(dates(db)) == 3
+
+def test_watermark_is_the_latest_processed_date(db, monkeypatch):
+    with SEC_13F.sql_transaction(db) as connection:
+        SEC_13F._create_dates_table(connection, 'dates')
+    SEC_13F.sql_idx_dates(db, 'dates', [DAILY.replace('20201231', '20201230'), DAILY])
+    calls = []
+    monkeypatch.setattr(SEC_13F, 'pull_link_list',
+                        lambda **kwargs: calls.append(kwargs['since']) or [DAILY])
+    assert SEC_13F.sql_dates(db, table='dates', year=2020, incremental=True) is None
+    assert SEC_13F.sql_dates(db, table='dates', year=2020) is None
+    assert calls == [datetime.date(2020, 12, 31), None]
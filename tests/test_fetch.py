@@ -0,0 +1,121 @@
+# coding: utf-8
+
+import socket
+
+import pytest
+import requests
+
+import SEC_13F
+
+class FakeClock:
+    """Stands in for the time module; sleep() only moves the clock."""
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(SEC_13F, 'time', clock)
+    return clock
+
+def test_token_bucket_holds_the_rate(clock):
+    bucket = SEC_13F.TokenBucket(rate=10)
+    for _ in range(21):
+        bucket.acquire()
+    # The first token is there from the start, the other 20 take 0.1s each
+    assert clock.now - 100 == pytest.approx(2.0)
+    assert max(clock.slept) == pytest.approx(0.1)
+
+def test_token_bucket_allows_a_burst_up_to_capacity(clock):
+    bucket = SEC_13F.TokenBucket(rate=10, capacity=5)
+    for _ in range(5):
+        bucket.acquire()
+    clock.now += 60
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.slept == []
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.1)]
+
+def test_token_bucket_rate_change_applies_to_later_tokens(clock):
+    bucket = SEC_13F.TokenBucket(rate=10)
+    bucket.acquire()
+    clock.now += 0.05
+    bucket.set_rate(1)
+    bucket.acquire()
+    # Half a token accrued at 10/s, the other half takes 0.5s at 1/s
+    assert clock.slept == [pytest.approx(0.5)]
+    with pytest.raises(ValueError):
+        SEC_13F.TokenBucket(rate=0)
+
+def step(controller, count, **outcome):
+    for _ in range(count):
+        controller.release(controller.acquire(), **outcome)
+
+def test_successes_raise_rate_and_concurrency():
+    controller = SEC_13F.RateController(rate=1000, max_workers=8)
+    controller.bucket.set_rate(500)
+    step(controller, 2)
+    assert (controller.limit, controller.bucket.rate) == (3, 600)
+
+def test_throttle_halves_rate_and_concurrency():
+    controller = SEC_13F.RateController(rate=1000, max_workers=8)
+    controller.bucket.set_rate(500)
+    step(controller, 2 + 3)
+    assert (controller.limit, controller.bucket.rate) == (4, 700)
+    step(controller, 1, throttled=True)
+    assert (controller.limit, controller.bucket.rate) == (2, 350)
+
+def test_errors_are_neutral():
+    controller = SEC_13F.RateController(rate=1000, max_workers=8)
+    controller.bucket.set_rate(500)
+    step(controller, 10, ok=False)
+    assert (controller.limit, controller.bucket.rate) == (2, 500)
+    assert controller.info()['requests'] == 10
+
+def test_server_errors_are_retried_without_speeding_up(edgar, monkeypatch):
+    statuses = [500, 502, 504]
+    response = edgar.response
+    monkeypatch.setattr(edgar, 'response', lambda path: (statuses.pop(0), {}, b'Error')
+                        if statuses else response(path))
+    SEC_13F.configure_fetch(retries=3)
+    controller = SEC_13F._controller
+    before = (controller.limit, controller.bucket.rate)
+    body = SEC_13F.fetch(SEC_13F.SEC_URL + edgar.document(0, 'primary_doc.xml'))
+    assert body.startswith(b'<?xml')
+    assert controller.info()['retries'] == 3
+    # Only the final 200 counts towards an increase, and one is not a window
+    assert (controller.limit, controller.bucket.rate) == before
+
+def test_throttled_request_is_retried(edgar, monkeypatch):
+    statuses = [429]
+    response = edgar.response
+    monkeypatch.setattr(edgar, 'response', lambda path: (statuses.pop(0), {}, b'Slow down')
+                        if statuses else response(path))
+    SEC_13F.configure_fetch(retries=1)
+    assert SEC_13F.fetch(SEC_13F.SEC_URL + edgar.document(0, 'infotable.xml'))
+    assert SEC_13F.fetch_stats()['throttled'] == 1
+
+def test_final_error_status_is_raised(edgar):
+    edgar.missing.add(edgar.document(0, 'primary_doc.xml'))
+    with pytest.raises(requests.HTTPError):
+        SEC_13F.fetch(SEC_13F.SEC_URL + edgar.document(0, 'primary_doc.xml'))
+
+def test_connection_errors_are_neutral(edgar):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    SEC_13F.configure_fetch(retries=4, base_url=f'http://127.0.0.1:{port}')
+    controller = SEC_13F._controller
+    with pytest.raises(requests.ConnectionError):
+        SEC_13F.fetch(SEC_13F.SEC_URL + '/Archives/edgar/daily-index/2021/index.json')
+    assert controller.info()['requests'] == 5
+    assert controller.limit == 2
@@ -0,0 +1,18 @@
+# coding: utf-8
+
+import bench_import
+import SEC_13F
+
+def test_heavy_dependencies_load_lazily():
+    # Imports SEC_13F in a fresh interpreter and lists what it loaded
+    assert bench_import.loaded_heavy() == []
+
+def test_import_time_within_budget():
+    best_ms = min(bench_import.import_times()['SEC_13F'][1] for _ in range(5)) / 1000
+    assert best_ms <= bench_import.BUDGET_MS
+
+def test_lazy_module_loads_on_first_use():
+    lazy = SEC_13F._LazyModule('colorsys')
+    assert 'not loaded' in repr(lazy)
+    assert lazy.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1.0)
+    assert "'colorsys' (loaded)" in repr(lazy)
@@ -0,0 +1,74 @@
+# coding: utf-8
+
+import gzip, os
+
+import pandas as pd
+import pytest
+
+import SEC_13F
+
+RECORDED = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'fixtures')
+LINK = 'https://www.sec.gov/Archives/edgar/daily-index/2021/QTR1/master.20210216.idx'
+
+with open(os.path.join(RECORDED, 'master.idx'), 'rb') as file:
+    MASTER = file.read()
+# A 13F-HR/A line must not be taken for a 13F-HR
+AMENDED = MASTER + b'1067983|BERKSHIRE HATHAWAY INC|13F-HR/A|20210216|' \
+                   b'edgar/data/1067983/0000950123-21-002800.txt\n'
+
+def assert_index_dtypes(df):
+    assert df.CIK_int.dtype == 'int32'
+    assert isinstance(df.form_type.dtype, pd.CategoricalDtype)
+    assert df.date_filed.dtype.kind == 'M'
+
+def test_all_forms():
+    df = SEC_13F._index_frame(AMENDED, LINK)
+    assert list(df.columns) == SEC_13F.INDEX_COLUMNS + ['link']
+    assert_index_dtypes(df)
+    assert df.form_type.tolist() == ['13F-HR', 'SC 13G', '8-K', '13F-HR/A']
+    assert df.CIK_int.tolist() == [1067983, 1067983, 320193, 1067983]
+    assert df.link[0] == SEC_13F.SEC_URL + \
+        '/Archives/edgar/data/1067983/000095012321002786/index.json'
+
+@pytest.mark.parametrize('content', [AMENDED, AMENDED.replace(b'\n', b'\r\n')],
+                         ids=['lf', 'crlf'])
+def test_form_filter(content):
+    df = SEC_13F._index_frame(content, LINK, ['13F-HR'])
+    assert_index_dtypes(df)
+    assert list(df.form_type.cat.categories) == ['13F-HR']
+    assert df.file_name.tolist() == ['edgar/data/1067983/0000950123-21-002786.txt']
+    # Filtering first gives the same rows as parsing everything
+    expected = SEC_13F._index_frame(content, LINK)
+    expected = expected[expected.form_type == '13F-HR'].reset_index(drop=True)
+    expected['form_type'] = expected.form_type.astype(df.form_type.dtype)
+    pd.testing.assert_frame_equal(df, expected)
+
+def test_form_filter_without_matches():
+    df = SEC_13F._index_frame(MASTER, LINK, ['13F-NT', '13F-HR/A'])
+    assert df.empty and list(df.columns) == SEC_13F.INDEX_COLUMNS + ['link']
+    assert_index_dtypes(df)
+    assert list(df.form_type.cat.categories) == ['13F-NT', '13F-HR/A']
+
+def test_compressed_quarterly_index():
+    df = SEC_13F._index_frame(gzip.compress(MASTER), LINK[:-13] + 'master.gz', ['8-K'])
+    assert df.CIK_int.tolist() == [320193]
+    assert_index_dtypes(df)
+
+def test_iter_links(edgar):
+    dates = SEC_13F.pull_link_list(2021)
+    frames = list(SEC_13F.iter_links(dates, forms='13F-HR'))
+    # The stub lists 20 8-K lines next to each 13F-HR
+    assert [len(df) for df in frames] == [3, 3]
+    for df, day in zip(frames, edgar.days):
+        assert_index_dtypes(df)
+        assert set(df.form_type) == {'13F-HR'}
+        assert df.date_filed.dt.strftime('%Y%m%d').tolist() == [day] * 3
+    assert [len(df) for df in SEC_13F.iter_links(dates)] == [63, 63]
+    with pytest.raises(TypeError):
+        next(SEC_13F.iter_links(tuple(dates)))
+
+@pytest.mark.parametrize('forms', [None, '13F-HR'])
+def test_parse_links_keeps_the_dtypes(edgar, forms):
+    idx = SEC_13F.parse_links(SEC_13F.pull_link_list(2021), forms=forms)
+    assert_index_dtypes(idx)
+    assert len(idx) == (126 if forms is None else 6)
@@ -0,0 +1,55 @@
+# coding: utf-8
+
+import os, re
+
+import SEC_13F
+
+RECORDED = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'fixtures')
+
+with open(os.path.join(RECORDED, 'infotable.xml'), 'rb') as file:
+    NAMESPACED = file.read()
+UNPREFIXED = NAMESPACED.replace(b'ns1:', b'').replace(b'xmlns:ns1=', b'xmlns=')
+PLAIN = re.sub(rb' xmlns:ns1="[^"]*"', b'', NAMESPACED).replace(b'ns1:', b'')
+
+def test_fixture_columns():
+    cols = SEC_13F.parse_infotable(NAMESPACED)
+    assert list(cols) == SEC_13F.HOLD_COLUMNS
+    assert cols['CUSIP'] == ['00287Y109', '023135106', '037833100']
+    assert cols['name'][2] == 'APPLE INC'
+    assert cols['shares'] == ['21134042', '533300', '887135554']
+    assert (cols['va_sole'][1], cols['va_shared'][1], cols['va_none'][1]) == ('533300', '0', '0')
+    # Optional tags stay None on the holdings that leave them out
+    assert cols['put_call'] == ['Put', None, None]
+    assert cols['othmgrdisc'] == ['4', '4,8,11', None]
+
+def test_namespaces_do_not_matter():
+    expected = SEC_13F.parse_infotable(NAMESPACED)
+    assert SEC_13F.parse_infotable(UNPREFIXED) == expected
+    assert SEC_13F.parse_infotable(PLAIN) == expected
+
+def test_missing_optional_tags():
+    content = re.sub(rb'\s*<ns1:(putCall|otherManager)>[^<]*</ns1:\1>', b'', NAMESPACED)
+    cols = SEC_13F.parse_infotable(content)
+    assert cols['put_call'] == [None] * 3
+    assert cols['othmgrdisc'] == [None] * 3
+    header_buf = SEC_13F.ColumnBuffer()
+    header_buf.broadcast({'CIK': '0001067983', 'form': '13F-HR', 'period': '12-31-2020',
+                          'file_no': '028-04545', 'date_filed': '2021-02-16'}, 3)
+    hold_df = SEC_13F._holdings_frame(header_buf, cols)
+    assert 'put_call' not in hold_df.columns and 'othmgrdisc' not in hold_df.columns
+
+def test_appends_to_existing_buffers():
+    cols = SEC_13F.parse_infotable(PLAIN)
+    SEC_13F.parse_infotable(NAMESPACED, cols)
+    assert len(cols['CUSIP']) == 6
+    assert cols['put_call'] == ['Put', None, None] * 2
+
+def test_put_call_is_not_carried_to_later_holdings(edgar, filings):
+    # The stub repeats the fixture holdings, so only every third one is a Put
+    link_list, _no_hold = SEC_13F.xml_13f(filings)
+    hold_df = SEC_13F.holdings_13f(link_list)
+    assert len(hold_df) == 60
+    puts = hold_df.groupby('CIK', sort=False).put_call.apply(lambda s: s.notna().tolist())
+    assert puts.tolist() == [[n % 3 == 0 for n in range(10)]] * 6
+    # othmgrdisc is numeric, so the '4,8,11' list is coerced to NaN as well
+    assert hold_df.othmgrdisc.notna().tolist() == [n % 3 == 0 for n in range(10)] * 6
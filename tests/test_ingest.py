@@ -0,0 +1,127 @@
+# coding: utf-8
+
+import os
+
+import pytest
+
+import SEC_13F
+
+ZIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'form13f.zip')
+
+def count(db, table):
+    with SEC_13F.sql_transaction(db) as connection:
+        return connection.exec_driver_sql(f'SELECT COUNT(*) FROM {table}').scalar()
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = SEC_13F.BloomFilter(20000, error_rate=0.001)
+    keys = [f'accession:{n:018d}' for n in range(20000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false = sum(f'file_id:{n}' in bloom for n in range(20000))
+    assert false / 20000 < 0.005
+
+def test_ingest_index_persists(tmp_path):
+    path = str(tmp_path / 'ingest.db')
+    index = SEC_13F.IngestIndex(path)
+    index.add(accessions=['000095012321000001'], file_ids=['a', -42])
+    assert index.ingested('accession', ['000095012321000001', '000095012321000002']) == {
+        '000095012321000001'}
+    index.close()
+    index = SEC_13F.IngestIndex(path)
+    assert index.ingested('file_id', ['a', 'b', -42, 42]) == {'a', '-42'}
+    index.close()
+
+def test_ingest_index_grows_past_its_capacity(tmp_path):
+    index = SEC_13F.IngestIndex(str(tmp_path / 'ingest.db'))
+    keys = [str(n) for n in range(3000)]
+    for start in range(0, 3000, 500):
+        index.add(file_ids=keys[start:start + 500])
+    assert index._bloom.capacity >= 3000
+    assert index.ingested('file_id', keys + ['x']) == set(keys)
+    index.close()
+
+def test_accession_of_links():
+    for link in ('https://www.sec.gov/Archives/edgar/data/1067983/000095012321002786/index.json',
+                 'https://www.sec.gov/Archives/edgar/data/1067983/0000950123-21-002786.txt'):
+        assert SEC_13F._accession(link) == '000095012321002786'
+    assert SEC_13F._accession('https://www.sec.gov/Archives/edgar/daily-index/') is None
+
+def test_rerun_skips_ingested_filings(run, db, tmp_path):
+    index = ['--ingest-index', str(tmp_path / 'ingest.db')]
+    run(*index)
+    with SEC_13F.sql_transaction(db) as connection:
+        connection.exec_driver_sql('DELETE FROM dates')
+    requested = run(*index)
+    # Only the listings and master index files; every filing is skipped
+    assert all('/daily-index/' in path for path in requested)
+    assert count(db, 'file_info') == 6
+
+def test_quarantined_filing_is_fetched_and_loaded_on_rerun(run, edgar, db, tmp_path):
+    index = ['--ingest-index', str(tmp_path / 'ingest.db')]
+    broken = edgar.document(3, 'infotable.xml')
+    edgar.missing.add(broken)
+    run(*index)
+    assert (count(db, 'file_info'), count(db, 'holdings')) == (6, 50)
+
+    edgar.missing.clear()
+    requested = run(*index)
+    assert broken in requested
+    assert not [path for path in requested if '/data/' in path and path != broken]
+    assert (count(db, 'file_info'), count(db, 'holdings'), count(db, 'dates')) == (6, 60, 2)
+
+def test_quarantined_submission_is_fetched_and_loaded_on_rerun(run, edgar, db, tmp_path):
+    index = ['--ingest-index', str(tmp_path / 'ingest.db'), '--submissions']
+    cik, acc = edgar.accession(4)
+    broken = f'/Archives/edgar/data/{cik}/{acc}.txt'
+    edgar.missing.add(broken)
+    run(*index)
+    assert count(db, 'file_info') == 5
+
+    edgar.missing.clear()
+    requested = run(*index)
+    assert [path for path in requested if '/data/' in path] == [broken]
+    assert (count(db, 'file_info'), count(db, 'holdings'), count(db, 'dates')) == (6, 60, 2)
+
+def test_sql_transaction_runs_callbacks_after_commit(db):
+    calls = []
+    with SEC_13F.sql_transaction(db):
+        SEC_13F._after_commit(db, lambda: calls.append('committed'))
+        assert calls == []
+    assert calls == ['committed']
+    with pytest.raises(RuntimeError):
+        with SEC_13F.sql_transaction(db):
+            SEC_13F._after_commit(db, lambda: calls.append('rolled back'))
+            raise RuntimeError
+    assert calls == ['committed']
+
+def test_sql_13f_records_loaded_holdings(edgar, filings, db, tmp_path):
+    index = SEC_13F.configure_ingest_index(str(tmp_path / 'ingest.db'))
+    link_list, _no_hold = SEC_13F.xml_13f(filings)
+    _filers, info_df, header_df = SEC_13F.primary_docs_13f(link_list)
+    hold_df = SEC_13F.holdings_13f(link_list, header_df=header_df)
+    with pytest.raises(RuntimeError):
+        with SEC_13F.sql_transaction(db):
+            SEC_13F.sql_13f(db, 'holdings', hold_df, id_col='hold_id')
+            raise RuntimeError
+    assert index.ingested('file_id', info_df.file_id) == set()
+
+    SEC_13F.sql_13f(db, 'holdings', hold_df, id_col='hold_id')
+    assert index.ingested('file_id', info_df.file_id) == set(info_df.file_id)
+    requests = edgar.requests
+    assert SEC_13F.holdings_13f(link_list, header_df=header_df).empty
+    assert edgar.requests == requests
+
+def test_sql_bulk_13f_records_the_data_set(db, tmp_path):
+    index = SEC_13F.configure_ingest_index(str(tmp_path / 'ingest.db'))
+    try:
+        SEC_13F.sql_bulk_13f(db, ZIP, 'filers', 'file_info', 'holdings')
+        assert index.ingested('accession', ['000095012321002786', '000095012321002787']) == {
+            '000095012321002786'}
+        assert index.ingested('file_id', ['00010679830280454520201231']) == {
+            '00010679830280454520201231'}
+        # A run over the EDGAR website drops the filing before any request
+        link = 'https://www.sec.gov/Archives/edgar/data/1067983/000095012321002786/index.json'
+        assert SEC_13F.xml_13f([link]) == ([], [])
+    finally:
+        SEC_13F.configure_ingest_index(None)
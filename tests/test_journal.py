@@ -0,0 +1,86 @@
+# coding: utf-8
+
+import time
+
+import SEC_13F
+
+def test_latest_entry_wins(tmp_path):
+    journal = SEC_13F.Journal(str(tmp_path / 'journal.db'))
+    journal.record('stage', 'a', error=ValueError('bad xml'))
+    journal.record('stage', 'b', {'rows': 2})
+    assert journal.results('stage') == {'b': {'rows': 2}}
+    assert journal.quarantined('stage')[['key', 'error']].values.tolist() == [
+        ['a', 'ValueError: bad xml']]
+    journal.record('stage', 'a', {'rows': 1})
+    assert journal.results('stage') == {'a': {'rows': 1}, 'b': {'rows': 2}}
+    assert journal.quarantined().empty
+    journal.close()
+
+def test_journal_survives_reopening(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    journal = SEC_13F.Journal(path)
+    journal.record('stage', 'a', [1, 2, 3])
+    journal.close()
+    assert SEC_13F.Journal(path).results('stage') == {'a': [1, 2, 3]}
+
+def test_failure_is_quarantined_and_retried_on_resume(edgar, filings, tmp_path):
+    journal = SEC_13F.Journal(str(tmp_path / 'journal.db'))
+    link_list, _no_hold = SEC_13F.xml_13f(filings, journal=journal)
+    broken = edgar.document(3, 'primary_doc.xml')
+    edgar.missing.add(broken)
+
+    _filers, info_df, _header = SEC_13F.primary_docs_13f(link_list, journal=journal)
+    assert len(info_df) == 5
+    quarantined = journal.quarantined()
+    assert quarantined.stage.tolist() == ['primary_docs_13f']
+    assert quarantined.key.str.endswith(broken).tolist() == [True]
+
+    edgar.missing.clear()
+    requests = edgar.requests
+    _filers, info_df, _header = SEC_13F.primary_docs_13f(link_list, journal=journal)
+    # The five completed filings are replayed; only the failed one is fetched
+    assert edgar.requests - requests == 1
+    assert len(info_df) == 6
+    assert journal.quarantined().empty
+    journal.close()
+
+def test_completed_stage_replays_without_requests(edgar, filings, tmp_path):
+    journal = SEC_13F.Journal(str(tmp_path / 'journal.db'))
+    first, _no_hold = SEC_13F.xml_13f(filings, journal=journal)
+    requests = edgar.requests
+    again, _no_hold = SEC_13F.xml_13f(filings, journal=journal)
+    assert edgar.requests == requests
+    assert again == first
+    journal.close()
+
+def test_latest_entry_is_read_through_the_index(tmp_path):
+    journal = SEC_13F.Journal(str(tmp_path / 'journal.db'))
+    for attempt in range(3):
+        journal.record('stage', 'a', error=ValueError(attempt))
+    journal.record('stage', 'a', attempt)
+    assert journal.results('stage') == {'a': 2}
+    plan = journal._db.execute('EXPLAIN QUERY PLAN SELECT MAX(id) FROM entries '
+                               "WHERE stage = 'stage' AND key = 'a'").fetchall()
+    assert 'ix_entries_latest' in str(plan)
+    journal.close()
+
+def test_results_read_only_the_requested_keys(tmp_path):
+    journal = SEC_13F.Journal(str(tmp_path / 'journal.db'))
+    journal.record('stage', 'a', 1)
+    journal.record('stage', 'b', error=ValueError('bad xml'))
+    journal._db.execute("INSERT INTO entries (stage, key, status, result, recorded) "
+                        "VALUES ('stage', 'old', 'ok', x'00', 0)")
+    # The unreadable entry of another key is never unpickled
+    assert journal.results('stage', ['a', 'b', 'c']) == {'a': 1}
+    assert journal.results('stage', []) == {}
+    journal.close()
+
+def test_quarantined_since(tmp_path):
+    journal = SEC_13F.Journal(str(tmp_path / 'journal.db'))
+    journal.record('stage', 'a', error=ValueError('old'))
+    started = time.time()
+    journal.record('other', 'b', error=ValueError('new'))
+    assert journal.quarantined().key.tolist() == ['a', 'b']
+    assert journal.quarantined(since=started).key.tolist() == ['b']
+    assert journal.quarantined('stage', since=started).empty
+    journal.close()
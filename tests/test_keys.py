@@ -0,0 +1,102 @@
+# coding: utf-8
+
+import os, subprocess, sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import SEC_13F
+
+@pytest.fixture
+def surrogate(monkeypatch):
+    monkeypatch.setattr(SEC_13F, 'SURROGATE_KEYS', True)
+    monkeypatch.setattr(SEC_13F, 'READABLE_KEYS', True)
+
+def holdings(ciks, cusips):
+    return pd.DataFrame({'CIK': ciks, 'file_no': '028-04545',
+                         'period': pd.Timestamp('2020-12-31'), 'CUSIP': cusips})
+
+def test_keys_are_stable_across_processes():
+    # SipHash with pandas' fixed key; the values must never change
+    text = pd.Series(['00010679830280454520201231', '00010679830280454520201231:037833100'])
+    expected = [-4303385650898994163, -2997035061446953790]
+    assert SEC_13F.surrogate_keys(text).tolist() == expected
+    code = ('import pandas as pd, SEC_13F; print(SEC_13F.surrogate_keys(pd.Series('
+            f'{text.tolist()!r}, dtype=object)).tolist())')
+    for seed in ('0', '1'):
+        env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=os.path.dirname(SEC_13F.__file__))
+        out = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                             capture_output=True, text=True).stdout
+        assert out.strip() == repr(expected)
+
+def test_keys_do_not_depend_on_string_dtype():
+    text = ['a', 'b', None]
+    keys = [SEC_13F.surrogate_keys(pd.Series(text, dtype=dtype)) for dtype in (object, 'str')]
+    assert keys[0].dtype == np.int64
+    assert keys[0].tolist() == keys[1].tolist()
+
+def test_collision_in_frame_is_refused(monkeypatch):
+    monkeypatch.setattr(pd.util, 'hash_array', lambda values: np.zeros(len(values), 'uint64'))
+    with pytest.raises(ValueError, match='collision'):
+        SEC_13F.surrogate_keys(pd.Series(['a', 'b']))
+    assert SEC_13F.surrogate_keys(pd.Series(['a', 'a'])).tolist() == [0, 0]
+
+def test_readable_keys_are_the_default():
+    df = SEC_13F._add_hold_id(holdings(['0001067983'] * 2, ['037833100', '037833100']))
+    assert df.hold_id.tolist() == ['00010679830280454520201231:037833100'] * 2
+    assert 'hold_id_text' not in df.columns
+
+def test_repeated_cusips_get_distinct_keys(surrogate):
+    df = SEC_13F._add_hold_id(holdings(['1'] * 3 + ['2'], ['A', 'B', 'A', 'A']))
+    assert df.hold_id_text.tolist() == ['10280454520201231:A', '10280454520201231:B',
+                                        '10280454520201231:A:1', '20280454520201231:A']
+    assert df.hold_id.is_unique
+    assert (df.hold_id == SEC_13F.surrogate_keys(df.hold_id_text)).all()
+
+def test_chunked_filing_gets_the_same_keys(surrogate):
+    full = holdings(['1'] * 4 + ['2'] * 3, ['A', 'A', 'B', 'A', 'A', 'C', 'A'])
+    whole = SEC_13F._add_hold_id(full.copy())
+    carry = {}
+    chunks = pd.concat([SEC_13F._add_hold_id(full.iloc[a:b].copy(), carry)
+                        for a, b in ((0, 2), (2, 5), (5, 7))])
+    assert chunks.hold_id.tolist() == whole.hold_id.tolist()
+
+def test_readable_columns_can_be_left_out(surrogate):
+    SEC_13F.configure_keys(readable=False)
+    df = SEC_13F._add_hold_id(holdings(['1'], ['A']))
+    assert 'hold_id_text' not in df.columns
+    assert df.hold_id.dtype == np.int64
+
+def test_sql_table_gets_bigint_primary_key(surrogate, db):
+    df = SEC_13F._add_hold_id(holdings(['1'] * 3, ['A', 'B', 'A']))
+    SEC_13F.sql_13f(db, 'holdings', df, id_col='hold_id')
+    SEC_13F.sql_13f(db, 'holdings', pd.concat([df, df]), id_col='hold_id')
+    with SEC_13F.sql_transaction(db) as connection:
+        schema = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE name = 'holdings'").scalar()
+        rows = connection.exec_driver_sql('SELECT hold_id FROM holdings').scalars().all()
+    assert 'hold_id BIGINT NOT NULL' in schema
+    assert 'PRIMARY KEY (hold_id)' in schema
+    assert sorted(rows) == sorted(df.hold_id.tolist())
+
+def test_collision_with_stored_rows_is_refused(surrogate, db):
+    df = SEC_13F._add_hold_id(holdings(['1'] * 2, ['A', 'B']))
+    SEC_13F.sql_13f(db, 'holdings', df, id_col='hold_id')
+    clash = df.copy()
+    clash['hold_id_text'] = ['other:A', 'other:B']
+    with pytest.raises(ValueError, match='collide'):
+        SEC_13F.sql_13f(db, 'holdings', clash, id_col='hold_id')
+
+def test_surrogate_file_ids_skip_ingested_filings(surrogate, run, edgar, db, tmp_path):
+    index = ['--ingest-index', str(tmp_path / 'ingest.db'), '--surrogate-keys']
+    edgar.missing.add(edgar.document(3, 'infotable.xml'))
+    run(*index)
+    edgar.missing.clear()
+    requested = run(*index)
+    assert [path for path in requested if '/data/' in path] == [edgar.document(3, 'infotable.xml')]
+    with SEC_13F.sql_transaction(db) as connection:
+        file_ids = connection.exec_driver_sql('SELECT file_id FROM file_info').scalars().all()
+        holdings = connection.exec_driver_sql('SELECT COUNT(*) FROM holdings').scalar()
+    assert len(file_ids) == 6 and all(isinstance(f, int) for f in file_ids)
+    assert holdings == 60
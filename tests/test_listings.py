@@ -0,0 +1,62 @@
+# coding: utf-8
+
+import datetime, math
+
+import SEC_13F
+
+YEAR = '/Archives/edgar/daily-index/2021/index.json'
+QTR = '/Archives/edgar/daily-index/2021/QTR1/index.json'
+
+def test_listing_max_age():
+    today = datetime.date.today()
+    assert SEC_13F._listing_max_age(2001) == math.inf
+    assert SEC_13F._listing_max_age(2001, 2, ttl=5) == math.inf
+    # The current year is still open and so is its current quarter
+    assert SEC_13F._listing_max_age(today.year) == SEC_13F.LISTING_TTL
+    assert SEC_13F._listing_max_age(today.year, (today.month - 1) // 3 + 1, ttl=5) == 5
+
+def listing_requests(edgar, monkeypatch):
+    """Tags listings with an ETag and records the If-None-Match of each request."""
+    response = edgar.response
+    sent = []
+    def respond(path):
+        status, headers, body = response(path)
+        if path not in (YEAR, QTR):
+            return status, headers, body
+        etag = f'"{len(body)}"'
+        if sent[-1][1] == etag:
+            return 304, {'ETag': etag}, b''
+        return status, dict(headers, ETag=etag), body
+    monkeypatch.setattr(edgar, 'response', respond)
+    session = SEC_13F._get_session()
+    get = session.get
+    def send(url, headers, **kwargs):
+        sent.append((url[len(SEC_13F.SEC_URL):], headers.get('If-None-Match')))
+        return get(url, headers=headers, **kwargs)
+    monkeypatch.setattr(session, 'get', send)
+    return sent
+
+def test_open_listings_are_reused_then_revalidated(edgar, monkeypatch, tmp_path):
+    cache = SEC_13F.configure_cache(str(tmp_path / 'cache'))
+    monkeypatch.setattr(SEC_13F, '_quarter_closed', lambda year, qtr: False)
+    sent = listing_requests(edgar, monkeypatch)
+    links = SEC_13F.pull_link_list(2021, listing_ttl=60)
+    assert len(links) == 2 and [path for path, _etag in sent] == [YEAR, QTR]
+
+    # Fresh listings are served from the cache
+    del sent[:]
+    assert SEC_13F.pull_link_list(2021, listing_ttl=60) == links
+    assert sent == []
+
+    # Stale ones are sent as conditional GETs and the 304s reuse the body
+    assert SEC_13F.pull_link_list(2021, listing_ttl=0) == links
+    assert [path for path, etag in sent if etag] == [YEAR, QTR]
+    assert cache.stats['revalidated'] == 2
+
+def test_closed_listings_are_never_requested_again(edgar, monkeypatch, tmp_path):
+    SEC_13F.configure_cache(str(tmp_path / 'cache'))
+    sent = listing_requests(edgar, monkeypatch)
+    links = SEC_13F.pull_link_list(2021, listing_ttl=0)
+    del sent[:]
+    assert SEC_13F.pull_link_list(2021, listing_ttl=0) == links
+    assert sent == []
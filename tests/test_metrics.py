@@ -0,0 +1,112 @@
+# coding: utf-8
+
+import datetime, json, math, os, pstats, re
+
+import pytest
+
+import SEC_13F
+
+@pytest.fixture
+def exporting(monkeypatch):
+    """Restores the exporters and profiled stages configure_metrics() sets."""
+    monkeypatch.setattr(SEC_13F, 'PROFILE_STAGES', set())
+    monkeypatch.setattr(SEC_13F, 'PROFILE_DIR', SEC_13F.PROFILE_DIR)
+    yield
+    SEC_13F._exporters.clear()
+
+def load_rows(rows, fail=False):
+    SEC_13F.metrics().inc('sql_rows', len(rows))
+    if fail:
+        raise ValueError('boom')
+    return rows
+
+load_rows = SEC_13F._instrumented(load_rows)
+
+def test_counters_and_histograms():
+    metrics = SEC_13F.Metrics(buckets=(0.1, 1))
+    assert metrics.buckets == (0.1, 1, math.inf)
+    metrics.inc('requests', stage='fetch')
+    metrics.inc('requests', 2, stage='fetch')
+    metrics.inc('requests')
+    metrics.observe('seconds', 0.1, stage='fetch')
+    metrics.observe('seconds', 5, stage='fetch')
+    with metrics.timer('seconds'):
+        pass
+    assert metrics.histograms[('seconds', 'fetch')]['buckets'] == [1, 0, 1]
+    assert metrics.stage('fetch') == {'requests': 3, 'seconds_count': 2, 'seconds_sum': 5.1}
+    assert metrics.snapshot().keys() == {'fetch', None}
+    assert metrics.stage(None)['seconds_count'] == 1
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+def test_prometheus_exposition():
+    metrics = SEC_13F.Metrics(buckets=(0.1, 1))
+    metrics.inc('requests', 3, stage='fetch')
+    metrics.inc('requests')
+    metrics.observe('stage_seconds', 0.0625, stage='fetch')
+    metrics.observe('stage_seconds', 0.5, stage='fetch')
+    assert metrics.prometheus() == '''\
+# TYPE sec13f_requests_total counter
+sec13f_requests_total{stage=""} 1
+sec13f_requests_total{stage="fetch"} 3
+# TYPE sec13f_stage_seconds histogram
+sec13f_stage_seconds_bucket{stage="fetch",le="0.1"} 1
+sec13f_stage_seconds_bucket{stage="fetch",le="1.0"} 2
+sec13f_stage_seconds_bucket{stage="fetch",le="+Inf"} 2
+sec13f_stage_seconds_sum{stage="fetch"} 0.5625
+sec13f_stage_seconds_count{stage="fetch"} 2
+'''
+    assert metrics.prometheus('edgar').startswith('# TYPE edgar_requests_total counter\n')
+
+def test_pipeline_metrics_are_valid_exposition(edgar, filings):
+    SEC_13F.xml_13f(filings)
+    text = SEC_13F.metrics().prometheus()
+    sample = re.compile(r'[a-z0-9_]+\{stage="\w*"(,le="(\d+\.\d+|\+Inf)")?\} [0-9.e+-]+')
+    for line in text.splitlines():
+        assert re.fullmatch(r'# TYPE [a-z0-9_]+ (counter|histogram)', line) or \
+            sample.fullmatch(line), line
+    assert re.search(r'^sec13f_stage_seconds_count\{stage="xml_13f"\} [1-9]', text, re.M)
+
+def test_json_lines_record(exporting, tmp_path):
+    path = str(tmp_path / 'metrics.jsonl')
+    SEC_13F.configure_metrics(jsonl_path=path)
+    load_rows([1, 2, 3])
+    with pytest.raises(ValueError):
+        load_rows([4], fail=True)
+    with open(path) as file:
+        records = [json.loads(line) for line in file]
+    assert len(records) == 2
+    record = records[0]
+    assert set(record) == {'stage', 'start', 'seconds', 'rows', 'error', 'sql_rows',
+                           'sql_rows_per_sec'}
+    assert (record['stage'], record['rows'], record['error']) == ('load_rows', 3, None)
+    assert datetime.datetime.fromisoformat(record['start']) <= datetime.datetime.now()
+    # Counters are reported as the change during the call
+    assert record['sql_rows'] == 3
+    assert record['sql_rows_per_sec'] == pytest.approx(3 / record['seconds'])
+    assert (records[1]['rows'], records[1]['sql_rows']) == (0, 1)
+    assert records[1]['error'] == 'ValueError: boom'
+
+def test_prometheus_file(exporting, tmp_path):
+    path = str(tmp_path / 'sec13f.prom')
+    SEC_13F.configure_metrics(prometheus_path=path)
+    load_rows([1])
+    with open(path) as file:
+        assert file.read() == SEC_13F.metrics().prometheus()
+    assert os.listdir(tmp_path) == ['sec13f.prom']
+
+def test_profiled_stage(exporting, tmp_path, capsys):
+    SEC_13F.configure_metrics(profile='load_rows', profile_dir=str(tmp_path / 'profiles'))
+    load_rows(list(range(1000)))
+    assert 'Profile of load_rows written to' in capsys.readouterr().out
+    files = sorted(os.listdir(tmp_path / 'profiles'))
+    assert [re.sub(r'\d{8}T\d{12}', 'STAMP', f) for f in files] == [
+        'load_rows-STAMP.prof', 'load_rows-STAMP.tracemalloc.txt']
+    stats = pstats.Stats(str(tmp_path / 'profiles' / files[0]))
+    assert any(name == 'load_rows' for _file, _line, name in stats.stats)
+    with open(tmp_path / 'profiles' / files[1]) as file:
+        assert re.match(r'current=\d+ peak=\d+ bytes\n', file.readline())
+    # Stages that are not listed run unprofiled
+    SEC_13F.configure_metrics(profile_dir=str(tmp_path / 'profiles'))
+    load_rows([1])
+    assert len(os.listdir(tmp_path / 'profiles')) == 2
@@ -0,0 +1,67 @@
+# coding: utf-8
+
+import datetime, os
+
+import pandas as pd
+import pytest
+
+import SEC_13F
+
+pytest.importorskip('pyarrow')
+
+Q3, Q4 = datetime.date(2020, 9, 30), datetime.date(2020, 12, 31)
+
+def holdings(period, ids, shares=1.0):
+    return pd.DataFrame({'CIK': '0001067983',
+                         'period': pd.Timestamp(period),
+                         'name': [f'ISSUER {i}' for i in ids],
+                         'CUSIP': [f'{i:09d}' for i in ids],
+                         'class': 'COM',
+                         'shares': shares,
+                         'hold_id': [f'{period:%Y%m%d}:{i:09d}' for i in ids]})
+
+def files(root):
+    stats = {}
+    for d, _dirs, names in os.walk(root):
+        for f in names:
+            stat = os.stat(os.path.join(d, f))
+            stats[os.path.join(d, f)] = (stat.st_ino, stat.st_mtime_ns)
+    return stats
+
+def test_partitions_by_period(tmp_path):
+    root = str(tmp_path / 'holdings')
+    SEC_13F.parquet_13f(root, holdings(Q3, range(3)), id_col='hold_id')
+    SEC_13F.parquet_13f(root, holdings(Q4, range(2)), id_col='hold_id')
+    assert sorted(os.listdir(root)) == ['period=2020-09-30', 'period=2020-12-31']
+    q4 = SEC_13F.read_parquet_13f(root, columns=['hold_id', 'CUSIP'],
+                                  filters=[('period', '=', Q4)])
+    assert list(q4.columns) == ['hold_id', 'CUSIP']
+    assert sorted(q4.hold_id) == ['20201231:000000000', '20201231:000000001']
+
+def test_rewrite_is_idempotent_and_leaves_other_partitions(tmp_path):
+    root = str(tmp_path / 'holdings')
+    SEC_13F.parquet_13f(root, holdings(Q3, range(3)), id_col='hold_id')
+    SEC_13F.parquet_13f(root, holdings(Q4, range(3)), id_col='hold_id')
+    q3_files = {f: t for f, t in files(root).items() if 'period=2020-09-30' in f}
+
+    for _ in range(2):
+        SEC_13F.parquet_13f(root, holdings(Q4, range(2, 5), shares=2.0), id_col='hold_id')
+    df = SEC_13F.read_parquet_13f(root)
+    assert len(df) == 3 + 5
+    assert df.hold_id.is_unique
+    q4 = df[df.period == pd.Timestamp(Q4)].set_index('CUSIP').shares.sort_index()
+    # Rows already stored are kept and the new rows replace equal ids
+    assert q4.tolist() == [1.0, 1.0, 2.0, 2.0, 2.0]
+    assert {f: t for f, t in files(root).items() if 'period=2020-09-30' in f} == q3_files
+
+def test_dictionary_encodes_repeated_strings(tmp_path):
+    import pyarrow.parquet as pq
+    root = str(tmp_path / 'holdings')
+    SEC_13F.parquet_13f(root, holdings(Q4, range(3)), id_col='hold_id')
+    path = next(iter(files(root)))
+    schema = pq.read_schema(path)
+    assert str(schema.field('CUSIP').type).startswith('dictionary')
+
+def test_parquet_13f_requires_an_id_column(tmp_path):
+    with pytest.raises(ValueError):
+        SEC_13F.parquet_13f(str(tmp_path), holdings(Q4, range(1)))
@@ -0,0 +1,60 @@
+# coding: utf-8
+
+import re, threading
+
+import pandas as pd
+import pytest
+
+import SEC_13F
+
+def test_parse_pool_matches_in_process_parsing(edgar, filings):
+    link_list, _no_hold = SEC_13F.xml_13f(filings)
+    in_process = SEC_13F.holdings_13f(link_list)
+    SEC_13F.configure_parse(1)
+    try:
+        pooled = SEC_13F.holdings_13f(link_list)
+    finally:
+        SEC_13F.configure_parse(0)
+    pd.testing.assert_frame_equal(pooled, in_process)
+    # Results come back in the order of the links
+    ciks = [re.search(r'/data/(\d+)/', link['doc_xml']).group(1).zfill(10)
+            for link in link_list]
+    assert pooled.CIK.drop_duplicates().tolist() == ciks
+
+def test_iter_batches():
+    assert list(SEC_13F.iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(SEC_13F.iter_batches([], 2)) == []
+
+def test_writer_commits_while_the_next_batch_is_produced(db, monkeypatch):
+    second = threading.Event()
+    write = SEC_13F.sql_13f
+    def slow_write(*args, **kwargs):
+        # A writer on the producing thread would wait here forever
+        assert second.wait(5)
+        write(*args, **kwargs)
+    monkeypatch.setattr(SEC_13F, 'sql_13f', slow_write)
+    committed = []
+
+    def batches():
+        yield [('t', pd.DataFrame({'id': ['a']}), 'id')], lambda: committed.append(1)
+        second.set()
+        yield [('t', pd.DataFrame({'id': ['b', 'c']}), 'id')], lambda: committed.append(2)
+
+    assert SEC_13F.sql_13f_batches(db, batches()) == 2
+    assert committed == [1, 2]
+    with SEC_13F.sql_transaction(db) as connection:
+        assert connection.exec_driver_sql('SELECT COUNT(*) FROM t').scalar() == 3
+
+def test_failed_batch_is_rolled_back_and_stops_the_writer(db):
+    committed = []
+    def batches():
+        yield [('t', pd.DataFrame({'id': ['a']}), 'id')], lambda: committed.append(1)
+        yield [('t', pd.DataFrame({'id': ['b']}), 'id'),
+               ('u', pd.DataFrame({'id': ['b']}), None)], lambda: committed.append(2)
+        yield [('t', pd.DataFrame({'id': ['c']}), 'id')], lambda: committed.append(3)
+
+    with pytest.raises(ValueError, match='No id column'):
+        SEC_13F.sql_13f_batches(db, batches())
+    assert committed == [1]
+    with SEC_13F.sql_transaction(db) as connection:
+        assert connection.exec_driver_sql('SELECT id FROM t').scalars().all() == ['a']
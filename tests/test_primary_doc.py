@@ -0,0 +1,90 @@
+# coding: utf-8
+
+import datetime, json, os, re, warnings
+
+import pytest
+
+import SEC_13F
+
+RECORDED = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'fixtures')
+FILED = datetime.datetime(2021, 2, 16)
+
+with open(os.path.join(RECORDED, 'primary_doc.xml'), 'rb') as file:
+    RECORDED_DOC = file.read()
+# A combination report also lists the other managers reporting for the filer
+OTHER_MANAGERS = RECORDED_DOC.replace(b'</form13FFileNumber>\n', b'''</form13FFileNumber>
+      <otherManagersInfo>
+        <otherManager>
+          <cik>0000200406</cik>
+          <form13FFileNumber>028-00001</form13FFileNumber>
+          <name>Vanguard Group Inc</name>
+        </otherManager>
+        <otherManager>
+          <form13FFileNumber>028-00002</form13FFileNumber>
+          <name>Other Manager LLC</name>
+        </otherManager>
+      </otherManagersInfo>
+''', 1)
+
+def baseline_fields(content):
+    """The filer and file info fields as the BeautifulSoup parser read them."""
+    bs4 = pytest.importorskip('bs4')
+    with warnings.catch_warnings():
+        # The baseline read the xml with the lxml HTML parser
+        warnings.simplefilter('ignore')
+        soup = bs4.BeautifulSoup(content, 'lxml')
+    text = lambda tag, name: tag.find(re.compile('.*' + name)).text
+    fields = {name: text(soup, tag) for name, tag in (
+        ('CIK', 'cik'), ('form', 'submissiontype'), ('type', 'reporttype'),
+        ('file_no', 'form13ffilenumber'), ('instruct5', 'provideinfoforinstruction5'),
+        ('period', 'periodofreport'), ('quarter', 'reportcalendarorquarter'),
+        ('amend', 'isamendment'), ('entry_total', 'tableentrytotal'),
+        ('value_total', 'tablevaluetotal'), ('incld_mgrs', 'otherincludedmanagerscount'),
+        ('confd_flag', 'isconfidentialomitted'))}
+    manager = soup.find(re.compile('.*filingmanager'))
+    fields.update({name: text(manager, name)
+                   for name in ('street1', 'city', 'stateorcountry', 'zipcode')})
+    fields['company'] = text(manager, 'name')
+    block = soup.find_all(re.compile('.*signatureblock'))[-1]
+    fields['signature'] = json.dumps({name: text(block, tag) for name, tag in (
+        ('name', 'name'), ('title', 'title'), ('phone', 'phone'), ('city', 'city'),
+        ('stateorcountry', 'stateorcountry'), ('sig_date', 'signaturedate'))})
+    return fields
+
+@pytest.mark.parametrize('content', [RECORDED_DOC, OTHER_MANAGERS], ids=['recorded', 'other'])
+def test_fields_match_the_baseline_parser(content):
+    doc = SEC_13F.parse_primary_doc(content)
+    row = dict(SEC_13F._file_info_row(doc, FILED), **SEC_13F._filer_row(doc))
+    expected = baseline_fields(content)
+    assert {name: row[name] for name in expected} == expected
+
+def test_included_managers():
+    row = SEC_13F._file_info_row(SEC_13F.parse_primary_doc(RECORDED_DOC), FILED)
+    assert 'oth_mgr' not in row
+    # The baseline searched for a literal '.*othermanager2' tag and never filled this
+    assert [json.loads(m) for m in re.findall(r'\{.*?\}', row['incl_mgr'])] == [
+        {'seq_no': '1', 'cik': '0000949012', 'name': 'Berkshire Hathaway Finance',
+         'file_no': '028-05194'},
+        {'seq_no': '2', 'name': 'National Indemnity Co', 'file_no': '028-06102'}]
+
+def test_other_managers():
+    doc = SEC_13F.parse_primary_doc(OTHER_MANAGERS)
+    assert doc['oth_mgr'] == [
+        {'CIK': '0000200406', 'file_no': '028-00001', 'name': 'Vanguard Group Inc'},
+        {'file_no': '028-00002', 'name': 'Other Manager LLC'}]
+    # otherManager elements nested in otherManager2 belong to incl_mgr only
+    assert len(doc['incl_mgr']) == 2
+    row = SEC_13F._file_info_row(doc, FILED)
+    assert row['oth_mgr'] == ' '.join(json.dumps(m) for m in doc['oth_mgr'])
+
+def test_file_info_frame_columns(edgar, filings):
+    link_list, _no_hold = SEC_13F.xml_13f(filings)
+    info_df = SEC_13F.file_info_13f(link_list)
+    assert info_df.incl_mgr.str.count('"seq_no"').tolist() == [2] * 6
+    assert info_df.value_total.dtype == float
+    assert info_df.period.tolist() == [datetime.datetime(2020, 12, 31)] * 6
+
+def test_missing_required_field_is_reported():
+    content = re.sub(rb'<signatureBlock>.*</signatureBlock>', b'', RECORDED_DOC, flags=re.S)
+    with pytest.raises(ValueError, match='signatureblock'):
+        SEC_13F._file_info_row(SEC_13F.parse_primary_doc(content), FILED)
@@ -0,0 +1,95 @@
+# coding: utf-8
+
+import pandas as pd
+import pytest
+import sqlalchemy
+
+import SEC_13F
+
+def holdings(ids):
+    return pd.DataFrame({'hold_id': [f'h{i}' for i in ids],
+                         'CUSIP': [f'{i:09d}' for i in ids],
+                         'shares': [float(i) for i in ids]})
+
+def count(path, table):
+    with SEC_13F.sql_transaction(path) as connection:
+        return connection.exec_driver_sql(f'SELECT COUNT(*) FROM {table}').scalar()
+
+def table_names(path):
+    with SEC_13F.sql_transaction(path) as connection:
+        return [row[0] for row in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+def test_sql_13f_inserts_only_missing_ids(db):
+    SEC_13F.sql_13f(db, 'holdings', holdings(range(5)), id_col='hold_id')
+    SEC_13F.sql_13f(db, 'holdings', holdings(range(3, 8)), id_col='hold_id')
+    assert count(db, 'holdings') == 8
+
+def test_staging_table_is_temporary(db):
+    statements = []
+    SEC_13F.sql_13f(db, 'holdings', holdings(range(5)), id_col='hold_id')
+    sqlalchemy.event.listen(SEC_13F.get_engine(db), 'before_cursor_execute',
+                            lambda conn, cursor, statement, *args: statements.append(statement))
+    SEC_13F.sql_13f(db, 'holdings', holdings(range(3, 8)), id_col='hold_id')
+    assert any(s.lstrip().startswith('CREATE TEMPORARY TABLE holdings_stage_')
+               for s in statements)
+    assert table_names(db) == ['holdings']
+
+def test_sql_13f_writes_roll_back_together(db):
+    SEC_13F.sql_13f(db, 'holdings', holdings(range(5)), id_col='hold_id')
+    with pytest.raises(RuntimeError):
+        with SEC_13F.sql_transaction(db):
+            SEC_13F.sql_13f(db, 'holdings', holdings(range(5, 10)), id_col='hold_id')
+            SEC_13F.sql_13f(db, 'filers', holdings(range(3)), id_col='hold_id')
+            raise RuntimeError('crash between writes')
+    assert count(db, 'holdings') == 5
+    assert table_names(db) == ['holdings']
+
+def filings():
+    df = pd.DataFrame({'CIK': ['0000000001', None, '0000000003'],
+                       'value_total': [1.5, 2.0, None],
+                       'period': pd.to_datetime(['2020-12-31', '2020-09-30', '2020-12-31']),
+                       'date_filed': pd.to_datetime(['2021-02-16 16:05:12', None,
+                                                     '2021-02-16 09:00:00'])},
+                      index=pd.Index(['f0', 'f1', 'f2'], name='file_id'))
+    return df, {'period': sqlalchemy.types.Date}
+
+def bulk_load(db, table, method, **kwargs):
+    df, dtype = filings()
+    with SEC_13F.sql_transaction(db) as connection:
+        used = SEC_13F.bulk_load(connection, table, df, dtype, method=method, **kwargs)
+        return used, pd.read_sql_table(table, connection)
+
+def test_bulk_load_picks_executemany_for_sqlite(db):
+    used, loaded = bulk_load(db, 'bulk', 'auto', chunksize=2)
+    assert used == 'executemany'
+    # Rows, nulls and dates come back as to_sql() writes them
+    pd.testing.assert_frame_equal(loaded, bulk_load(db, 'reference', 'to_sql')[1])
+
+@pytest.mark.parametrize('method', ['copy', 'load'])
+def test_bulk_load_falls_back_to_to_sql(db, method):
+    # sqlite3 has no COPY and refuses LOAD DATA without breaking the transaction
+    used, loaded = bulk_load(db, 'bulk', method)
+    assert used == 'to_sql'
+    pd.testing.assert_frame_equal(loaded, bulk_load(db, 'reference', 'to_sql')[1])
+
+@pytest.mark.parametrize('dialect, expected', [('postgresql', 'to_sql'), ('mysql', 'load'),
+                                               ('mariadb', 'load')])
+def test_bulk_load_picks_the_dialects_path(db, monkeypatch, dialect, expected):
+    called = []
+    for name in ('_copy_postgresql', '_load_data_mysql'):
+        monkeypatch.setattr(SEC_13F, name, lambda *args, name=name: called.append(name))
+    with SEC_13F.sql_transaction(db) as connection:
+        monkeypatch.setattr(connection.dialect, 'name', dialect)
+        # The sqlite3 cursor stands in for a PostgreSQL driver without COPY
+        assert SEC_13F.bulk_load(connection, 'bulk', filings()[0]) == expected
+    assert called == (['_load_data_mysql'] if expected == 'load' else [])
+
+def test_bulk_load_creates_empty_tables(db):
+    df, dtype = filings()
+    with SEC_13F.sql_transaction(db) as connection:
+        assert SEC_13F.bulk_load(connection, 'bulk', df.head(0), dtype) == 'executemany'
+    assert table_names(db) == ['bulk'] and count(db, 'bulk') == 0
+    with pytest.raises(ValueError):
+        with SEC_13F.sql_transaction(db) as connection:
+            SEC_13F.bulk_load(connection, 'bulk', df, method='bcp')
@@ -0,0 +1,74 @@
+# coding: utf-8
+
+# fixtures/0000950123-21-002786.txt is the complete submission file of the
+# recorded filing in benchmarks/fixtures, laid out as EDGAR serves it: the
+# SGML header, the primary doc, the information table and a text exhibit.
+
+import datetime, os
+
+import pandas as pd
+
+import SEC_13F
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RECORDED = os.path.join(FIXTURES, '..', '..', 'benchmarks', 'fixtures')
+
+def read(*path):
+    with open(os.path.join(*path), 'rb') as file:
+        return file.read()
+
+SUBMISSION = read(FIXTURES, '0000950123-21-002786.txt')
+LINK = 'https://www.sec.gov/Archives/edgar/data/1067983/0000950123-21-002786.txt'
+
+def without_information_table(content):
+    start = content.index(b'<DOCUMENT>\n<TYPE>INFORMATION TABLE')
+    return content[:start] + content[content.index(b'</DOCUMENT>\n', start) + 12:]
+
+def test_split_submission():
+    accepted, documents = SEC_13F.split_submission(SUBMISSION)
+    assert accepted == '2021-02-16 16:05:12'
+    assert [(d['type'], d['filename']) for d in documents] == [
+        ('13F-HR', 'primary_doc.xml'), ('INFORMATION TABLE', 'form13fInfoTable.xml'),
+        ('EX-99', 'exhibit99.txt')]
+    # The <XML> wrappers are removed and the documents come back byte for byte
+    assert documents[0]['text'] == read(RECORDED, 'primary_doc.xml').strip()
+    assert documents[1]['text'] == read(RECORDED, 'infotable.xml').strip()
+    assert documents[2]['text'].startswith(b'Confidential information')
+
+def test_split_submission_without_documents():
+    assert SEC_13F.split_submission(b'<SEC-DOCUMENT>\n</SEC-DOCUMENT>\n') == (None, [])
+
+def test_submission_matches_the_documents():
+    filer_row, info_row, header_row, hold_cols = SEC_13F._parse_submission(LINK, [SUBMISSION])
+    doc = SEC_13F.parse_primary_doc(read(RECORDED, 'primary_doc.xml'))
+    assert filer_row == SEC_13F._filer_row(doc)
+    assert info_row == SEC_13F._file_info_row(doc, '2021-02-16 16:05:12')
+    assert header_row == SEC_13F._hold_header_row(doc, '2021-02-16 16:05:12')
+    assert hold_cols == SEC_13F.parse_infotable(read(RECORDED, 'infotable.xml'))
+
+def test_missing_information_table(edgar, monkeypatch):
+    assert SEC_13F._parse_submission(LINK, [without_information_table(SUBMISSION)]) is None
+    paths = ['/Archives/edgar/data/%d/%s.txt' % edgar.accession(n) for n in (0, 1)]
+    response = edgar.response
+    monkeypatch.setattr(edgar, 'response', lambda path: (200, {}, without_information_table(
+        response(path)[2])) if path == paths[0] else response(path))
+    links = [SEC_13F.SEC_URL + path for path in paths]
+    _filers_df, info_df, hold_df, no_hold = SEC_13F.submissions_13f(links)
+    assert no_hold == links[:1]
+    assert info_df.CIK.tolist() == ['0001000001']
+    assert len(hold_df) == 10
+
+def test_matches_the_xml_path(edgar):
+    idx = SEC_13F.parse_links(SEC_13F.pull_link_list(2021), forms='13F-HR')
+    link_list, _no_hold = SEC_13F.xml_13f(SEC_13F.xml_list(idx, '13F-HR'))
+    filers_df, info_df, header_df = SEC_13F.primary_docs_13f(link_list)
+    hold_df = SEC_13F.holdings_13f(link_list, header_df=header_df)
+
+    requests = edgar.requests
+    submitted = SEC_13F.submissions_13f(SEC_13F.txt_list(idx, '13F-HR'))
+    # One request per filing instead of three
+    assert edgar.requests - requests == 6
+    for xml_df, txt_df in zip((filers_df, info_df, hold_df), submitted):
+        pd.testing.assert_frame_equal(txt_df, xml_df)
+    assert submitted[1].date_filed.tolist() == [datetime.datetime(2021, 2, 16, 16, 5, 12)] * 6
+    assert submitted[3] == []